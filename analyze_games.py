@@ -0,0 +1,193 @@
+"""
+Batch analysis of PGN games.
+
+Every position of every game is searched at a fixed node budget with ChessLogic.search.
+Each move gets an evaluation, the engine's preferred move, its centipawn loss, and a blunder
+flag when the loss exceeds a threshold. Games are spread over a process pool, and each result
+is appended to a JSONL file as soon as it finishes. With --resume, games already in the output
+file are skipped, so an interrupted run picks up where it stopped.
+
+Usage:
+    python analyze_games.py games.pgn [more.pgn ...] -o analysis.jsonl [--nodes 20000] [--workers 4] [--resume]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from engine import ChessLogic
+from engine.pgn import read_games, parse_san, move_to_san
+
+_worker_logic = None # One ChessLogic per worker process, reused for every game it analyses
+
+
+def _init_worker(tablebase_dir: str | None):
+    global _worker_logic
+    _worker_logic = ChessLogic()
+    if tablebase_dir:
+        _worker_logic.load_tablebases(tablebase_dir)
+
+
+def _search_position(chess_logic: ChessLogic, node_limit: int) -> tuple[int, str | None, int]:
+    """
+    Searches the current position and returns (centipawns for the side to move, best move in SAN, nodes).
+    Finished games are scored directly: mated is -MATE_CENTIPAWNS, stalemate is 0.
+    """
+    if not chess_logic.generate_legal_moves():
+        mated = chess_logic.is_opponent_in_check(chess_logic.current_turn)
+        return (-ChessLogic.MATE_CENTIPAWNS if mated else 0), None, 0
+    result = chess_logic.search(node_limit=node_limit)
+    start_pos, end_pos = result.best_move
+    return chess_logic.score_to_centipawns(result.score), move_to_san(chess_logic, start_pos, end_pos), result.nodes
+
+
+def analyze_game(task: tuple) -> dict:
+    """
+    Analyses one game in a worker process and returns its JSON-ready result.
+    `task` is (pgn_path, game_number, game, node_limit, blunder_threshold).
+    """
+    pgn_path, game_number, game, node_limit, blunder_threshold = task
+    chess_logic = _worker_logic
+    started = time.perf_counter()
+    output = {
+        'file': pgn_path,
+        'game': game_number,
+        'white': game.headers.get('White', '?'),
+        'black': game.headers.get('Black', '?'),
+        'result': game.result,
+        'moves': [],
+    }
+    total_nodes = 0
+    try:
+        chess_logic.set_fen(game.headers.get('FEN', ChessLogic.STARTING_FEN))
+        score, best_san, nodes = _search_position(chess_logic, node_limit)
+        total_nodes += nodes
+        for ply, san in enumerate(game.moves):
+            white_to_move = chess_logic.current_turn == 'w'
+            start_pos, end_pos, promotion = parse_san(chess_logic, san)
+            played_san = move_to_san(chess_logic, start_pos, end_pos, promotion)
+            chess_logic.make_move(start_pos, end_pos, promotion or 'Q')
+
+            next_score, next_best_san, nodes = _search_position(chess_logic, node_limit)
+            total_nodes += nodes
+            # The mover's loss: best achievable score minus the score after the move, both from the mover's view
+            loss = 0 if played_san == best_san else max(0, score + next_score)
+            output['moves'].append({
+                'ply': ply + 1,
+                'san': played_san,
+                'best': best_san,
+                'eval_before': score if white_to_move else -score, # White's point of view
+                'eval_after': -next_score if white_to_move else next_score,
+                'cp_loss': loss,
+                'blunder': loss >= blunder_threshold,
+            })
+            score, best_san = next_score, next_best_san
+    except ValueError as e:
+        output['error'] = str(e) # Moves analysed before the bad one are kept
+    output['blunders'] = sum(1 for move in output['moves'] if move['blunder'])
+    output['nodes'] = total_nodes
+    output['seconds'] = round(time.perf_counter() - started, 3)
+    return output
+
+
+def completed_games(output_path: str) -> set[tuple[str, int]]:
+    """
+    Returns the (file, game number) pairs already present in an output file.
+    A partial last line from an interrupted run is ignored, so that game is analysed again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done.add((record['file'], record['game']))
+    return done
+
+
+def _drop_partial_line(output_path: str):
+    """
+    Cuts off an unterminated last line left by an interrupted run, so appending stays valid JSONL.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as output_file:
+        data = output_file.read()
+        if data and not data.endswith(b'\n'):
+            output_file.truncate(data.rfind(b'\n') + 1)
+
+
+def iter_tasks(pgn_paths: list[str], done: set, node_limit: int, blunder_threshold: int):
+    for pgn_path in pgn_paths:
+        for game_number, game in enumerate(read_games(pgn_path), start=1):
+            if (pgn_path, game_number) not in done:
+                yield pgn_path, game_number, game, node_limit, blunder_threshold
+
+
+def run_analysis(pgn_paths: list[str], output_path: str, node_limit: int = 20000, workers: int | None = None,
+                 blunder_threshold: int = 300, resume: bool = False, tablebase_dir: str | None = None) -> int:
+    """
+    Analyses all games and appends one JSON line per game to `output_path`.
+    Returns the number of games analysed in this run.
+    """
+    workers = workers or os.cpu_count() or 1
+    pgn_paths = [os.path.abspath(path) for path in pgn_paths]
+    if resume:
+        _drop_partial_line(output_path)
+    done = completed_games(output_path) if resume else set()
+    if resume and done:
+        print(f"Resuming: {len(done)} games already analysed", file=sys.stderr)
+
+    # Keep only a few games per worker in flight, so memory does not grow with the corpus
+    tasks = iter_tasks(pgn_paths, done, node_limit, blunder_threshold)
+    analysed = blunders = nodes = 0
+    started = time.perf_counter()
+    with open(output_path, 'a' if resume else 'w', encoding='utf-8') as output_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tablebase_dir,)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(analyze_game, task))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                output_file.write(json.dumps(result) + '\n')
+                output_file.flush()
+                analysed += 1
+                blunders += result['blunders']
+                nodes += result['nodes']
+
+    elapsed = time.perf_counter() - started
+    print(f"{analysed} games analysed, {blunders} blunders, {nodes} nodes in {elapsed:.1f}s "
+          f"({int(nodes / elapsed) if elapsed else 0} nps overall)", file=sys.stderr)
+    return analysed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse every move of PGN games with the ChessLogic search.")
+    parser.add_argument('pgn', nargs='+', help="PGN files to analyse")
+    parser.add_argument('-o', '--output', required=True, help="JSONL file to write, one line per game")
+    parser.add_argument('--nodes', type=int, default=20000, help="Node budget per position")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--blunder-threshold', type=int, default=300, help="Centipawn loss that counts as a blunder")
+    parser.add_argument('--resume', action='store_true', help="Skip games already in the output file and append")
+    parser.add_argument('--tablebases', default=None, help="Directory of generated endgame tablebases")
+    args = parser.parse_args(argv)
+    run_analysis(args.pgn, args.output, args.nodes, args.workers, args.blunder_threshold, args.resume, args.tablebases)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
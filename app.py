@@ -1,6 +1,9 @@
 from flask import Flask, render_template, request, jsonify
 import json
 import os
+import threading
+
+from engine import ChessLogic
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
@@ -17,6 +20,19 @@ class PieceColor:
     WHITE = "white"
     BLACK = "black"
 
+# FEN letters for each piece type (upper case for white, lower case for black)
+FEN_PIECE_LETTERS = {
+    PieceType.PAWN: "p",
+    PieceType.KNIGHT: "n",
+    PieceType.BISHOP: "b",
+    PieceType.ROOK: "r",
+    PieceType.QUEEN: "q",
+    PieceType.KING: "k",
+}
+FEN_PIECE_TYPES = {letter: piece_type for piece_type, letter in FEN_PIECE_LETTERS.items()}
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
 # Game modes
 class GameMode:
     HUMAN_VS_HUMAN = "human_vs_human"
@@ -33,7 +49,115 @@ class ChessGame:
         self.game_mode = GameMode.HUMAN_VS_HUMAN
         self.promotion_pending = False
         self.promotion_position = None
-        
+        # FEN state not otherwise tracked by the board
+        self.castling_rights = "KQkq"
+        self.en_passant_target = None # {"row", "col"} of the square behind a pawn that just double-moved
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+    @classmethod
+    def from_fen(cls, fen):
+        game = cls()
+        game.load_fen(fen)
+        return game
+
+    def load_fen(self, fen):
+        # Parse into locals first so a malformed FEN leaves the game untouched
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: '{fen}'")
+        placement, turn, castling, en_passant = fields[:4]
+        counters = fields[4:6] if len(fields) >= 6 else ["0", "1"]
+
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"FEN placement needs 8 ranks: '{placement}'")
+        board = [[None for _ in range(8)] for _ in range(8)]
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                if char.lower() not in FEN_PIECE_TYPES or col > 7:
+                    raise ValueError(f"Invalid FEN rank '{rank}'")
+                color = PieceColor.WHITE if char.isupper() else PieceColor.BLACK
+                board[row][col] = {"type": FEN_PIECE_TYPES[char.lower()], "color": color, "position": {"row": row, "col": col}}
+                col += 1
+            if col != 8:
+                raise ValueError(f"FEN rank '{rank}' does not have 8 squares")
+
+        if turn not in ("w", "b"):
+            raise ValueError(f"Invalid side to move '{turn}' in FEN")
+        if castling != "-" and any(char not in "KQkq" for char in castling):
+            raise ValueError(f"Invalid castling field '{castling}' in FEN")
+        en_passant_target = None
+        if en_passant != "-":
+            if len(en_passant) != 2 or en_passant[0] not in "abcdefgh" or en_passant[1] not in "36":
+                raise ValueError(f"Invalid en passant square '{en_passant}' in FEN")
+            en_passant_target = {"row": 8 - int(en_passant[1]), "col": ord(en_passant[0]) - ord("a")}
+        try:
+            halfmove_clock, fullmove_number = int(counters[0]), int(counters[1])
+        except ValueError:
+            raise ValueError(f"Invalid move counters in FEN: '{fen}'") from None
+
+        self.board = board
+        self.current_turn = PieceColor.WHITE if turn == "w" else PieceColor.BLACK
+        self.castling_rights = "" if castling == "-" else castling
+        self.en_passant_target = en_passant_target
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.selected_piece = None
+        self.possible_moves = []
+        self.captured_pieces = {PieceColor.WHITE: [], PieceColor.BLACK: []}
+        self.promotion_pending = False
+        self.promotion_position = None
+
+    def to_fen(self):
+        ranks = []
+        for row in self.board:
+            rank = ""
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = FEN_PIECE_LETTERS[piece["type"]]
+                rank += letter.upper() if piece["color"] == PieceColor.WHITE else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        en_passant = "-"
+        if self.en_passant_target:
+            en_passant = "abcdefgh"[self.en_passant_target["col"]] + str(8 - self.en_passant_target["row"])
+        turn = "w" if self.current_turn == PieceColor.WHITE else "b"
+        return f"{'/'.join(ranks)} {turn} {self.castling_rights or '-'} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
+
+    def update_fen_state(self, piece, from_row, from_col, to_row, to_col, captured):
+        # Castling rights are lost when the king or a rook leaves home, or a rook is captured at home
+        rook_homes = {(7, 7): "K", (7, 0): "Q", (0, 7): "k", (0, 0): "q"}
+        if piece["type"] == PieceType.KING:
+            lost = "KQ" if piece["color"] == PieceColor.WHITE else "kq"
+        else:
+            lost = rook_homes.get((from_row, from_col), "") + rook_homes.get((to_row, to_col), "")
+        self.castling_rights = "".join(right for right in self.castling_rights if right not in lost)
+
+        if piece["type"] == PieceType.PAWN and abs(to_row - from_row) == 2:
+            self.en_passant_target = {"row": (from_row + to_row) // 2, "col": from_col}
+        else:
+            self.en_passant_target = None
+
+        if piece["type"] == PieceType.PAWN or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if piece["color"] == PieceColor.BLACK:
+            self.fullmove_number += 1
+
     def create_initial_board(self):
         # Create an 8x8 empty board
         board = [[None for _ in range(8)] for _ in range(8)]
@@ -124,6 +248,8 @@ class ChessGame:
         if target is not None:
             self.captured_pieces[piece["color"]].append(target)
         
+        self.update_fen_state(piece, from_row, from_col, to_row, to_col, target)
+
         # Move the piece
         self.board[to_row][to_col] = piece
         self.board[from_row][from_col] = None
@@ -174,12 +300,19 @@ class ChessGame:
             "capturedPieces": self.captured_pieces,
             "gameMode": self.game_mode,
             "promotionPending": self.promotion_pending,
-            "promotionPosition": self.promotion_position
+            "promotionPosition": self.promotion_position,
+            "fen": self.to_fen()
         }
 
 # Create a global game instance
 chess_game = ChessGame()
 
+# The engine that answers /api/analyze; reused between requests so its caches stay warm
+ANALYSIS_MAX_DEPTH = 4
+ANALYSIS_TIME_LIMIT = 2.0 # Seconds
+analysis_logic = ChessLogic()
+analysis_lock = threading.Lock() # The engine holds one position at a time
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -220,6 +353,41 @@ def promote_pawn():
     success = chess_game.promote_pawn(piece_type)
     return jsonify({"success": success, "gameState": chess_game.to_json()})
 
+@app.route('/api/fen', methods=['GET'])
+def get_fen():
+    return jsonify({"fen": chess_game.to_fen()})
+
+@app.route('/api/fen', methods=['POST'])
+def set_fen():
+    data = request.json
+    try:
+        chess_game.load_fen(data.get('fen', ''))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e), "gameState": chess_game.to_json()}), 400
+    return jsonify({"success": True, "gameState": chess_game.to_json()})
+
+@app.route('/api/analyze', methods=['GET'])
+def analyze_position():
+    depth = min(max(request.args.get('depth', 2, type=int), 1), ANALYSIS_MAX_DEPTH)
+    with analysis_lock:
+        try:
+            analysis_logic.set_fen(chess_game.to_fen())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        result = analysis_logic.search(max_depth=depth, time_limit=ANALYSIS_TIME_LIMIT)
+        score = analysis_logic.score_to_centipawns(result.score)
+    best_move = None
+    if result.best_move:
+        (from_row, from_col), (to_row, to_col) = result.best_move
+        best_move = {"fromRow": from_row, "fromCol": from_col, "toRow": to_row, "toCol": to_col}
+    return jsonify({
+        "success": True,
+        "bestMove": best_move, # None when the side to move has no legal move
+        "score": score, # Centipawns for the side to move
+        "depth": result.depth,
+        "nodes": result.nodes,
+    })
+
 @app.route('/api/reset-game', methods=['POST'])
 def reset_game():
     global chess_game
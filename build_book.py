@@ -0,0 +1,153 @@
+"""
+Builds a Polyglot opening book from PGN files.
+
+Games are streamed one at a time and replayed through ChessLogic. Every (position key, move)
+pair in the opening phase is counted. When the in-memory counts reach --chunk-entries they
+are written to a sorted run file on disk, and the runs are merged into the final book at
+the end, so memory stays flat however large the corpus is.
+
+Usage:
+    python build_book.py games.pgn [more.pgn ...] -o book.bin [--max-ply 24] [--min-games 2]
+"""
+import argparse
+import heapq
+import os
+import struct
+import sys
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from engine import ChessLogic
+from engine.pgn import read_games, parse_san
+from engine.polyglot import ENTRY_STRUCT, encode_move
+
+RUN_STRUCT = struct.Struct('>QHI') # key, move, count
+MAX_WEIGHT = 0xFFFF
+
+
+def write_run(counts: dict, directory: str) -> str:
+    """
+    Writes the (key, move) -> count pairs in sorted order to a new run file and returns its path.
+    """
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(fd, 'wb') as run_file:
+        for (key, move), count in sorted(counts.items()):
+            run_file.write(RUN_STRUCT.pack(key, move, count))
+    return path
+
+
+def read_run(path: str):
+    """
+    Yields the (key, move, count) records of a run file in order.
+    """
+    with open(path, 'rb') as run_file:
+        while True:
+            chunk = run_file.read(RUN_STRUCT.size * 4096)
+            if not chunk:
+                return
+            yield from RUN_STRUCT.iter_unpack(chunk)
+
+
+def write_book_entries(book_file, entries: list[tuple[int, int, int]]):
+    """
+    Writes the entries of one position, scaling the counts to fit Polyglot's 16-bit weights.
+    """
+    largest = max(count for _, _, count in entries)
+    scale = MAX_WEIGHT / largest if largest > MAX_WEIGHT else 1
+    for key, move, count in entries:
+        book_file.write(ENTRY_STRUCT.pack(key, move, max(1, int(count * scale)), 0))
+
+
+def combine_counts(records):
+    """
+    Adds up the counts of consecutive records for the same (key, move) pair.
+    """
+    pending = None
+    for key, move, count in records:
+        if pending and pending[0] == key and pending[1] == move:
+            pending[2] += count
+            continue
+        if pending:
+            yield tuple(pending)
+        pending = [key, move, count]
+    if pending:
+        yield tuple(pending)
+
+
+def merge_runs(run_paths: list[str], output_path: str, min_games: int) -> int:
+    """
+    Merges sorted run files into the final book and returns the number of entries written.
+    Counts for the same (key, move) pair in different runs are added together.
+    """
+    written = 0
+    merged = combine_counts(heapq.merge(*(read_run(path) for path in run_paths)))
+    with open(output_path, 'wb') as book_file:
+        for _, position in groupby(merged, key=itemgetter(0)):
+            entries = [entry for entry in position if entry[2] >= min_games]
+            if entries:
+                write_book_entries(book_file, entries)
+                written += len(entries)
+    return written
+
+
+def build_book(pgn_paths: list[str], output_path: str, max_ply: int = 24, min_games: int = 1,
+               chunk_entries: int = 1_000_000, temp_dir: str | None = None) -> int:
+    """
+    Streams the PGN files into a Polyglot book at `output_path` and returns its entry count.
+    """
+    chess_logic = ChessLogic()
+    counts = {}
+    games = invalid = 0
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+        run_paths = []
+        for pgn_path in pgn_paths:
+            with open(pgn_path, encoding='utf-8', errors='replace') as stream:
+                for game in read_games(stream):
+                    games += 1
+                    try:
+                        chess_logic.set_fen(game.headers.get('FEN', ChessLogic.STARTING_FEN))
+                        for san in game.moves[:max_ply]:
+                            start_pos, end_pos, promotion = parse_san(chess_logic, san)
+                            piece = chess_logic.get_piece(start_pos[0], start_pos[1])
+                            is_castling = piece[1] == 'K' and abs(end_pos[1] - start_pos[1]) == 2
+                            pair = (chess_logic.position_history[-1],
+                                    encode_move(start_pos, end_pos, promotion, is_castling))
+                            counts[pair] = counts.get(pair, 0) + 1
+                            chess_logic.make_move(start_pos, end_pos, promotion or 'Q')
+                    except ValueError as e:
+                        invalid += 1 # Moves counted before the bad one are still valid
+                        print(f"{pgn_path}: game {games}: {e}", file=sys.stderr)
+
+                    if len(counts) >= chunk_entries:
+                        run_paths.append(write_run(counts, run_dir))
+                        counts.clear()
+                    if games % 10000 == 0:
+                        print(f"{games} games, {len(run_paths)} runs", file=sys.stderr)
+
+        if counts:
+            run_paths.append(write_run(counts, run_dir))
+            counts.clear()
+        written = merge_runs(run_paths, output_path, min_games)
+
+    print(f"{games} games read, {invalid} cut short by bad moves or FENs, {written} book entries written to {output_path}", file=sys.stderr)
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from PGN files.")
+    parser.add_argument('pgn', nargs='+', help="PGN files to read")
+    parser.add_argument('-o', '--output', required=True, help="Book file to write")
+    parser.add_argument('--max-ply', type=int, default=24, help="Only record the first N plies of each game")
+    parser.add_argument('--min-games', type=int, default=1, help="Drop moves played in fewer games than this")
+    parser.add_argument('--chunk-entries', type=int, default=1_000_000,
+                        help="Distinct (position, move) pairs held in memory before spilling a run to disk")
+    parser.add_argument('--temp-dir', default=None, help="Directory for the temporary run files")
+    args = parser.parse_args(argv)
+    build_book(args.pgn, args.output, args.max_ply, args.min_games, args.chunk_entries, args.temp_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
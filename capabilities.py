@@ -0,0 +1,143 @@
+"""
+Lazy checks for the optional Qt components used by the pn.py GUI.
+
+Nothing is imported, and nothing is ever installed, until a feature asks for its capability.
+is_available() answers from a small state file, or from a cheap module lookup that does not load
+the module. ensure() does the real import the first time the feature is used. Only a missing
+module is written to the state file as unavailable, so later launches skip it straight away; an
+import that fails at run time (a missing system library, or a wrong import order) disables the
+feature for this launch only. The state is tied to the Python interpreter and the installed PyQt5,
+so installing or upgrading either makes it probe again.
+
+QtWebEngineWidgets can only be imported after the QApplication exists if Qt.AA_ShareOpenGLContexts
+was set before creating it, so the entry points must set that attribute.
+
+Missing components are reported with the pip command to run, but the application never runs pip.
+"""
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+# Capability name -> modules it needs, and the package that provides them
+CAPABILITIES = {
+    'webengine': (('PyQt5.QtWebEngineWidgets', 'PyQt5.QtWebChannel'), 'PyQtWebEngine'),
+    'multimedia': (('PyQt5.QtMultimedia',), 'PyQt5'),
+}
+STATE_VERSION = 2 # Version 1 also stored run-time import failures; its records are discarded
+STATE_PATH = os.environ.get('SIGMA_CHESS_STATE',
+                            os.path.join(os.path.expanduser('~'), '.sigma_chess', 'capabilities.json'))
+
+_state = None # Loaded lazily: {'fingerprint': str, 'capabilities': {name: bool}}
+_imported = {} # Capabilities imported (or found broken) in this process
+_import_errors = {} # Capability -> message of the ImportError its installed modules raised
+
+
+def _fingerprint() -> str:
+    """
+    Identifies the state format, the interpreter and the installed PyQt5, without importing PyQt5.
+    """
+    try:
+        spec = importlib.util.find_spec('PyQt5')
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.origin:
+        return f"{STATE_VERSION}|{sys.executable}|{sys.version}|no-PyQt5"
+    package_dir = os.path.dirname(spec.origin)
+    return f"{STATE_VERSION}|{sys.executable}|{sys.version}|{package_dir}|{os.stat(package_dir).st_mtime_ns}"
+
+
+def _load_state() -> dict:
+    global _state
+    if _state is None:
+        fingerprint = _fingerprint()
+        try:
+            with open(STATE_PATH, encoding='utf-8') as state_file:
+                state = json.load(state_file)
+            if state.get('fingerprint') != fingerprint:
+                raise ValueError("stale capability state")
+            _state = state
+        except (OSError, ValueError, AttributeError):
+            _state = {'fingerprint': fingerprint, 'capabilities': {}}
+    return _state
+
+
+def _record(name: str, available: bool):
+    """
+    Stores a probe result. The write is atomic and best effort: a read-only home directory
+    only means the next launch probes again.
+    """
+    state = _load_state()
+    if state['capabilities'].get(name) == available:
+        return
+    state['capabilities'][name] = available
+    try:
+        directory = os.path.dirname(STATE_PATH)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, STATE_PATH)
+    except OSError:
+        pass
+
+
+def is_available(name: str) -> bool:
+    """
+    Returns whether a capability can be used, without importing it.
+    """
+    if name in _imported:
+        return _imported[name]
+    cached = _load_state()['capabilities'].get(name)
+    if cached is not None:
+        return cached
+    modules, _ = CAPABILITIES[name]
+    try:
+        available = all(importlib.util.find_spec(module) is not None for module in modules)
+    except (ImportError, ValueError):
+        available = False
+    _record(name, available)
+    return available
+
+
+def ensure(name: str) -> bool:
+    """
+    Imports the modules of a capability on its first use and returns whether that worked.
+    Afterwards the modules can be imported normally at no cost. A failed import is not recorded
+    in the state file: the modules are installed, so the next launch tries again.
+    """
+    if name in _imported:
+        return _imported[name]
+    available = is_available(name)
+    if available:
+        modules, _ = CAPABILITIES[name]
+        try:
+            for module in modules:
+                importlib.import_module(module)
+        except ImportError as e:
+            print(f"{name} is unavailable: {e}")
+            _import_errors[name] = str(e)
+            available = False
+    _imported[name] = available
+    return available
+
+
+def install_hint(name: str) -> str:
+    """
+    Returns the command that installs a missing capability, for messages shown to the user.
+    """
+    _, package = CAPABILITIES[name]
+    return f"pip install {package}"
+
+
+def unavailable_hint(name: str) -> str:
+    """
+    Returns a sentence telling the user why a capability is unavailable and what to do about it:
+    the pip command if it is not installed, or the import error if it is installed but failed to load.
+    """
+    _, package = CAPABILITIES[name]
+    if name in _import_errors:
+        return f"{package} is installed but failed to load: {_import_errors[name]}"
+    return f"{package} is not installed. To enable it, run: {install_hint(name)}"
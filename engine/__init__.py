@@ -0,0 +1,19 @@
+"""
+Qt-free chess engine used by the pn.py GUI, the Flask server and the command-line tools.
+
+    logic       ChessLogic: board state, rules, evaluation and search
+    records     MoveRecord and the search's frame and result records
+    cache       Pawn hash table, static evaluation cache and legal-move cache
+    zobrist     Position hashing keys
+    polyglot    Polyglot opening books
+    tablebase   Endgame tablebase generation and probing (python -m engine.tablebase)
+    pgn         Streaming PGN reading and writing
+    uci         UCI protocol front end (python -m engine.uci)
+"""
+from engine.cache import PawnHashTable, EvalCache, LegalMoveCache
+from engine.logic import ChessLogic
+from engine.polyglot import OpeningBook
+from engine.records import MoveRecord, SearchFrame, SearchAborted, SearchResult
+
+__all__ = ['ChessLogic', 'MoveRecord', 'SearchFrame', 'SearchAborted', 'SearchResult',
+           'PawnHashTable', 'EvalCache', 'LegalMoveCache', 'OpeningBook']
@@ -0,0 +1,153 @@
+"""
+Direct-mapped caches keyed by Zobrist hashes: the pawn hash table and the static evaluation
+cache used by evaluation, and the legal-move cache used by the GUI's move lookups.
+"""
+from array import array
+
+# --- Pawn Hash Table ---
+class PawnHashTable:
+    """
+    Fixed-size, direct-mapped cache of pawn-structure evaluations, keyed by a Zobrist key
+    over the pawns only. Pawn structure changes far less often than the rest of the position,
+    so most evaluations find their entry here instead of rescanning the pawns.
+    Entries live in flat typed arrays, indexed by the low bits of the key.
+    """
+    def __init__(self, size: int = 1 << 14):
+        """
+        Args:
+            size (int): Number of entries; rounded up to a power of two.
+        """
+        self.size = 1 << max(0, size - 1).bit_length()
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.scores = array('i', bytes(4 * self.size)) # Pawn-structure score from White's perspective
+        self.white_passed = array('Q', bytes(8 * self.size)) # Bit r * 8 + c set for each passed pawn
+        self.black_passed = array('Q', bytes(8 * self.size))
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> int:
+        """
+        Returns the slot index holding `key`, or -1 if the entry is not cached.
+        """
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return index
+        self.misses += 1
+        return -1
+
+    def store(self, key: int, score: int, white_passed: int, black_passed: int) -> int:
+        """
+        Stores an entry, replacing whatever occupied its slot, and returns the slot index.
+        """
+        index = key & self.mask
+        self.keys[index] = key
+        self.scores[index] = score
+        self.white_passed[index] = white_passed
+        self.black_passed[index] = black_passed
+        return index
+
+    def hit_rate(self) -> float:
+        """
+        Fraction of probes answered from the table so far.
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
+# --- Evaluation Cache ---
+class EvalCache:
+    """
+    Fixed-size, direct-mapped cache of static evaluations keyed by the full position hash.
+    The search reaches the same leaf through different move orders, and evaluate_board is
+    deterministic for a given position, so repeated leaves are answered from here.
+    Keys and scores are packed into two parallel typed arrays.
+    """
+    def __init__(self, size: int = 1 << 16):
+        """
+        Args:
+            size (int): Number of entries; rounded up to a power of two.
+        """
+        self.size = 1 << max(0, size - 1).bit_length()
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.scores = array('q', bytes(8 * self.size)) # Score from the side to move's perspective
+        self.filled = bytearray(self.size) # Distinguishes an empty slot from a stored zero key
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> int | None:
+        """
+        Returns the cached score for `key`, or None if it is not cached.
+        """
+        index = key & self.mask
+        if self.filled[index] and self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, score: int):
+        """
+        Stores a score, replacing whatever occupied its slot.
+        """
+        index = key & self.mask
+        self.keys[index] = key
+        self.scores[index] = score
+        self.filled[index] = 1
+
+    def hit_rate(self) -> float:
+        """
+        Fraction of probes answered from the cache so far.
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
+# --- Legal Move Cache ---
+class LegalMoveCache:
+    """
+    Fixed-size, direct-mapped cache of legal-move maps keyed by the full position hash.
+    A map lists, for the side to move, the legal destinations of every piece that has one.
+    The GUI asks for the same position's moves on every selection and again for the
+    check/mate/stalemate test, and undo/redo revisit earlier positions, so these are
+    answered from here instead of simulating every candidate move again.
+    """
+    def __init__(self, size: int = 1 << 8):
+        """
+        Args:
+            size (int): Number of entries; rounded up to a power of two.
+        """
+        self.size = 1 << max(0, size - 1).bit_length()
+        self.mask = self.size - 1
+        self.keys: list[int | None] = [None] * self.size
+        self.maps: list[dict | None] = [None] * self.size # {start_pos: [end_pos, ...]}
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> dict | None:
+        """
+        Returns the cached legal-move map for `key`, or None if it is not cached.
+        """
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.maps[index]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, move_map: dict):
+        """
+        Stores a legal-move map, replacing whatever occupied its slot.
+        """
+        index = key & self.mask
+        self.keys[index] = key
+        self.maps[index] = move_map
+
+    def hit_rate(self) -> float:
+        """
+        Fraction of probes answered from the cache so far.
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
@@ -0,0 +1,1622 @@
+"""
+Core chess engine: board state, move generation and rules, evaluation and search.
+
+Nothing here depends on Qt, so headless tools (analysis, benchmarks, the UCI front end)
+can import it without loading the GUI.
+"""
+import time
+
+from engine.cache import PawnHashTable, EvalCache, LegalMoveCache
+from engine.polyglot import OpeningBook
+from engine.records import MoveRecord, SearchFrame, SearchAborted, SearchResult
+from engine.zobrist import (ZOBRIST_PIECE_KEYS, ZOBRIST_CASTLING_KEYS, ZOBRIST_EN_PASSANT_KEYS,
+                            ZOBRIST_WHITE_TO_MOVE_KEY)
+
+
+# --- Chess Game Logic Class ---
+class ChessLogic:
+    """
+    Manages the core chess game logic, including board state, piece movements,
+    check/checkmate/stalemate detection, and AI decision-making.
+    """
+    CHECKPOINT_INTERVAL = 16 # Plies between position snapshots used by goto_ply
+    MAX_SEARCH_PLY = 64 # Search frames preallocated per instance; the stack grows if a search goes deeper
+    EVAL_MATE_SCORE = 99999999 # evaluate_board's score of a checkmate on the board
+    TABLEBASE_WIN_SCORE = 90000000 # Score of a tablebase win, less the plies to mate
+    STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    EVAL_UNITS_PER_CENTIPAWN = 10 # evaluate_board counts a pawn as 1000
+    MATE_CENTIPAWNS = 100000 # Centipawn value reported for forced mates
+    AI_DIFFICULTY_DEPTHS = {'easy': 1, 'hard': 2, 'pro': 2} # Search depth per difficulty; see match.py to compare them
+
+    def __init__(self):
+        """
+        Initializes the chess board and game state variables.
+        """
+        self.board = self.create_initial_board()
+        self.current_turn = 'w'  # White starts first
+        self.game_over = False
+        self.winner: str | None = None
+        # move_history stores a MoveRecord per played move for undo functionality
+        self.move_history: list[MoveRecord] = []
+        self.redo_history: list[MoveRecord] = [] # New: Stores undone moves for redo functionality
+        self.captured_pieces = {'w': [], 'b': []}
+        self.kings_moved = {'w': False, 'b': False} # Tracks if king has moved for castling
+        self.rooks_moved = { # Tracks if rooks have moved for castling
+            'w': {'kingside': False, 'queenside': False},
+            'b': {'kingside': False, 'queenside': False}
+        }
+        self.en_passant_target = None # Stores (row, col) of square behind pawn that just double-moved
+        self.halfmove_clock = 0 # Plies since the last capture or pawn move (fifty-move rule)
+        self.start_ply = 0 # Plies played before the starting position (non-zero for FEN setups)
+        self.start_fen = self.STARTING_FEN # Position the game line starts from, see set_fen()
+
+        # Zobrist keys of every position reached so far: the game moves followed by the
+        # moves of the current search path. position_counts mirrors the list as a multiset,
+        # so repetition checks are a single dict lookup instead of a history scan.
+        self.position_history = []
+        self.position_counts = {}
+        self._push_position(self.compute_hash())
+
+        # Compact position snapshots every CHECKPOINT_INTERVAL plies of the game line,
+        # so goto_ply only has to replay a handful of moves
+        self.ply_checkpoints = {0: self._take_checkpoint()}
+
+        # Piece values for AI evaluation (standard values, multiplied for integer arithmetic)
+        self.piece_values = {
+            'P': 1000, 'N': 30000, 'B': 30000, 'R': 50001, 'Q': 900001, 'K': 900000,
+            'p': -1000, 'n': -30000, 'b': -30000, 'r': -50001, 'q': -900001, 'k': -900000
+        }
+        # Positional piece values (example, can be expanded for more sophisticated AI)
+        # These tables penalize pawns on the back rank, encourage knights in center, etc.
+        self.pawn_table = [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [50, 50, 50, 50, 50, 50, 50, 50],
+            [10, 10, 20, 30, 30, 20, 10, 10],
+            [5,  5, 10, 25, 25, 10,  5,  5],
+            [0,  0,  0, 20, 20,  0,  0,  0],
+            [5, -5,-10,  0,  0,-10, -5,  5],
+            [5, 10, 10,-20,-20, 10, 10,  5],
+            [0,  0,  0,  0,  0,  0,  0,  0]
+        ]
+        self.knight_table = [
+            [-50,-40,-30,-30,-30,-30,-40,-50],
+            [-40,-20,  0,  0,  0,  0,-20,-40],
+            [-30,  0, 10, 15, 15, 10,  0,-30],
+            [-30,  5, 15, 20, 20, 15,  5,-30],
+            [-30,  0, 15, 20, 20, 15,  0,-30],
+            [-30,  5, 10, 15, 15, 10,  5,-30],
+            [-40,-20,  0,  5,  5,  0,-20,-40],
+            [-50,-40,-30,-30,-30,-30,-40,-50]
+        ]
+        self.bishop_table = [
+            [-20,-10,-10,-10,-10,-10,-10,-20],
+            [-10,  0,  0,  0,  0,  0,  0,-10],
+            [-10,  0,  5, 10, 10,  5,  0,-10],
+            [-10,  5,  5, 10, 10,  5,  5,-10],
+            [-10,  0, 10, 10, 10, 10,  0,-10],
+            [-10, 10, 10, 10, 10, 10, 10,-10],
+            [-10,  5,  0,  0,  0,  0,  5,-10],
+            [-20,-10,-10,-10,-10,-10,-10,-20]
+        ]
+        self.rook_table = [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [5, 10, 10, 10, 10, 10, 10,  5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [0,  0,  0,  5,  5,  0,  0,  0]
+        ]
+        self.queen_table = [
+            [-20,-10,-10, -5, -5,-10,-10,-20],
+            [-10,  0,  0,  0,  0,  0,  0,-10],
+            [-10,  0,  5,  5,  5,  5,  0,-10],
+            [-5,  0,  5,  5,  5,  5,  0, -5],
+            [0,  0,  5,  5,  5,  5,  0, -5],
+            [-10,  5,  5,  5,  5,  5,  0,-10],
+            [-10,  0,  5,  0,  0,  0,  0,-10],
+            [-20,-10,-10, -5, -5,-10,-10,-20]
+        ]
+        self.king_table_midgame = [
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-20,-30,-30,-40,-40,-30,-30,-20],
+            [-10,-20,-20,-20,-20,-20,-20,-10],
+            [20, 20,  0,  0,  0,  0, 20, 20],
+            [20, 30, 10,  0,  0, 10, 30, 20]
+        ]
+        self.king_table_endgame = [
+            [-50,-40,-30,-20,-20,-30,-40,-50],
+            [-30,-20,-10,  0,  0,-10,-20,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-30,  0,  0,  0,  0,-30,-30],
+            [-50,-30,-30,-30,-30,-30,-30,-50]
+        ]
+
+        # Pawn-structure terms (cached per pawn configuration in pawn_hash)
+        self.doubled_pawn_penalty = 20 # Per extra pawn on a file
+        self.isolated_pawn_penalty = 15 # No friendly pawns on the adjacent files
+        self.passed_pawn_bonus = [0, 10, 20, 35, 60, 100, 150, 0] # Indexed by ranks advanced from the back rank
+        self.pawn_hash = PawnHashTable()
+        self.eval_cache = EvalCache() # Static evaluations of search leaves, by position hash
+        self.legal_move_cache = LegalMoveCache() # Legal-move maps of game positions, see legal_move_map()
+        self.opening_book = None # Polyglot OpeningBook, see load_opening_book()
+        self.use_opening_book = True # make_ai_move plays book moves while the position is in the book
+        self.tablebases = None # Endgame Tablebases, see load_tablebases()
+
+        self.ai_difficulty = 'easy' # New: AI difficulty setting
+
+        # Explicit search stack, one reusable frame per ply (see negamax)
+        self._search_stack = [SearchFrame() for _ in range(self.MAX_SEARCH_PLY)]
+        # Search limits, set by search(); checked as nodes are entered
+        self.search_nodes = 0
+        self.stop_requested = False # Set from another thread to end a running search
+        self._node_limit: int | None = None
+        self._deadline: float | None = None
+        self._limits_active = False
+
+    def create_initial_board(self) -> list[list[str | None]]:
+        """
+        Creates the standard 8x8 chess board and places pieces in their
+        initial starting positions.
+        """
+        board: list[list[str | None]] = [[None for _ in range(8)] for _ in range(8)]
+
+        # White pieces (row 6 and 7)
+        board[7] = ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR']
+        board[6] = ['wP'] * 8
+
+        # Black pieces (row 0 and 1)
+        board[0] = ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR']
+        board[1] = ['bP'] * 8
+
+        return board
+
+    def get_piece(self, row: int, col: int) -> str | None:
+        """
+        Returns the piece string ('wP', 'bK', etc.) at the specified board position.
+        Returns None if the position is out of bounds or empty.
+        """
+        if 0 <= row < 8 and 0 <= col < 8:
+            return self.board[row][col]
+        return None
+
+    def place_piece(self, row: int, col: int, piece: str | None):
+        """
+        Places a piece (or None to clear) at the specified board position.
+        """
+        if 0 <= row < 8 and 0 <= col < 8:
+            self.board[row][col] = piece
+
+    def find_king(self, color: str) -> tuple[int, int] | None:
+        """
+        Finds and returns the (row, col) position of the king of the specified color.
+        Returns None if the king is not found (should not happen in a valid game).
+        """
+        for r in range(8):
+            for c in range(8):
+                piece = self.get_piece(r, c)
+                if piece and piece[0] == color and piece[1] == 'K':
+                    return (r, c)
+        return None
+
+    def is_square_attacked(self, king_color: str, square_pos: tuple[int, int]) -> bool:
+        """
+        Checks if a given square is attacked by any of the opponent's pieces.
+        This is crucial for king safety, castling, and check detection.
+
+        Attacks are found by looking outward from the square (pawn and knight offsets,
+        adjacent kings, and sliding rays), so this never calls back into move generation.
+        Generating the opponent's king moves here used to include castling, which itself asks
+        whether squares are attacked, recursing without end once both sides could castle.
+        """
+        opponent_color = 'b' if king_color == 'w' else 'w'
+        target_row, target_col = square_pos
+        board = self.board
+
+        # Pawns: white pawns attack upwards (towards row 0), so a white attacker sits one row below
+        pawn_row = target_row + 1 if opponent_color == 'w' else target_row - 1
+        if 0 <= pawn_row < 8:
+            for dc in (-1, 1):
+                c = target_col + dc
+                if 0 <= c < 8 and board[pawn_row][c] == opponent_color + 'P':
+                    return True
+
+        # Knights and the opposing king
+        for offsets, piece_type in ((((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)), 'N'),
+                                    (((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)), 'K')):
+            attacker = opponent_color + piece_type
+            for dr, dc in offsets:
+                r, c = target_row + dr, target_col + dc
+                if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == attacker:
+                    return True
+
+        # Sliding pieces: rooks/queens along ranks and files, bishops/queens along diagonals
+        for directions, slider_type in ((((-1, 0), (1, 0), (0, -1), (0, 1)), 'R'),
+                                        (((-1, -1), (-1, 1), (1, -1), (1, 1)), 'B')):
+            for dr, dc in directions:
+                r, c = target_row + dr, target_col + dc
+                while 0 <= r < 8 and 0 <= c < 8:
+                    piece = board[r][c]
+                    if piece:
+                        if piece[0] == opponent_color and (piece[1] == slider_type or piece[1] == 'Q'):
+                            return True
+                        break # Blocked by the first piece on the ray
+                    r += dr
+                    c += dc
+        return False
+
+    def is_opponent_in_check(self, color: str) -> bool:
+        """
+        Checks if the king of the specified color is currently in check.
+        This is done by checking if the king's current square is attacked by the opponent.
+        """
+        king_pos = self.find_king(color)
+        if not king_pos:
+            return False # Should not happen in a normal game
+
+        # Check if the king's square is attacked by the opponent's pieces
+        return self.is_square_attacked(color, king_pos)
+
+    def is_checkmate(self, color: str) -> bool:
+        """
+        Determines if the player of the given color is in checkmate.
+        A player is in checkmate if their king is in check AND they have no legal moves
+        to get out of check.
+        """
+        # First, check if the king is actually in check
+        if not self.is_opponent_in_check(color):
+            return False # Not in check, so cannot be checkmate
+
+        # In check with no legal moves to get out of it: checkmate
+        return not self.has_legal_moves(color)
+
+    def is_stalemate(self, color: str) -> bool:
+        """
+        Determines if the player of the given color is in stalemate.
+        A player is in stalemate if their king is NOT in check AND they have no legal moves.
+        """
+        # First, check if the king is NOT in check
+        if self.is_opponent_in_check(color):
+            return False # In check, so cannot be stalemate (could be checkmate)
+
+        # Not in check but no legal moves: stalemate
+        return not self.has_legal_moves(color)
+
+    def has_legal_moves(self, color: str) -> bool:
+        """
+        Returns True if the player of the given color has at least one legal move.
+        A legal-move map already cached for the position answers this for the side to move;
+        otherwise the scan stops at the first legal move. It does not build the map, because
+        evaluate_board() asks this at every search leaf.
+        """
+        if color == self.current_turn:
+            move_map = self.legal_move_cache.probe(self.position_history[-1])
+            if move_map is not None:
+                return bool(move_map)
+
+        # Iterate through all pieces of the player
+        for r in range(8):
+            for c in range(8):
+                piece = self.get_piece(r, c)
+                if piece and piece[0] == color:
+                    # highlight_moves with check_for_check=True already filters out moves
+                    # that would leave the king in check.
+                    if self.highlight_moves((r, c), check_for_check=True):
+                        return True # Found at least one legal move
+        return False
+
+    def legal_move_map(self) -> dict[tuple[int, int], list[tuple[int, int]]]:
+        """
+        Returns {start_pos: [end_pos, ...]} with the legal moves of every piece of the side to
+        move that has any. The map is computed once per position and kept in legal_move_cache
+        under the position's Zobrist key, so selecting pieces, the check/mate/stalemate test and
+        revisiting a position after undo or redo all reuse it. The returned map is shared: do not
+        modify it or its lists.
+        """
+        key = self.position_history[-1]
+        move_map = self.legal_move_cache.probe(key)
+        if move_map is None:
+            color = self.current_turn
+            move_map = {}
+            for r in range(8):
+                for c in range(8):
+                    piece = self.board[r][c]
+                    if piece and piece[0] == color:
+                        moves = self.highlight_moves((r, c), check_for_check=True)
+                        if moves:
+                            move_map[(r, c)] = moves
+            self.legal_move_cache.store(key, move_map)
+        return move_map
+
+    def legal_moves_from(self, selected_pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Returns the legal destinations of the piece on `selected_pos` if it belongs to the side to
+        move, looked up in legal_move_map(). Unlike highlight_moves this returns [] for the other
+        side's pieces, which cannot move now anyway.
+        """
+        return list(self.legal_move_map().get(selected_pos, ()))
+
+    def highlight_moves(self, selected_pos: tuple[int, int], check_for_check: bool = True) -> list[tuple[int, int]]:
+        """
+        Calculates and returns a list of valid (row, col) positions a piece at `selected_pos`
+        can move to.
+
+        Args:
+            selected_pos (tuple[int, int]): The (row, col) of the piece to move.
+            check_for_check (bool): If True, filters out moves that would leave the king in check.
+                                    Set to False for internal checks (e.g., is_square_attacked).
+
+        Returns:
+            list[tuple[int, int]]: A list of valid destination (row, col) tuples.
+        """
+        row, col = selected_pos
+        piece = self.get_piece(row, col)
+        if piece is None:
+            return []
+
+        piece_color = piece[0]  # 'w' for white, 'b' for black
+        valid_moves = []
+
+        # Dispatch to specific piece movement logic
+        if piece[1] == 'P':
+            valid_moves = self.highlight_pawn_moves(row, col, piece_color)
+        elif piece[1] == 'R':
+            valid_moves = self.highlight_rook_moves(row, col, piece_color)
+        elif piece[1] == 'N':
+            valid_moves = self.highlight_knight_moves(row, col, piece_color)
+        elif piece[1] == 'B':
+            valid_moves = self.highlight_bishop_moves(row, col, piece_color)
+        elif piece[1] == 'Q':
+            valid_moves = self.highlight_queen_moves(row, col, piece_color)
+        elif piece[1] == 'K':
+            valid_moves = self.highlight_king_moves(row, col, piece_color)
+
+        # Filter out moves that would put the king in check (if check_for_check is True)
+        if check_for_check:
+            legal_moves = []
+            for move in valid_moves:
+                # Simulate the move to check for king safety
+                temp_board = [row[:] for row in self.board] # Create a deep copy of the board
+
+                # Perform the simulated move
+                dest_row, dest_col = move
+                # Store info about captured piece for undoing during simulation
+                original_piece_at_dest = temp_board[dest_row][dest_col]
+                temp_board[dest_row][dest_col] = temp_board[row][col] # Move piece
+                temp_board[row][col] = None # Clear original square
+
+                # Special handling for en passant capture during simulation
+                is_en_passant_sim = False
+                captured_ep_pawn_sim = None
+                if piece[1] == 'P' and move == self.en_passant_target:
+                    # En passant captures the pawn behind the target square
+                    # Use `selected_pos` for pawn's original row
+                    captured_pawn_row = selected_pos[0]
+                    captured_pawn_col = move[1] # End column is the captured pawn's column
+                    captured_ep_pawn_sim = temp_board[captured_pawn_row][captured_pawn_col]
+                    temp_board[captured_pawn_row][captured_pawn_col] = None
+                    is_en_passant_sim = True
+
+                # Special handling for castling during simulation
+                if piece[1] == 'K' and abs(col - dest_col) == 2:
+                    king_row = row
+                    if dest_col > col: # Kingside castling
+                        rook_start_col = 7
+                        rook_end_col = dest_col - 1
+                    else: # Queenside castling
+                        rook_start_col = 0
+                        rook_end_col = dest_col + 1
+                    rook_piece_sim = temp_board[king_row][rook_start_col]
+                    temp_board[king_row][rook_end_col] = rook_piece_sim
+                    temp_board[king_row][rook_start_col] = None
+
+
+                # Temporarily swap the board to the simulated state for check detection
+                original_board = self.board
+                self.board = temp_board
+
+                # Check if the king is in check after the simulated move
+                king_in_check_after_move = self.is_opponent_in_check(piece_color) # Check if *own* king is in check
+
+                # Revert the board to its original state
+                self.board = original_board
+
+                # The simulation never touches kings_moved / rooks_moved, and `is_square_attacked`
+                # only reads the board, so no flags need reverting here.
+
+                # If the king is not in check after the move, it's a legal move
+                if not king_in_check_after_move:
+                    legal_moves.append(move)
+
+            return legal_moves
+
+        return valid_moves
+
+    def highlight_pawn_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a pawn at (row, col) of a given color.
+        Includes single/double moves, captures, and en passant.
+        """
+        valid_moves = []
+        direction = -1 if color == 'w' else 1  # White pawns move up (-1 row), black pawns move down (+1 row)
+        start_row = 6 if color == 'w' else 1  # Starting row for pawns to allow double move
+
+        # 1. Normal move (1 square forward)
+        target_row_1 = row + direction
+        if 0 <= target_row_1 < 8 and self.get_piece(target_row_1, col) is None:
+            valid_moves.append((target_row_1, col))
+
+            # 2. Double move from starting position
+            target_row_2 = row + 2 * direction
+            if row == start_row and self.get_piece(target_row_2, col) is None:
+                valid_moves.append((target_row_2, col))
+
+        # 3. Capture moves (diagonally)
+        for dc in [-1, 1]: # Check left and right diagonals
+            target_row_cap = row + direction
+            target_col_cap = col + dc
+            if 0 <= target_row_cap < 8 and 0 <= target_col_cap < 8:
+                piece_to_capture = self.get_piece(target_row_cap, target_col_cap)
+                if piece_to_capture and piece_to_capture[0] != color:
+                    valid_moves.append((target_row_cap, target_col_cap))
+
+        # 4. En Passant
+        # Check if there's an en passant target square set from the opponent's last move
+        if self.en_passant_target:
+            ep_row, ep_col = self.en_passant_target
+            # An en passant capture is only valid if the pawn is on the 5th rank (for white) or 4th rank (for black)
+            # and the target square is diagonally adjacent to the pawn's current position.
+            if (color == 'w' and row == 3 and ep_row == 2 and abs(col - ep_col) == 1) or \
+               (color == 'b' and row == 4 and ep_row == 5 and abs(col - ep_col) == 1):
+                valid_moves.append(self.en_passant_target)
+
+        return valid_moves
+
+    def highlight_rook_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a rook at (row, col) of a given color.
+        Rooks move horizontally and vertically any number of squares.
+        """
+        valid_moves = []
+
+        # Define directions: up, down, left, right
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            r, c = row, col
+            while True:
+                r += dr
+                c += dc
+                # Check if the new position is within board bounds
+                if not (0 <= r < 8 and 0 <= c < 8):
+                    break # Out of bounds, stop in this direction
+
+                piece = self.get_piece(r, c)
+                if piece is None:
+                    valid_moves.append((r, c)) # Empty square, can move here
+                elif piece[0] != color:
+                    valid_moves.append((r, c)) # Opponent's piece, can capture and stop
+                    break
+                else:
+                    break # Own piece, cannot move through or capture, stop
+        return valid_moves
+
+    def highlight_knight_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a knight at (row, col) of a given color.
+        Knights move in an 'L' shape.
+        """
+        valid_moves = []
+        # All 8 possible 'L' shaped moves for a knight
+        knight_moves = [
+            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+            (1, -2), (1, 2), (2, -1), (2, 1)
+        ]
+        for dr, dc in knight_moves:
+            r, c = row + dr, col + dc
+            # Check if the new position is within board bounds
+            if 0 <= r < 8 and 0 <= c < 8:
+                piece = self.get_piece(r, c)
+                # Can move if square is empty or contains an opponent's piece
+                if piece is None or piece[0] != color:
+                    valid_moves.append((r, c))
+        return valid_moves
+
+    def highlight_bishop_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a bishop at (row, col) of a given color.
+        Bishops move diagonally any number of squares.
+        """
+        valid_moves = []
+
+        # Define diagonal directions: up-left, up-right, down-left, down-right
+        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+            r, c = row, col
+            while True:
+                r += dr
+                c += dc
+                # Check if the new position is within board bounds
+                if not (0 <= r < 8 and 0 <= c < 8):
+                    break # Out of bounds, stop in this direction
+
+                piece = self.get_piece(r, c)
+                if piece is None:
+                    valid_moves.append((r, c)) # Empty square, can move here
+                elif piece[0] != color:
+                    valid_moves.append((r, c)) # Opponent's piece, can capture and stop
+                    break
+                else:
+                    break # Own piece, cannot move through or capture, stop
+        return valid_moves
+
+    def highlight_queen_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a queen at (row, col) of a given color.
+        Queens combine the moves of a rook and a bishop.
+        """
+        # Queen moves are simply the union of rook moves and bishop moves
+        return self.highlight_rook_moves(row, col, color) + self.highlight_bishop_moves(row, col, color)
+
+    def highlight_king_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
+        """
+        Calculates valid moves for a king at (row, col) of a given color.
+        Kings move one square in any direction, and can castle.
+        """
+        valid_moves = []
+
+        # King moves one square in any of the 8 directions
+        for dr, dc in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                piece = self.get_piece(r, c)
+                if piece is None or piece[0] != color:
+                    valid_moves.append((r, c))
+
+        # Castling logic
+        # Castling is only possible if:
+        # 1. The king has not moved.
+        # 2. The relevant rook has not moved.
+        # 3. There are no pieces between the king and the rook.
+        # 4. The king is not currently in check.
+        # 5. The king does not pass through or land on a square attacked by an opponent's piece.
+        if not self.kings_moved[color]:
+            king_row = 7 if color == 'w' else 0
+
+            # Kingside castling (short castling)
+            # King moves from e1/e8 to g1/g8, Rook moves from h1/h8 to f1/f8
+            if not self.rooks_moved[color]['kingside']:
+                # Check if squares f1/f8 and g1/g8 are empty
+                if self.get_piece(king_row, 5) is None and self.get_piece(king_row, 6) is None:
+                    # Check if king is not in check, and does not pass through or land on attacked squares
+                    if not self.is_square_attacked(color, (king_row, 4)) and \
+                       not self.is_square_attacked(color, (king_row, 5)) and \
+                       not self.is_square_attacked(color, (king_row, 6)):
+                        valid_moves.append((king_row, 6))  # Add the kingside castling move (king's destination)
+
+            # Queenside castling (long castling)
+            # King moves from e1/e8 to c1/c8, Rook moves from a1/a8 to d1/d8
+            if not self.rooks_moved[color]['queenside']:
+                # Check if squares b1/b8, c1/c8, and d1/d8 are empty
+                if self.get_piece(king_row, 1) is None and \
+                   self.get_piece(king_row, 2) is None and \
+                   self.get_piece(king_row, 3) is None:
+                    # Check if king is not in check, and does not pass through or land on attacked squares
+                    if not self.is_square_attacked(color, (king_row, 4)) and \
+                       not self.is_square_attacked(color, (king_row, 3)) and \
+                       not self.is_square_attacked(color, (king_row, 2)):
+                        valid_moves.append((king_row, 2))  # Add the queenside castling move (king's destination)
+
+        return valid_moves
+
+    def is_valid_move(self, selected_piece: str, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> bool:
+        """
+        Checks if a move from start_pos to end_pos is valid for the selected piece.
+        This method is largely redundant if highlight_moves is used correctly,
+        but kept for clarity or specific validation needs.
+        """
+        if selected_piece is None:
+            return False
+
+        if selected_piece[0] == self.current_turn:
+            return end_pos in self.legal_move_map().get(start_pos, ())
+        row, col = start_pos
+        valid_moves = self.highlight_moves((row, col))
+        return end_pos in valid_moves
+
+    def handle_pawn_promotion(self, row: int, col: int) -> bool:
+        """
+        Checks if a pawn has reached the opposite end of the board,
+        triggering a promotion.
+        """
+        piece = self.get_piece(row, col)
+        if piece and piece[1] == 'P':
+            # White pawn promotes on row 0, Black pawn promotes on row 7
+            if (piece[0] == 'w' and row == 0) or (piece[0] == 'b' and row == 7):
+                return True
+        return False
+
+    def promote_pawn(self, row: int, col: int, new_piece_type: str) -> bool:
+        """
+        Promotes a pawn at (row, col) to the specified new piece type (e.g., 'Q', 'R', 'B', 'N').
+        """
+        piece = self.get_piece(row, col)
+        if piece and piece[1] == 'P':
+            color = piece[0]
+            self.place_piece(row, col, color + new_piece_type)
+            return True
+        return False
+
+    def compute_hash(self) -> int:
+        """
+        Computes the Zobrist hash of the current position from scratch.
+        The hash covers piece placement, side to move, castling rights and the
+        en passant file (only when a pawn of the side to move can actually capture).
+        """
+        key = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece:
+                    key ^= ZOBRIST_PIECE_KEYS[piece][r][c]
+
+        for color in ('w', 'b'):
+            if not self.kings_moved[color]:
+                for side in ('kingside', 'queenside'):
+                    if not self.rooks_moved[color][side]:
+                        key ^= ZOBRIST_CASTLING_KEYS[(color, side)]
+
+        if self.en_passant_target:
+            ep_row, ep_col = self.en_passant_target
+            # The capturing pawn stands one row "behind" the target square from the mover's view
+            pawn_row = ep_row + 1 if self.current_turn == 'w' else ep_row - 1
+            own_pawn = self.current_turn + 'P'
+            if self.get_piece(pawn_row, ep_col - 1) == own_pawn or self.get_piece(pawn_row, ep_col + 1) == own_pawn:
+                key ^= ZOBRIST_EN_PASSANT_KEYS[ep_col]
+
+        if self.current_turn == 'w':
+            key ^= ZOBRIST_WHITE_TO_MOVE_KEY
+        return key
+
+    def _push_position(self, key: int):
+        """
+        Records a newly reached position on the position history stack.
+        """
+        self.position_history.append(key)
+        self.position_counts[key] = self.position_counts.get(key, 0) + 1
+
+    def _pop_position(self):
+        """
+        Removes the most recently reached position from the position history stack.
+        """
+        key = self.position_history.pop()
+        count = self.position_counts[key] - 1
+        if count:
+            self.position_counts[key] = count
+        else:
+            del self.position_counts[key]
+
+    def _record_position_after_move(self, moved_piece: str, was_capture: bool):
+        """
+        Updates the halfmove clock and pushes the new position's hash after a move
+        has been applied and the turn has been switched.
+        """
+        if moved_piece[1] == 'P' or was_capture:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self._push_position(self.compute_hash())
+
+    def is_repetition(self, times: int = 2) -> bool:
+        """
+        Returns True if the current position has occurred at least `times` times,
+        counting the current occurrence. Search uses times=2 (any repeat is scored as a draw),
+        the game itself uses times=3 (threefold repetition).
+        """
+        return self.position_counts.get(self.position_history[-1], 0) >= times
+
+    def is_fifty_move_draw(self) -> bool:
+        """
+        Returns True if fifty full moves have passed without a capture or pawn move.
+        """
+        return self.halfmove_clock >= 100
+
+    def is_insufficient_material(self) -> bool:
+        """
+        Returns True if neither side can possibly mate: bare kings, or kings with a single
+        knight or bishop, or only bishops all standing on squares of one colour.
+        """
+        minors = []
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece and piece[1] != 'K':
+                    if piece[1] in ('P', 'R', 'Q'):
+                        return False
+                    minors.append((piece[1], (r + c) % 2))
+        if len(minors) <= 1:
+            return True
+        return all(kind == 'B' for kind, _ in minors) and len({shade for _, shade in minors}) == 1
+
+    def evaluate_board(self) -> int:
+        """
+        Evaluates the current board position from the perspective of the current player.
+        Positive values favor the current player.
+        This evaluation function combines material advantage with basic positional considerations.
+        """
+        score = 0
+        current_player_color = self.current_turn
+        pawn_key = 0 # Zobrist key over the pawns only, for the pawn hash table
+
+        # Iterate through all squares to sum up piece values and positional scores
+        for r in range(8):
+            for c in range(8):
+                piece = self.get_piece(r, c)
+                if piece:
+                    piece_type = piece[1]
+                    piece_color = piece[0]
+                    if piece_type == 'P':
+                        pawn_key ^= ZOBRIST_PIECE_KEYS[piece][r][c]
+                    value = self.piece_values.get(piece_type, 0)
+
+                    # Add positional score based on piece type and its position
+                    positional_value = 0
+                    # Adjust row for black pieces to mirror the table for white
+                    # For white, row r is used directly. For black, 7-r is used.
+                    # This ensures the tables are applied correctly from each player's perspective.
+                    table_row = r if piece_color == 'w' else 7 - r
+
+                    if piece_type == 'P':
+                        positional_value = self.pawn_table[table_row][c]
+                    elif piece_type == 'N':
+                        positional_value = self.knight_table[table_row][c]
+                    elif piece_type == 'B':
+                        positional_value = self.bishop_table[table_row][c]
+                    elif piece_type == 'R':
+                        positional_value = self.rook_table[table_row][c]
+                    elif piece_type == 'Q':
+                        positional_value = self.queen_table[table_row][c]
+                    elif piece_type == 'K':
+                        # Use different king tables for midgame and endgame
+                        total_pieces = sum(1 for row_pieces in self.board for p in row_pieces if p is not None)
+                        if total_pieces < 10: # Arbitrary threshold for endgame
+                            positional_value = self.king_table_endgame[table_row][c]
+                        else:
+                            positional_value = self.king_table_midgame[table_row][c]
+
+                    # Adjust score based on color (positive for current player, negative for opponent)
+                    if piece_color == current_player_color:
+                        score += value + positional_value
+                    else:
+                        score -= (value + positional_value)
+
+        # Add bonus for having more captured opponent pieces (material advantage)
+        # This part needs careful adjustment for negamax.
+        # The evaluation should always be from the perspective of the 'current_turn' player.
+        # So, if current_turn is 'w', we want to maximize white's score.
+        # If current_turn is 'b', we want to maximize black's score.
+        if current_player_color == 'w':
+            score += len(self.captured_pieces['w']) * 50 # White captured black pieces
+            score -= len(self.captured_pieces['b']) * 50 # Black captured white pieces
+        else: # current_player_color == 'b'
+            score += len(self.captured_pieces['b']) * 50 # Black captured white pieces
+            score -= len(self.captured_pieces['w']) * 50 # White captured white pieces
+
+        # Pawn structure (doubled, isolated and passed pawns) from the pawn hash table
+        pawn_score = self.evaluate_pawn_structure(pawn_key)
+        score += pawn_score if current_player_color == 'w' else -pawn_score
+
+        # Check for checkmate/stalemate (terminal states)
+        # These scores are from the perspective of the player whose turn it is.
+        if self.is_checkmate(current_player_color):
+            return -self.EVAL_MATE_SCORE # Current player is checkmated, very bad score
+        if self.is_stalemate(current_player_color):
+            return 0 # Draw
+        
+        # If the opponent is checkmated, it's a win for the current player
+        opponent_color = 'w' if current_player_color == 'b' else 'b'
+        if self.is_checkmate(opponent_color):
+            return self.EVAL_MATE_SCORE # Opponent is checkmated, very good score
+
+        return score
+
+    def cached_evaluate(self) -> int:
+        """
+        Returns evaluate_board() for the current position, consulting the evaluation cache first.
+        The position hash covers the side to move, so the side-relative score is safe to reuse.
+        """
+        key = self.position_history[-1]
+        score = self.eval_cache.probe(key)
+        if score is None:
+            score = self.evaluate_board()
+            self.eval_cache.store(key, score)
+        return score
+
+    def evaluate_pawn_structure(self, pawn_key: int) -> int:
+        """
+        Returns the pawn-structure score from White's perspective.
+        The pawn-only part is served from the pawn hash table; passed pawns whose stop
+        square is occupied then lose half their bonus, which depends on the other pieces
+        and so is applied on top of the cached entry using its passed-pawn masks.
+        """
+        table = self.pawn_hash
+        index = table.probe(pawn_key)
+        if index < 0:
+            index = table.store(pawn_key, *self._compute_pawn_structure())
+        score = table.scores[index]
+
+        board = self.board
+        for passed_mask, direction, sign in ((table.white_passed[index], -1, 1), (table.black_passed[index], 1, -1)):
+            while passed_mask:
+                low_bit = passed_mask & -passed_mask
+                square = low_bit.bit_length() - 1
+                passed_mask ^= low_bit
+                r, c = divmod(square, 8)
+                if board[r + direction][c] is not None:
+                    advanced = 7 - r if sign > 0 else r
+                    score -= sign * (self.passed_pawn_bonus[advanced] // 2)
+        return score
+
+    def _compute_pawn_structure(self) -> tuple[int, int, int]:
+        """
+        Scans the pawns and returns (score from White's perspective, white passed mask, black passed mask).
+        """
+        pawns = {'w': [], 'b': []}
+        file_counts = {'w': [0] * 8, 'b': [0] * 8}
+        for r in range(1, 7): # Pawns never stand on the back ranks
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece and piece[1] == 'P':
+                    pawns[piece[0]].append((r, c))
+                    file_counts[piece[0]][c] += 1
+
+        score = 0
+        passed_masks = {'w': 0, 'b': 0}
+        for color, sign in (('w', 1), ('b', -1)):
+            own_files = file_counts[color]
+            enemy_pawns = pawns['b' if color == 'w' else 'w']
+            for count in own_files:
+                if count > 1:
+                    score -= sign * self.doubled_pawn_penalty * (count - 1)
+            for r, c in pawns[color]:
+                if (c == 0 or not own_files[c - 1]) and (c == 7 or not own_files[c + 1]):
+                    score -= sign * self.isolated_pawn_penalty
+                # Passed: no enemy pawn ahead on the same or adjacent files (white moves towards row 0)
+                if not any(abs(ec - c) <= 1 and (er < r if color == 'w' else er > r) for er, ec in enemy_pawns):
+                    passed_masks[color] |= 1 << (r * 8 + c)
+                    advanced = 7 - r if color == 'w' else r
+                    score += sign * self.passed_pawn_bonus[advanced]
+        return score, passed_masks['w'], passed_masks['b']
+
+    def generate_legal_moves(self) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        """
+        Returns every legal (start_pos, end_pos) move for the side to move.
+        """
+        color = self.current_turn
+        all_legal_moves = []
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece and piece[0] == color:
+                    for move in self.highlight_moves((r, c), check_for_check=True):
+                        all_legal_moves.append(((r, c), move))
+        return all_legal_moves
+
+    def _move_order_score(self, move: tuple[tuple[int, int], tuple[int, int]]) -> int:
+        """
+        Move ordering heuristic: captures first, most valuable victim first.
+        """
+        captured_piece = self.board[move[1][0]][move[1][1]]
+        if captured_piece:
+            return self.piece_values.get(captured_piece[1], 0)
+        return 0 # No capture
+
+    def _enter_search_node(self, frame: SearchFrame) -> float | None:
+        """
+        Sets up a search frame for the current position.
+        Returns the node's score if it is a leaf (draw, depth exhausted, mate or stalemate),
+        or None after filling the frame's ordered move list for expansion.
+        """
+        self.search_nodes += 1
+        if self._limits_active and self._search_limit_reached():
+            raise SearchAborted()
+
+        # Repeated positions and positions past the fifty-move limit are draws.
+        # Cutting these cycles stops the search from re-exploring piece shuffles.
+        if self.halfmove_clock >= 100 or self.is_repetition():
+            return 0
+
+        # Endgames covered by the tablebases are scored exactly instead of being searched
+        if self.tablebases:
+            tablebase_score = self.tablebase_score()
+            if tablebase_score is not None:
+                return tablebase_score
+
+        # Base case: if depth is 0 or game is over, return the board evaluation
+        if frame.depth == 0 or self.game_over:
+            return self.cached_evaluate()
+
+        # Generate all legal moves once; no moves means checkmate or stalemate
+        moves = self.generate_legal_moves()
+        if not moves:
+            if self.is_opponent_in_check(self.current_turn):
+                return -float('inf') # Current player is checkmated
+            return 0 # Stalemate is a draw
+
+        # Move Ordering: Prioritize captures
+        moves.sort(key=self._move_order_score, reverse=True)
+        frame.moves = moves
+        frame.index = 0
+        frame.best = -float('inf')
+        return None
+
+    def negamax(self, depth: int, alpha: float, beta: float) -> float:
+        """
+        Negamax algorithm with Alpha-Beta Pruning, evaluated from the perspective of the current player.
+
+        The search runs on an explicit, preallocated stack of SearchFrame objects (one per ply)
+        instead of Python recursion, so search depth never touches the interpreter's recursion
+        limit and frames are reused from node to node.
+
+        Args:
+            depth (int): The remaining depth of the search.
+            alpha (float): Alpha value for Alpha-Beta Pruning.
+            beta (float): Beta value for Alpha-Beta Pruning.
+
+        Returns:
+            float: The evaluated score of the current board state.
+        """
+        stack = self._search_stack
+        if len(stack) <= depth:
+            stack.extend(SearchFrame() for _ in range(depth + 1 - len(stack)))
+
+        ply = 0
+        frame = stack[0]
+        frame.depth, frame.alpha, frame.beta = depth, alpha, beta
+        score = self._enter_search_node(frame)
+
+        while True:
+            if score is None:
+                if frame.index < len(frame.moves):
+                    # Descend into the next move: play it and set up the child frame
+                    start_pos, end_pos = frame.moves[frame.index]
+                    frame.index += 1
+                    self._describe_move(start_pos, end_pos, 'Q', frame.record) # AI always promotes to a queen
+                    self._apply_move_record(frame.record)
+                    ply += 1
+                    child = stack[ply]
+                    child.depth, child.alpha, child.beta = frame.depth - 1, -frame.beta, -frame.alpha
+                    frame = child
+                    try:
+                        score = self._enter_search_node(frame)
+                    except SearchAborted:
+                        # Take back every move on the path before giving up
+                        for parent_ply in range(ply - 1, -1, -1):
+                            self._revert_move_record(stack[parent_ply].record)
+                        raise
+                    continue
+                score = frame.best # All moves searched
+
+            # Return the finished node's score to its parent
+            if ply == 0:
+                return score
+            ply -= 1
+            frame = stack[ply]
+            self._revert_move_record(frame.record)
+
+            eval = -score
+            if eval > frame.best:
+                frame.best = eval
+            if eval > frame.alpha:
+                frame.alpha = eval # Update alpha
+
+            # Alpha-Beta Pruning
+            score = frame.best if frame.beta <= frame.alpha else None # Beta cut-off ends the node
+
+    def load_opening_book(self, path: str) -> bool:
+        """
+        Opens a Polyglot .bin opening book for make_ai_move to use.
+        Returns False (and keeps playing without a book) if the file cannot be opened.
+        """
+        try:
+            book = OpeningBook(path)
+        except OSError as e:
+            print(f"Could not open opening book {path}: {e}")
+            return False
+        if self.opening_book:
+            self.opening_book.close()
+        self.opening_book = book
+        return True
+
+    def choose_book_move(self) -> tuple[tuple[int, int], tuple[int, int], str | None] | None:
+        """
+        Returns a weighted-random book move (start_pos, end_pos, promotion) for the current
+        position, or None if the book is disabled, missing, or has no legal move for it.
+        """
+        if not (self.use_opening_book and self.opening_book):
+            return None
+        book_move = self.opening_book.choose_move(self.position_history[-1], self.board)
+        # Guard against hash collisions and corrupt entries
+        if book_move and (book_move[0], book_move[1]) in self.generate_legal_moves():
+            return book_move
+        return None
+
+    def load_tablebases(self, directory: str) -> bool:
+        """
+        Enables endgame tablebase probing from the generated tables in `directory`.
+        Returns False if the directory holds no usable tables.
+        """
+        # Imported here so `python -m engine.tablebase` does not find the module already loaded
+        from engine.tablebase import Tablebases
+        tablebases = Tablebases(directory)
+        if not tablebases.available():
+            return False
+        self.tablebases = tablebases
+        return True
+
+    def probe_tablebase(self) -> tuple[int, int] | None:
+        """
+        Returns the tablebase result (outcome, plies) for the side to move, where outcome is
+        1 (wins), 0 (draw) or -1 (gets mated), or None if the position is not covered.
+        """
+        # Tables hold at most four pieces; the captured lists make this check free
+        if len(self.captured_pieces['w']) + len(self.captured_pieces['b']) < 28:
+            return None
+        # The tables know nothing about castling
+        if any(not self.kings_moved[color] and not all(self.rooks_moved[color].values()) for color in ('w', 'b')):
+            return None
+        return self.tablebases.probe(self.board, self.current_turn)
+
+    def tablebase_score(self) -> int | None:
+        """
+        Converts the tablebase result into a search score for the side to move,
+        preferring faster wins and slower losses.
+        """
+        result = self.probe_tablebase()
+        if result is None:
+            return None
+        outcome, plies = result
+        return outcome * (self.TABLEBASE_WIN_SCORE - plies)
+
+    def choose_tablebase_move(self) -> tuple[tuple[int, int], tuple[int, int], str] | None:
+        """
+        Picks the best move straight from the tablebases when the current position is covered:
+        the fastest mate when winning, otherwise the move that holds the draw or delays mate longest.
+        """
+        if not self.tablebases or self.probe_tablebase() is None:
+            return None
+
+        best_move = None
+        best_score = -float('inf')
+        record = MoveRecord()
+        for start_pos, end_pos in self.generate_legal_moves():
+            piece = self.get_piece(start_pos[0], start_pos[1])
+            # Under-promoting to a rook avoids a few stalemates a queen would allow
+            promotions = ('Q', 'R') if piece[1] == 'P' and end_pos[0] in (0, 7) else ('Q',)
+            for promotion in promotions:
+                self._describe_move(start_pos, end_pos, promotion, record)
+                self._apply_move_record(record)
+                reply_score = self.tablebase_score()
+                self._revert_move_record(record)
+                # Positions that leave the tables are drawn ones: the lone king took the last piece
+                score = -reply_score if reply_score is not None else 0
+                if score > best_score:
+                    best_score = score
+                    best_move = (start_pos, end_pos, promotion)
+        return best_move
+
+    def check_suffix(self, start_pos: tuple[int, int], end_pos: tuple[int, int], promotion: str = 'Q') -> str:
+        """
+        Returns '#' if the legal move mates, '+' if it gives check, and '' otherwise,
+        as used in move notation. The position is left unchanged.
+        """
+        record = MoveRecord()
+        self._describe_move(start_pos, end_pos, promotion, record)
+        self._apply_move_record(record)
+        suffix = ''
+        if self.is_opponent_in_check(self.current_turn):
+            suffix = '#' if not self.generate_legal_moves() else '+'
+        self._revert_move_record(record)
+        return suffix
+
+    def make_ai_move(self) -> bool:
+        """
+        Determines and executes the best move for the side to move using the Negamax algorithm.
+        The search depth is determined by the `ai_difficulty` setting.
+        """
+        # Known opening positions are answered straight from the book, without searching
+        book_move = self.choose_book_move()
+        if book_move:
+            start_pos, end_pos, promotion = book_move
+            self.make_move(start_pos, end_pos, promotion or 'Q')
+            return True
+
+        # Endgames covered by the tablebases are played perfectly
+        tablebase_move = self.choose_tablebase_move()
+        if tablebase_move:
+            self.make_move(*tablebase_move)
+            return True
+
+        # Determine search depth based on AI difficulty
+        depth = self.AI_DIFFICULTY_DEPTHS.get(self.ai_difficulty, 1)
+
+        # After finding the best move, execute it on the actual board
+        best_move = self.search(max_depth=depth).best_move
+        if best_move:
+            start_pos, end_pos = best_move
+            self.make_move(start_pos, end_pos, 'Q') # AI always promotes to a queen
+            return True
+        return False
+
+    def search(self, max_depth: int = 64, node_limit: int | None = None, time_limit: float | None = None,
+               info_callback=None) -> SearchResult:
+        """
+        Finds the best move for the side to move without playing it, by iterative deepening:
+        depth 1, 2, ... up to `max_depth`, each iteration searching the previous best move first.
+        This is the headless entry point used by make_ai_move and the analysis tools.
+
+        Args:
+            max_depth (int): Deepest iteration to run.
+            node_limit (int, optional): Stop once this many nodes have been searched.
+            time_limit (float, optional): Stop after this many seconds.
+            info_callback (callable, optional): Called with the SearchResult after each completed iteration.
+
+        Returns:
+            SearchResult: The result of the deepest completed iteration. Depth 1 always completes,
+            so there is a best move whenever a legal move exists.
+        """
+        started = time.perf_counter()
+        result = SearchResult()
+        self.search_nodes = 0
+        self.stop_requested = False
+        self._node_limit = node_limit
+        self._deadline = started + time_limit if time_limit is not None else None
+        self._limits_active = False # The first iteration always runs to completion
+
+        # Move Ordering for the root node: Prioritize captures
+        root_moves = self.generate_legal_moves()
+        root_moves.sort(key=self._move_order_score, reverse=True)
+
+        record = MoveRecord()
+        try:
+            for depth in range(1, max_depth + 1):
+                if not root_moves:
+                    break
+                alpha = -float('inf')
+                beta = float('inf')
+                best_move = None
+                max_eval = -float('inf')
+                for move in root_moves:
+                    # Simulate the move, search the reply and take it back
+                    self._describe_move(move[0], move[1], 'Q', record)
+                    self._apply_move_record(record)
+                    try:
+                        # The eval is negated because it's from the opponent's perspective
+                        eval = -self.negamax(depth - 1, -beta, -alpha)
+                    finally:
+                        self._revert_move_record(record)
+                    if best_move is None or eval > max_eval:
+                        max_eval = eval
+                        best_move = move
+                    alpha = max(alpha, eval)
+
+                result.best_move, result.score, result.depth = best_move, max_eval, depth
+                result.nodes, result.elapsed = self.search_nodes, time.perf_counter() - started
+                if info_callback:
+                    info_callback(result)
+                # Search the best move first in the next iteration; a forced mate cannot improve
+                root_moves.remove(best_move)
+                root_moves.insert(0, best_move)
+                if abs(max_eval) == float('inf'):
+                    break
+                self._limits_active = True
+                if self._search_limit_reached():
+                    break
+        except SearchAborted:
+            pass # Keep the last completed iteration
+        finally:
+            self._limits_active = False
+
+        result.nodes, result.elapsed = self.search_nodes, time.perf_counter() - started
+        return result
+
+    def _search_limit_reached(self) -> bool:
+        """
+        Returns True once the running search has hit its node or time limit, or was asked to stop.
+        """
+        if self.stop_requested:
+            return True
+        if self._node_limit is not None and self.search_nodes >= self._node_limit:
+            return True
+        # Reading the clock is comparatively slow, so only do it every 256 nodes
+        return self._deadline is not None and not self.search_nodes & 255 and time.perf_counter() >= self._deadline
+
+    def score_to_centipawns(self, score: float) -> int:
+        """
+        Converts a search score to centipawns, clamping mates and tablebase wins to ±MATE_CENTIPAWNS.
+        """
+        if abs(score) >= self.TABLEBASE_WIN_SCORE - 1000:
+            return self.MATE_CENTIPAWNS if score > 0 else -self.MATE_CENTIPAWNS
+        return max(-self.MATE_CENTIPAWNS, min(self.MATE_CENTIPAWNS, int(score / self.EVAL_UNITS_PER_CENTIPAWN)))
+
+    def _pack_castling_state(self) -> int:
+        """
+        Packs the kings_moved / rooks_moved flags into a 6-bit integer so a move record
+        can restore them exactly on undo.
+        """
+        bits = 0
+        for i, flag in enumerate((self.kings_moved['w'], self.kings_moved['b'],
+                                  self.rooks_moved['w']['kingside'], self.rooks_moved['w']['queenside'],
+                                  self.rooks_moved['b']['kingside'], self.rooks_moved['b']['queenside'])):
+            if flag:
+                bits |= 1 << i
+        return bits
+
+    def _unpack_castling_state(self, bits: int):
+        """
+        Restores the kings_moved / rooks_moved flags from a value built by _pack_castling_state.
+        """
+        self.kings_moved = {'w': bool(bits & 1), 'b': bool(bits & 2)}
+        self.rooks_moved = {
+            'w': {'kingside': bool(bits & 4), 'queenside': bool(bits & 8)},
+            'b': {'kingside': bool(bits & 16), 'queenside': bool(bits & 32)}
+        }
+
+    def make_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int], promotion: str | None = 'Q') -> MoveRecord:
+        """
+        Plays a move for the side to move on the actual game board and records it in move_history.
+        The move is assumed to be legal (e.g. taken from highlight_moves).
+
+        Args:
+            start_pos (tuple[int, int]): The (row, col) of the piece to move.
+            end_pos (tuple[int, int]): The destination (row, col).
+            promotion (str | None): Piece type ('Q', 'R', 'B', 'N') a pawn promotes to on the last rank.
+
+        Returns:
+            MoveRecord: The record that was appended to move_history.
+        """
+        record = self._describe_move(start_pos, end_pos, promotion, MoveRecord())
+        self._apply_move_record(record)
+        self.move_history.append(record)
+        self.redo_history.clear() # Clear redo history when a new move is made
+
+        # The game line changed, so snapshots past this point no longer describe it
+        ply = len(self.move_history)
+        for checkpoint_ply in [p for p in self.ply_checkpoints if p >= ply]:
+            del self.ply_checkpoints[checkpoint_ply]
+        self._store_checkpoint_if_due()
+        return record
+
+    def _describe_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int], promotion: str | None, record: MoveRecord) -> MoveRecord:
+        """
+        Fills `record` with a move for the side to move and the state needed to undo it.
+        Search reuses one record per ply, so nothing is allocated per node.
+        """
+        moved_piece = self.board[start_pos[0]][start_pos[1]]
+        record.start_pos = start_pos
+        record.end_pos = end_pos
+        record.moved_piece = moved_piece
+        record.captured_piece = self.board[end_pos[0]][end_pos[1]]
+        record.promoted_to = None
+        record.rook_start = None
+        record.rook_end = None
+        record.en_passant_target_before_move = self.en_passant_target
+        record.is_en_passant_capture = False
+        record.castling_rights_before = self._pack_castling_state()
+        record.halfmove_clock_before_move = self.halfmove_clock
+
+        if moved_piece[1] == 'P':
+            if end_pos == self.en_passant_target:
+                # The captured pawn sits beside the capturing pawn, not on the target square
+                record.is_en_passant_capture = True
+                record.captured_piece = self.board[start_pos[0]][end_pos[1]]
+            if end_pos[0] == (0 if moved_piece[0] == 'w' else 7):
+                record.promoted_to = promotion or 'Q'
+        elif moved_piece[1] == 'K' and abs(start_pos[1] - end_pos[1]) == 2:
+            if end_pos[1] > start_pos[1]: # Kingside castling
+                record.rook_start = (start_pos[0], 7)
+                record.rook_end = (start_pos[0], end_pos[1] - 1)
+            else: # Queenside castling
+                record.rook_start = (start_pos[0], 0)
+                record.rook_end = (start_pos[0], end_pos[1] + 1)
+        return record
+
+    def _apply_move_record(self, record: MoveRecord):
+        """
+        Applies a move record to the game state: board, captured pieces, castling flags,
+        en passant target, turn, halfmove clock and position history.
+        Used both for new moves and for redo.
+        """
+        start_pos, end_pos, moved_piece = record.start_pos, record.end_pos, record.moved_piece
+        color = moved_piece[0]
+
+        if record.captured_piece:
+            self.captured_pieces[color].append(record.captured_piece)
+            if record.is_en_passant_capture:
+                self.place_piece(start_pos[0], end_pos[1], None) # Remove the pawn captured en passant
+
+        self.place_piece(end_pos[0], end_pos[1], color + record.promoted_to if record.promoted_to else moved_piece)
+        self.place_piece(start_pos[0], start_pos[1], None)
+
+        if record.rook_start:
+            self.place_piece(record.rook_end[0], record.rook_end[1], color + 'R')
+            self.place_piece(record.rook_start[0], record.rook_start[1], None)
+
+        # Castling flags: a king or rook leaving its square, or a rook captured on its home square
+        if moved_piece[1] == 'K':
+            self.kings_moved[color] = True
+        for pos in (start_pos, end_pos):
+            if pos == (7, 0): self.rooks_moved['w']['queenside'] = True
+            elif pos == (7, 7): self.rooks_moved['w']['kingside'] = True
+            elif pos == (0, 0): self.rooks_moved['b']['queenside'] = True
+            elif pos == (0, 7): self.rooks_moved['b']['kingside'] = True
+
+        # Update en passant target for the next turn
+        self.en_passant_target = None
+        if moved_piece[1] == 'P' and abs(start_pos[0] - end_pos[0]) == 2:
+            self.en_passant_target = ((start_pos[0] + end_pos[0]) // 2, start_pos[1])
+
+        self.current_turn = 'b' if color == 'w' else 'w'
+        self._record_position_after_move(moved_piece, record.captured_piece is not None)
+        record.position_key = self.position_history[-1]
+
+    def _revert_move_record(self, record: MoveRecord):
+        """
+        Restores the game state from before a move exactly, using the information stored in its record.
+        """
+        start_pos, end_pos, moved_piece = record.start_pos, record.end_pos, record.moved_piece
+        color = moved_piece[0]
+
+        self._pop_position()
+        self.halfmove_clock = record.halfmove_clock_before_move
+        self.en_passant_target = record.en_passant_target_before_move
+        self._unpack_castling_state(record.castling_rights_before)
+        self.current_turn = color
+
+        if record.rook_start:
+            self.place_piece(record.rook_start[0], record.rook_start[1], color + 'R')
+            self.place_piece(record.rook_end[0], record.rook_end[1], None)
+
+        self.place_piece(start_pos[0], start_pos[1], moved_piece) # Also reverts a promotion
+        if record.is_en_passant_capture:
+            self.place_piece(end_pos[0], end_pos[1], None)
+            self.place_piece(start_pos[0], end_pos[1], record.captured_piece)
+        else:
+            self.place_piece(end_pos[0], end_pos[1], record.captured_piece)
+
+        if record.captured_piece:
+            self.captured_pieces[color].pop() # Captures are appended in move order
+
+    def undo_last_move(self) -> bool:
+        """
+        Undoes the last move made by either player.
+        Restores board state, captured pieces, and special move flags.
+        """
+        if not self.move_history:
+            return False # No moves to undo
+
+        last_move = self.move_history.pop()
+        self._revert_move_record(last_move)
+        self.game_over = False # If game was over, it's not anymore
+        self.winner = None
+        self.redo_history.append(last_move) # Store the undone move for redo
+        return True
+
+    def redo_last_move(self) -> bool:
+        """
+        Redoes the last undone move.
+        Restores board state, captured pieces, and special move flags.
+        """
+        if not self.redo_history:
+            return False # No moves to redo
+
+        redone_move = self.redo_history.pop()
+        self._apply_move_record(redone_move)
+        self.move_history.append(redone_move) # Add back to move history
+        self._store_checkpoint_if_due()
+        self.game_over = False
+        self.winner = None
+        return True
+
+    def _take_checkpoint(self) -> tuple:
+        """
+        Returns a compact snapshot of the current position: the 64 squares as a flat tuple,
+        turn, packed castling flags, en passant target, halfmove clock and captured pieces.
+        """
+        return (tuple(piece for row in self.board for piece in row), self.current_turn,
+                self._pack_castling_state(), self.en_passant_target, self.halfmove_clock,
+                tuple(self.captured_pieces['w']), tuple(self.captured_pieces['b']))
+
+    def _store_checkpoint_if_due(self):
+        """
+        Snapshots the current position if the current ply is a checkpoint ply without a snapshot.
+        """
+        ply = len(self.move_history)
+        if ply % self.CHECKPOINT_INTERVAL == 0 and ply not in self.ply_checkpoints:
+            self.ply_checkpoints[ply] = self._take_checkpoint()
+
+    def goto_ply(self, ply: int) -> bool:
+        """
+        Moves to the position after `ply` half-moves of the current game line
+        (played moves followed by undone moves that can still be redone).
+        Restores the nearest checkpoint at or before the target and replays at most
+        CHECKPOINT_INTERVAL moves, instead of undoing or redoing one move at a time.
+
+        Returns:
+            bool: True if the position changed.
+        """
+        line = self.move_history + self.redo_history[::-1]
+        ply = max(0, min(ply, len(line)))
+        current_ply = len(self.move_history)
+        if ply == current_ply:
+            return False
+
+        base_ply = ply - ply % self.CHECKPOINT_INTERVAL
+        if current_ply > ply and current_ply - ply <= ply - base_ply:
+            # A few undos from here are cheaper than restoring the checkpoint
+            while len(self.move_history) > ply:
+                self.redo_history.append(self.move_history.pop())
+                self._revert_move_record(self.redo_history[-1])
+        else:
+            if not (base_ply <= current_ply < ply):
+                # Restore the checkpoint and the game line up to it
+                board, turn, castling_bits, en_passant_target, halfmove_clock, white_caps, black_caps = self.ply_checkpoints[base_ply]
+                self.board = [list(board[r * 8:r * 8 + 8]) for r in range(8)]
+                self.current_turn = turn
+                self._unpack_castling_state(castling_bits)
+                self.en_passant_target = en_passant_target
+                self.halfmove_clock = halfmove_clock
+                self.captured_pieces = {'w': list(white_caps), 'b': list(black_caps)}
+                self.position_history = self.position_history[:1] + [record.position_key for record in line[:base_ply]]
+                self.position_counts = {}
+                for key in self.position_history:
+                    self.position_counts[key] = self.position_counts.get(key, 0) + 1
+                self.move_history = line[:base_ply]
+
+            # Replay forward from the checkpoint (or from the current position)
+            for record in line[len(self.move_history):ply]:
+                self._apply_move_record(record)
+                self.move_history.append(record)
+                self._store_checkpoint_if_due()
+            self.redo_history = line[ply:][::-1]
+
+        self.game_over = False
+        self.winner = None
+        return True
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'ChessLogic':
+        """
+        Creates a game starting from the position described by a FEN string.
+        """
+        chess_logic = cls()
+        chess_logic.set_fen(fen)
+        return chess_logic
+
+    def set_fen(self, fen: str):
+        """
+        Replaces the current game with the position described by a FEN string.
+        Move history, redo history, checkpoints and repetition history start afresh from it;
+        AI settings, caches, the opening book and tablebases are kept.
+        Castling rights whose king or rook is not on its home square are dropped.
+
+        Raises:
+            ValueError: If the FEN is malformed.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: '{fen}'")
+        placement, turn, castling, en_passant = fields[:4]
+        halfmove_clock, fullmove_number = fields[4:6] if len(fields) >= 6 else ('0', '1')
+
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f"FEN placement needs 8 ranks: '{placement}'")
+        board = []
+        for rank in ranks:
+            row = []
+            for char in rank:
+                if char.isdigit():
+                    row.extend([None] * int(char))
+                elif char.upper() in 'PNBRQK':
+                    row.append(('w' if char.isupper() else 'b') + char.upper())
+                else:
+                    raise ValueError(f"Invalid piece '{char}' in FEN")
+            if len(row) != 8:
+                raise ValueError(f"FEN rank '{rank}' does not have 8 squares")
+            board.append(row)
+        for color in ('w', 'b'):
+            if sum(row.count(color + 'K') for row in board) != 1:
+                raise ValueError(f"FEN must have exactly one {'white' if color == 'w' else 'black'} king")
+
+        if turn not in ('w', 'b'):
+            raise ValueError(f"Invalid side to move '{turn}' in FEN")
+        if castling != '-' and (not castling or any(char not in 'KQkq' for char in castling)):
+            raise ValueError(f"Invalid castling field '{castling}' in FEN")
+        en_passant_target = None
+        if en_passant != '-':
+            if len(en_passant) != 2 or en_passant[0] not in 'abcdefgh' or en_passant[1] not in ('3' if turn == 'b' else '6'):
+                raise ValueError(f"Invalid en passant square '{en_passant}' in FEN")
+            en_passant_target = (8 - int(en_passant[1]), ord(en_passant[0]) - ord('a'))
+        try:
+            halfmove_clock = int(halfmove_clock)
+            fullmove_number = int(fullmove_number)
+        except ValueError:
+            raise ValueError(f"Invalid move counters in FEN: '{fen}'") from None
+        if halfmove_clock < 0 or fullmove_number < 1:
+            raise ValueError(f"Invalid move counters in FEN: '{fen}'")
+
+        self.board = board
+        self.current_turn = turn
+        self.en_passant_target = en_passant_target
+        self.halfmove_clock = halfmove_clock
+        self.start_ply = 2 * (fullmove_number - 1) + (1 if turn == 'b' else 0)
+
+        # A right survives only with the king and that rook still on their home squares
+        for color, row, kingside_letter, queenside_letter in (('w', 7, 'K', 'Q'), ('b', 0, 'k', 'q')):
+            king_home = board[row][4] == color + 'K'
+            kingside = king_home and kingside_letter in castling and board[row][7] == color + 'R'
+            queenside = king_home and queenside_letter in castling and board[row][0] == color + 'R'
+            self.kings_moved[color] = not (kingside or queenside)
+            self.rooks_moved[color] = {'kingside': not kingside, 'queenside': not queenside}
+
+        # Treat missing material as captured, so displays and evaluation see the usual lists
+        self.captured_pieces = {'w': [], 'b': []}
+        for color, capturer in (('w', 'b'), ('b', 'w')):
+            counts = {piece_type: sum(row.count(color + piece_type) for row in board) for piece_type in 'PNBRQ'}
+            full_set = {'P': 8, 'N': 2, 'B': 2, 'R': 2, 'Q': 1}
+            promoted = sum(max(0, counts[t] - full_set[t]) for t in 'NBRQ')
+            missing = {'P': max(0, 8 - counts['P'] - promoted)}
+            missing.update({t: max(0, full_set[t] - counts[t]) for t in 'NBRQ'})
+            for piece_type in 'QRBNP':
+                self.captured_pieces[capturer].extend([color + piece_type] * missing[piece_type])
+
+        self.game_over = False
+        self.winner = None
+        self.move_history = []
+        self.redo_history = []
+        self.position_history = []
+        self.position_counts = {}
+        self._push_position(self.compute_hash())
+        self.ply_checkpoints = {0: self._take_checkpoint()}
+        self.start_fen = self.to_fen() # Normalised, e.g. without the dropped castling rights
+
+    def to_fen(self) -> str:
+        """
+        Returns the current position as a FEN string.
+        """
+        ranks = []
+        for row in self.board:
+            rank = ''
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += piece[1] if piece[0] == 'w' else piece[1].lower()
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        castling = ''
+        for color, kingside_letter, queenside_letter in (('w', 'K', 'Q'), ('b', 'k', 'q')):
+            if not self.kings_moved[color]:
+                if not self.rooks_moved[color]['kingside']:
+                    castling += kingside_letter
+                if not self.rooks_moved[color]['queenside']:
+                    castling += queenside_letter
+
+        en_passant = '-'
+        if self.en_passant_target:
+            ep_row, ep_col = self.en_passant_target
+            en_passant = 'abcdefgh'[ep_col] + str(8 - ep_row)
+
+        fullmove_number = (self.start_ply + len(self.move_history)) // 2 + 1
+        return f"{'/'.join(ranks)} {self.current_turn} {castling or '-'} {en_passant} {self.halfmove_clock} {fullmove_number}"
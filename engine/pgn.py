@@ -0,0 +1,261 @@
+"""
+Streaming PGN support.
+
+Games are read one at a time from a file or any text stream, so a corpus of any size is
+processed in constant memory. Moves are kept as SAN strings; parse_san resolves them against
+a ChessLogic position and load_game replays a game into a ChessLogic's move history.
+write_game does the reverse, emitting a ChessLogic's move history as PGN.
+"""
+import re
+
+# Movetext tokens: comment braces, variation parentheses, rest-of-line comments, NAGs and words
+_TOKEN_RE = re.compile(r'[{}();]|\$\d+|[^\s{}();]+')
+_HEADER_RE = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_LOOSE_HEADER_RE = re.compile(r'^\[\s*(\w+)\s+"(.*)"\s*\]') # Tolerates unescaped quotes in values
+_MOVE_NUMBER_RE = re.compile(r'^\d+\.+')
+_SAN_RE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SEVEN_TAG_ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+LINE_LENGTH = 80 # Export format limit for movetext lines
+
+
+# --- PGN Game ---
+class PGNGame:
+    """
+    One game from a PGN file: its tag pairs, its mainline moves in SAN and its result.
+    Comments, variations and NAGs are dropped.
+    """
+    __slots__ = ('headers', 'moves', 'result')
+
+    def __init__(self):
+        self.headers = {}
+        self.moves = []
+        self.result = '*'
+
+
+def read_games(source):
+    """
+    Yields a PGNGame for each game in `source`, a text stream or a file path,
+    reading it line by line.
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf-8', errors='replace') as stream:
+            yield from read_games(stream)
+        return
+
+    stream = source
+    game = PGNGame()
+    in_comment = False # Inside a {...} comment, which may span lines
+    variation_depth = 0 # Nesting of (...) variations being skipped
+    in_movetext = False
+
+    for line in stream:
+        if line.startswith('%'): # Escaped line, ignored by definition
+            continue
+
+        if not in_comment and not variation_depth and line.startswith('['):
+            if in_movetext: # A new tag section without a result token ends the previous game
+                yield game
+                game = PGNGame()
+                in_movetext = False
+            header = _HEADER_RE.match(line) or _LOOSE_HEADER_RE.match(line)
+            if header:
+                game.headers[header.group(1)] = header.group(2).replace('\\"', '"').replace('\\\\', '\\')
+            continue
+
+        for match in _TOKEN_RE.finditer(line):
+            token = match.group()
+            if in_comment:
+                if token == '}':
+                    in_comment = False
+                continue
+            if token == '{':
+                in_comment = True
+            elif token == ';':
+                break # Comment runs to the end of the line
+            elif token == '(':
+                variation_depth += 1
+            elif token == ')':
+                variation_depth = max(0, variation_depth - 1)
+            elif variation_depth or token.startswith('$'):
+                continue
+            elif token in RESULTS:
+                game.result = token
+                yield game
+                game = PGNGame()
+                in_movetext = False
+            else:
+                token = _MOVE_NUMBER_RE.sub('', token)
+                if token:
+                    game.moves.append(token)
+                in_movetext = True
+
+    if in_movetext or game.headers:
+        yield game
+
+
+def parse_san(chess_logic, san: str) -> tuple[tuple[int, int], tuple[int, int], str | None]:
+    """
+    Resolves a SAN move (e.g. 'Nbd7', 'exd8=Q+', 'O-O') against the current position of
+    `chess_logic` and returns (start_pos, end_pos, promotion).
+
+    Raises:
+        ValueError: If the move is malformed, illegal or ambiguous in this position.
+    """
+    text = san.rstrip('+#!?')
+    color = chess_logic.current_turn
+    legal_moves = chess_logic.generate_legal_moves()
+
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        row = 7 if color == 'w' else 0
+        move = ((row, 4), (row, 6 if len(text) == 3 else 2))
+        if move in legal_moves and chess_logic.get_piece(row, 4) == color + 'K':
+            return move[0], move[1], None
+        raise ValueError(f"Illegal castling move '{san}'")
+
+    parts = _SAN_RE.match(text)
+    if not parts:
+        raise ValueError(f"Malformed SAN move '{san}'")
+    piece_type, from_file, from_rank, _, target, promotion = parts.groups()
+    piece = color + (piece_type or 'P')
+    end_pos = (8 - int(target[1]), ord(target[0]) - ord('a'))
+
+    candidates = [
+        start_pos for start_pos, move_end in legal_moves
+        if move_end == end_pos
+        and chess_logic.get_piece(start_pos[0], start_pos[1]) == piece
+        and (from_file is None or start_pos[1] == ord(from_file) - ord('a'))
+        and (from_rank is None or start_pos[0] == 8 - int(from_rank))
+    ]
+    if len(candidates) != 1:
+        raise ValueError(f"{'Ambiguous' if candidates else 'Illegal'} move '{san}'")
+
+    if piece_type is None and end_pos[0] in (0, 7):
+        promotion = promotion or 'Q'
+    else:
+        promotion = None
+    return candidates[0], end_pos, promotion
+
+
+def move_to_san(chess_logic, start_pos: tuple[int, int], end_pos: tuple[int, int], promotion: str | None = None) -> str:
+    """
+    Returns the SAN of a legal move in the current position of `chess_logic`,
+    including the check ('+') or mate ('#') suffix.
+    """
+    piece = chess_logic.get_piece(start_pos[0], start_pos[1])
+    piece_type = piece[1]
+    target = chess_logic.get_piece(end_pos[0], end_pos[1])
+    legal_moves = chess_logic.generate_legal_moves()
+    files, ranks = 'abcdefgh', '87654321' # Indexed by board column and row
+    square = files[end_pos[1]] + ranks[end_pos[0]]
+
+    if piece_type == 'K' and abs(end_pos[1] - start_pos[1]) == 2:
+        san = 'O-O' if end_pos[1] > start_pos[1] else 'O-O-O'
+    elif piece_type == 'P':
+        is_capture = start_pos[1] != end_pos[1] # Diagonal pawn moves capture, en passant included
+        san = (files[start_pos[1]] + 'x' if is_capture else '') + square
+        if end_pos[0] in (0, 7):
+            san += '=' + (promotion or 'Q')
+    else:
+        # Disambiguate from other pieces of the same kind that can reach the same square
+        rivals = [move_start for move_start, move_end in legal_moves
+                  if move_end == end_pos and move_start != start_pos
+                  and chess_logic.get_piece(move_start[0], move_start[1]) == piece]
+        disambiguation = ''
+        if rivals:
+            if all(rival[1] != start_pos[1] for rival in rivals):
+                disambiguation = files[start_pos[1]]
+            elif all(rival[0] != start_pos[0] for rival in rivals):
+                disambiguation = ranks[start_pos[0]]
+            else:
+                disambiguation = files[start_pos[1]] + ranks[start_pos[0]]
+        san = piece_type + disambiguation + ('x' if target else '') + square
+
+    return san + chess_logic.check_suffix(start_pos, end_pos, promotion or 'Q')
+
+
+def load_game(chess_logic, game: PGNGame) -> int:
+    """
+    Sets `chess_logic` to the game's starting position (its FEN tag, if any) and plays the
+    game's moves through make_move, so they land in the move history for undo, redo and goto_ply.
+
+    Returns:
+        int: The number of moves played.
+
+    Raises:
+        ValueError: If the FEN or a move is invalid; the moves before it stay played.
+    """
+    chess_logic.set_fen(game.headers.get('FEN', STARTING_FEN))
+    for san in game.moves:
+        start_pos, end_pos, promotion = parse_san(chess_logic, san)
+        chess_logic.make_move(start_pos, end_pos, promotion or 'Q')
+    return len(game.moves)
+
+
+def game_result(chess_logic) -> str:
+    """
+    Returns the PGN result of the current position: a decisive result after checkmate,
+    a draw after stalemate or a draw by rule, otherwise '*'.
+    """
+    if not chess_logic.generate_legal_moves():
+        if chess_logic.is_opponent_in_check(chess_logic.current_turn):
+            return '0-1' if chess_logic.current_turn == 'w' else '1-0'
+        return '1/2-1/2'
+    if chess_logic.is_fifty_move_draw() or chess_logic.is_repetition(3):
+        return '1/2-1/2'
+    return '*'
+
+
+def write_game(stream, chess_logic, headers: dict | None = None, result: str | None = None):
+    """
+    Writes the move history of `chess_logic` to a text stream as one PGN game.
+    The Seven Tag Roster comes first (with '?' for missing tags), then any other headers;
+    a FEN tag is added when the game did not start from the standard position.
+    `chess_logic` itself is left untouched: the moves are replayed on a scratch ChessLogic set up
+    from its starting position.
+    """
+    start_fen = chess_logic.start_fen
+    fullmove_offset = chess_logic.start_ply
+
+    # SAN needs the position before each move, so replay the game line from its start
+    replay = type(chess_logic)()
+    replay.set_fen(start_fen)
+    sans = []
+    for record in chess_logic.move_history:
+        sans.append(move_to_san(replay, record.start_pos, record.end_pos, record.promoted_to))
+        replay.make_move(record.start_pos, record.end_pos, record.promoted_to)
+    if result is None:
+        result = game_result(replay)
+
+    tags = {tag: '?' for tag in SEVEN_TAG_ROSTER}
+    tags['Date'] = '????.??.??'
+    tags.update(headers or {})
+    tags['Result'] = result
+    if start_fen != STARTING_FEN:
+        tags['SetUp'] = '1'
+        tags['FEN'] = start_fen
+    for tag, value in tags.items():
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        stream.write(f'[{tag} "{escaped}"]\n')
+    stream.write('\n')
+
+    tokens = []
+    for index, san in enumerate(sans):
+        ply = fullmove_offset + index
+        if ply % 2 == 0:
+            tokens.append(f"{ply // 2 + 1}.")
+        elif index == 0:
+            tokens.append(f"{ply // 2 + 1}...") # Game starts with Black to move
+        tokens.append(san)
+    tokens.append(result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            stream.write(line + '\n')
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    stream.write(line + '\n\n')
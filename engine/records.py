@@ -0,0 +1,75 @@
+"""
+Small __slots__ records shared by the game history and the search.
+"""
+
+
+# --- Move Record ---
+class MoveRecord:
+    """
+    Compact record of a single played move, stored in move_history and redo_history.
+    Holds everything needed to undo and redo the move exactly, including the castling
+    flags and halfmove clock from before the move. __slots__ keeps long histories small.
+    """
+    __slots__ = ('start_pos', 'end_pos', 'moved_piece', 'captured_piece', 'promoted_to',
+                 'rook_start', 'rook_end', 'en_passant_target_before_move', 'is_en_passant_capture',
+                 'castling_rights_before', 'halfmove_clock_before_move', 'position_key')
+
+    def __init__(self):
+        self.start_pos: tuple[int, int] | None = None
+        self.end_pos: tuple[int, int] | None = None
+        self.moved_piece: str | None = None
+        self.captured_piece: str | None = None # For en passant, the pawn removed beside end_pos
+        self.promoted_to: str | None = None # Piece type ('Q', 'R', 'B', 'N') if the move promoted a pawn
+        self.rook_start: tuple[int, int] | None = None # Rook squares if the move was castling
+        self.rook_end: tuple[int, int] | None = None
+        self.en_passant_target_before_move: tuple[int, int] | None = None
+        self.is_en_passant_capture = False
+        self.castling_rights_before = 0 # Packed kings_moved / rooks_moved flags
+        self.halfmove_clock_before_move = 0
+        self.position_key = 0 # Zobrist hash of the position after the move, set when applied
+
+
+# --- Search Frame ---
+class SearchFrame:
+    """
+    One ply of the explicit search stack used by ChessLogic.negamax: the node's depth and
+    alpha-beta window, its ordered moves, the index of the next move to search, the best
+    score so far, and a reusable MoveRecord holding the undo info of the move being searched.
+    """
+    __slots__ = ('depth', 'alpha', 'beta', 'best', 'moves', 'index', 'record')
+
+    def __init__(self):
+        self.depth = 0
+        self.alpha = -float('inf')
+        self.beta = float('inf')
+        self.best = -float('inf')
+        self.moves: list[tuple[tuple[int, int], tuple[int, int]]] = []
+        self.index = 0
+        self.record = MoveRecord()
+
+
+# --- Search Result ---
+class SearchAborted(Exception):
+    """
+    Raised inside ChessLogic.negamax when a node or time limit, or a stop request, ends the search.
+    The position is restored before it propagates.
+    """
+
+
+class SearchResult:
+    """
+    Outcome of ChessLogic.search: the best root move and its score (side to move's view)
+    from the deepest completed iteration, with the work done to find it.
+    """
+    __slots__ = ('best_move', 'score', 'depth', 'nodes', 'elapsed')
+
+    def __init__(self):
+        self.best_move: tuple[tuple[int, int], tuple[int, int]] | None = None
+        self.score = 0.0
+        self.depth = 0 # Deepest fully searched iteration
+        self.nodes = 0
+        self.elapsed = 0.0 # Seconds
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
@@ -0,0 +1,520 @@
+"""
+Endgame tablebases for small material, generated by retrograde analysis.
+
+Supported endings are king and one or two pieces against a lone king: KQK, KRK, KPK and KBNK.
+Each table stores, for every position with either side to move, one byte of distance to mate
+in plies from the side to move's point of view:
+
+    0          draw
+    1..127     side to move mates in that many plies
+    128 + n    side to move is mated in n plies (128 means checkmated now)
+    255        illegal or non-canonical position
+
+Tables are indexed as if White were the stronger side; positions with a stronger Black are
+flipped before lookup. Pawnless tables fold the 8 board symmetries by keeping the stronger
+king in the a1-d1-d4 triangle, and KPK folds the left-right mirror by keeping the pawn on
+files a-d. Files are flat byte arrays behind a small header and are memory-mapped for probing.
+
+Squares are numbered r * 8 + c in ChessLogic.board coordinates (row 0 is Black's back rank),
+and White pawns move towards row 0.
+
+Usage:
+    python -m engine.tablebase [--dir DIRECTORY] [KQK KRK KPK KBNK]
+
+The default directory is `tablebases` in the repository root, where pn.py looks for the tables.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from itertools import product
+
+TABLE_PIECES = {
+    'KQK': ('Q',),
+    'KRK': ('R',),
+    'KPK': ('P',),
+    'KBNK': ('B', 'N'),
+}
+GENERATION_ORDER = ('KQK', 'KRK', 'KPK', 'KBNK') # KPK promotions look up KQK and KRK
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tablebases')
+
+DRAW = 0
+LOSS = 128
+ILLEGAL = 255
+
+HEADER_STRUCT = struct.Struct('<4sHH8sI') # magic, version, piece count, table name, entries per side
+MAGIC = b'PNTB'
+VERSION = 1
+
+
+# --- Board Geometry ---
+def _square(r: int, c: int) -> int:
+    return r * 8 + c
+
+
+def _on_board(r: int, c: int) -> bool:
+    return 0 <= r < 8 and 0 <= c < 8
+
+
+def _mask_of(squares) -> int:
+    mask = 0
+    for sq in squares:
+        mask |= 1 << sq
+    return mask
+
+
+KING_TARGETS = [
+    [_square(r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+     if (dr or dc) and _on_board(r + dr, c + dc)]
+    for r in range(8) for c in range(8)
+]
+KNIGHT_TARGETS = [
+    [_square(r + dr, c + dc) for dr, dc in ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+     if _on_board(r + dr, c + dc)]
+    for r in range(8) for c in range(8)
+]
+KING_MASKS = [_mask_of(targets) for targets in KING_TARGETS]
+KNIGHT_MASKS = [_mask_of(targets) for targets in KNIGHT_TARGETS]
+# Squares a White pawn on each square attacks (one row up, one file to either side)
+PAWN_ATTACK_MASKS = [
+    _mask_of(_square(r - 1, c + dc) for dc in (-1, 1) if _on_board(r - 1, c + dc))
+    for r in range(8) for c in range(8)
+]
+
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+SLIDER_DIRECTIONS = {'Q': ROOK_DIRECTIONS + BISHOP_DIRECTIONS, 'R': ROOK_DIRECTIONS, 'B': BISHOP_DIRECTIONS}
+RAYS = {
+    piece_type: [
+        [[_square(r + dr * i, c + dc * i) for i in range(1, 8) if _on_board(r + dr * i, c + dc * i)]
+         for dr, dc in directions]
+        for r in range(8) for c in range(8)
+    ]
+    for piece_type, directions in SLIDER_DIRECTIONS.items()
+}
+
+# For each (from, to) pair on a common line: the squares strictly between them, and which
+# sliders move along that line. Unaligned pairs map to None.
+BETWEEN = [None] * 4096
+LINE_SLIDERS = [''] * 4096
+for _from in range(64):
+    for _directions, _sliders in ((ROOK_DIRECTIONS, 'QR'), (BISHOP_DIRECTIONS, 'QB')):
+        for _dr, _dc in _directions:
+            _r, _c, _between = _from // 8 + _dr, _from % 8 + _dc, 0
+            while _on_board(_r, _c):
+                BETWEEN[_from * 64 + _square(_r, _c)] = _between
+                LINE_SLIDERS[_from * 64 + _square(_r, _c)] = _sliders
+                _between |= 1 << _square(_r, _c)
+                _r, _c = _r + _dr, _c + _dc
+
+
+def _transform(flip_file: bool, flip_rank: bool, swap: bool) -> list[int]:
+    mapping = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        if swap:
+            r, c = c, r
+        if flip_file:
+            c = 7 - c
+        if flip_rank:
+            r = 7 - r
+        mapping.append(_square(r, c))
+    return mapping
+
+
+TRANSFORMS = [_transform(f, r, s) for s in (False, True) for r in (False, True) for f in (False, True)]
+MIRROR_FILES = TRANSFORMS[1]
+
+# The a1-d1-d4 triangle in row/column terms: file c <= 3 and rank (7 - r) <= c
+TRIANGLE = [sq for sq in range(64) if sq % 8 <= 3 and 7 - sq // 8 <= sq % 8]
+# For each square, the symmetries that bring it into the triangle (two when it lands on the a1-d4 diagonal)
+TRIANGLE_TRANSFORMS = [
+    [t for t in TRANSFORMS if t[sq] in TRIANGLE]
+    for sq in range(64)
+]
+
+
+def is_attacked(target: int, squares, types, occupied: int, skip: int = -1) -> bool:
+    """
+    Returns True if any of the stronger side's pieces (`squares` with matching `types`)
+    attacks `target` given the `occupied` bitmask. The piece at index `skip` is ignored,
+    which is how a piece about to be captured stops counting as an attacker.
+    """
+    for i, sq in enumerate(squares):
+        if i == skip:
+            continue
+        piece_type = types[i]
+        if piece_type == 'K':
+            if KING_MASKS[sq] >> target & 1:
+                return True
+        elif piece_type == 'N':
+            if KNIGHT_MASKS[sq] >> target & 1:
+                return True
+        elif piece_type == 'P':
+            if PAWN_ATTACK_MASKS[sq] >> target & 1:
+                return True
+        else:
+            pair = sq * 64 + target
+            if piece_type in LINE_SLIDERS[pair] and not BETWEEN[pair] & occupied:
+                return True
+    return False
+
+
+# --- Table Layout ---
+class TableSpec:
+    """
+    Index layout of one table. A position is the tuple of squares
+    (strong king, strong pieces..., weak king); each slot has a domain of allowed squares
+    and the index is the mixed-radix number of the slots' positions within their domains.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.types = ('K',) + TABLE_PIECES[name] # Stronger side's pieces, in square-tuple order
+        self.has_pawn = 'P' in self.types
+        self.domains = [list(range(64)) for _ in range(len(self.types) + 1)]
+        if self.has_pawn:
+            pawn_slot = self.types.index('P')
+            self.domains[pawn_slot] = [sq for sq in range(8, 56) if sq % 8 <= 3]
+        else:
+            self.domains[0] = TRIANGLE
+        self.digits = []
+        for domain in self.domains:
+            digit = [-1] * 64
+            for i, sq in enumerate(domain):
+                digit[sq] = i
+            self.digits.append(digit)
+        self.radices = []
+        radix = 1
+        for domain in reversed(self.domains):
+            self.radices.insert(0, radix)
+            radix *= len(domain)
+        self.size = radix # Entries per side to move
+
+    def canonical(self, squares: tuple) -> tuple:
+        """
+        Maps a position onto the symmetric copy that the table stores.
+        """
+        if self.has_pawn:
+            pawn = squares[self.types.index('P')]
+            if pawn % 8 > 3:
+                return tuple(MIRROR_FILES[sq] for sq in squares)
+            return squares
+        best = None
+        for t in TRIANGLE_TRANSFORMS[squares[0]]:
+            candidate = tuple(t[sq] for sq in squares)
+            if best is None or candidate < best:
+                best = candidate
+        return best
+
+    def index(self, squares: tuple) -> int:
+        """
+        Returns the index of a canonical position (strong side to move; add `size` for weak to move).
+        """
+        index = 0
+        for digit, radix, sq in zip(self.digits, self.radices, squares):
+            index += digit[sq] * radix
+        return index
+
+
+# --- Generation ---
+def _weak_king_moves(spec: TableSpec, squares: tuple, occupied: int):
+    """
+    Yields (target, captured_slot) for each legal move of the lone king;
+    captured_slot is -1 for a quiet move.
+    """
+    strong = squares[:-1]
+    weak_king = squares[-1]
+    occupied_without_king = occupied & ~(1 << weak_king)
+    for target in KING_TARGETS[weak_king]:
+        captured = strong.index(target) if occupied >> target & 1 else -1
+        if captured == 0:
+            continue
+        if not is_attacked(target, strong, spec.types, occupied_without_king, captured):
+            yield target, captured
+
+
+def _strong_unmoves(spec: TableSpec, squares: tuple, occupied: int):
+    """
+    Yields the positions (strong side to move) from which a quiet move of the stronger side
+    leads to `squares`, and in which the lone king is not in check.
+    """
+    weak_king = squares[-1]
+    for slot, piece_type in enumerate(spec.types):
+        sq = squares[slot]
+        if piece_type == 'K':
+            origins = [o for o in KING_TARGETS[sq] if not occupied >> o & 1]
+        elif piece_type == 'N':
+            origins = [o for o in KNIGHT_TARGETS[sq] if not occupied >> o & 1]
+        elif piece_type == 'P':
+            origins = []
+            if sq + 8 < 56 and not occupied >> (sq + 8) & 1:
+                origins.append(sq + 8)
+                if sq // 8 == 4 and not occupied >> (sq + 16) & 1:
+                    origins.append(sq + 16) # Double step from the starting row
+        else:
+            origins = []
+            for ray in RAYS[piece_type][sq]:
+                for o in ray:
+                    if occupied >> o & 1:
+                        break
+                    origins.append(o)
+
+        for origin in origins:
+            before = squares[:slot] + (origin,) + squares[slot + 1:]
+            before_occupied = occupied & ~(1 << sq) | (1 << origin)
+            if not is_attacked(weak_king, before[:-1], spec.types, before_occupied):
+                yield before
+
+
+def _probe_values(spec: TableSpec, values, squares: tuple, weak_to_move: bool) -> int:
+    canonical = spec.canonical(squares)
+    return values[spec.index(canonical) + (spec.size if weak_to_move else 0)]
+
+
+def generate_table(name: str, dependencies: dict | None = None, verbose: bool = False) -> bytearray:
+    """
+    Builds the distance-to-mate table for `name` by retrograde analysis and returns its bytes
+    (strong side to move first, then weak side to move).
+
+    Args:
+        name (str): One of TABLE_PIECES.
+        dependencies (dict): Already generated tables by name; KPK needs KQK and KRK to score promotions.
+        verbose (bool): Print progress to stderr.
+    """
+    spec = TableSpec(name)
+    size = spec.size
+    values = bytearray([ILLEGAL]) * (2 * size)
+    frontier = {0: []} # Plies to mate -> positions resolved at that distance, as (weak_to_move, squares)
+    promotion_seeds = {} # Plies -> strong-to-move positions that win by promoting
+    # A pawn promotes to a queen or, where that stalemates, a rook
+    promotion_tables = [(TableSpec(promoted), dependencies[promoted]) for promoted in ('KQK', 'KRK')] if spec.has_pawn else []
+
+    started = time.time()
+    piece_count = len(spec.domains)
+    for squares in product(*spec.domains):
+        if len(set(squares)) != piece_count or spec.canonical(squares) != squares:
+            continue
+        strong_king, weak_king = squares[0], squares[-1]
+        if KING_MASKS[strong_king] >> weak_king & 1:
+            continue
+        index = spec.index(squares)
+        occupied = _mask_of(squares)
+        weak_in_check = is_attacked(weak_king, squares[:-1], spec.types, occupied)
+
+        # Weak side to move: legal, since the lone king cannot give check
+        values[size + index] = DRAW
+        if weak_in_check and next(_weak_king_moves(spec, squares, occupied), None) is None:
+            values[size + index] = LOSS # Checkmated
+            frontier[0].append((True, squares))
+
+        # Strong side to move: legal only if the lone king is not in check
+        if weak_in_check:
+            continue
+        values[index] = DRAW
+        if spec.has_pawn:
+            pawn = squares[spec.types.index('P')]
+            if pawn < 16 and not occupied >> (pawn - 8) & 1:
+                best = None
+                for promoted_spec, promoted_values in promotion_tables:
+                    value = _probe_values(promoted_spec, promoted_values, (strong_king, pawn - 8, weak_king), True)
+                    if value >= LOSS and value != ILLEGAL:
+                        plies = value - LOSS + 1
+                        best = plies if best is None else min(best, plies)
+                if best is not None:
+                    promotion_seeds.setdefault(best, []).append(squares)
+
+    if verbose:
+        print(f"{name}: {2 * size} entries initialised in {time.time() - started:.1f}s", file=sys.stderr)
+
+    plies = 0
+    while frontier.get(plies) or any(level >= plies for level in promotion_seeds):
+        current = frontier.pop(plies, [])
+        for squares in promotion_seeds.pop(plies, []):
+            index = spec.index(squares)
+            if values[index] == DRAW:
+                values[index] = plies
+                current.append((False, squares))
+        following = frontier.setdefault(plies + 1, [])
+
+        for weak_to_move, squares in current:
+            occupied = _mask_of(squares)
+            if weak_to_move:
+                # Lost for the weak side: every strong move into it wins one ply later
+                for before in _strong_unmoves(spec, squares, occupied):
+                    before = spec.canonical(before)
+                    index = spec.index(before)
+                    if values[index] == DRAW:
+                        values[index] = plies + 1
+                        following.append((False, before))
+            else:
+                # Won for the strong side: a weak position moving into it is lost if all its moves are
+                strong_king, weak_king = squares[0], squares[-1]
+                for origin in KING_TARGETS[weak_king]:
+                    if occupied >> origin & 1 or KING_MASKS[strong_king] >> origin & 1:
+                        continue
+                    before = spec.canonical(squares[:-1] + (origin,))
+                    index = size + spec.index(before)
+                    if values[index] == DRAW and _all_moves_lose(spec, values, before):
+                        values[index] = LOSS + plies + 1
+                        following.append((True, before))
+
+        if verbose and current:
+            print(f"{name}: {len(current)} positions at {plies} plies", file=sys.stderr)
+        plies += 1
+
+    if verbose:
+        print(f"{name}: done in {time.time() - started:.1f}s", file=sys.stderr)
+    return values
+
+
+def _all_moves_lose(spec: TableSpec, values, squares: tuple) -> bool:
+    """
+    Checks that every move of the lone king leads to a position already known to be won
+    for the stronger side. Captures escape to a drawn ending.
+    """
+    occupied = _mask_of(squares)
+    has_move = False
+    for target, captured in _weak_king_moves(spec, squares, occupied):
+        if captured >= 0:
+            return False
+        value = _probe_values(spec, values, squares[:-1] + (target,), False)
+        if not 1 <= value < LOSS:
+            return False
+        has_move = True
+    return has_move
+
+
+def write_table(path: str, name: str, values: bytearray):
+    """
+    Writes a generated table with its header.
+    """
+    with open(path, 'wb') as table_file:
+        table_file.write(HEADER_STRUCT.pack(MAGIC, VERSION, len(TABLE_PIECES[name]) + 2,
+                                            name.encode('ascii'), len(values) // 2))
+        table_file.write(values)
+
+
+# --- Probing ---
+class Tablebases:
+    """
+    Memory-mapped access to the generated tables in a directory.
+    Tables are opened on first use; missing tables are simply not probed.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._tables = {} # Name -> (TableSpec, mmap) or None if unavailable
+        self.hits = 0
+
+    def _table(self, name: str):
+        if name not in self._tables:
+            table = None
+            path = os.path.join(self.directory, name + '.tb')
+            try:
+                with open(path, 'rb') as table_file:
+                    data = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, _, stored_name, entries = HEADER_STRUCT.unpack_from(data, 0)
+                spec = TableSpec(name)
+                if (magic == MAGIC and version == VERSION and stored_name.rstrip(b'\0') == name.encode('ascii')
+                        and entries == spec.size and len(data) == HEADER_STRUCT.size + 2 * entries):
+                    table = (spec, data)
+                else:
+                    data.close()
+                    print(f"Ignoring tablebase {path}: unexpected header or size")
+            except (OSError, ValueError):
+                pass # Not generated
+            self._tables[name] = table
+        return self._tables[name]
+
+    def available(self) -> list[str]:
+        """
+        Returns the names of the tables present in the directory.
+        """
+        return [name for name in TABLE_PIECES if self._table(name)]
+
+    def probe(self, board: list, turn: str) -> tuple[int, int] | None:
+        """
+        Looks up the position on `board` (ChessLogic.board layout) with `turn` to move.
+        Castling and en passant are never possible in these endings and are not considered.
+
+        Returns:
+            (outcome, plies) from the side to move's view, outcome being 1 (wins), 0 (draw)
+            or -1 (gets mated), or None if the material is not covered by an available table.
+        """
+        pieces = {'w': [], 'b': []}
+        for r in range(8):
+            for c in range(8):
+                piece = board[r][c]
+                if piece:
+                    pieces[piece[0]].append((piece[1], _square(r, c)))
+                    if len(pieces['w']) + len(pieces['b']) > 4:
+                        return None
+
+        strong = 'w' if len(pieces['w']) > 1 else 'b'
+        weak = 'b' if strong == 'w' else 'w'
+        if len(pieces[weak]) != 1 or len(pieces[strong]) < 2:
+            return None
+        strong_types = {piece_type: sq for piece_type, sq in pieces[strong]}
+        if len(strong_types) != len(pieces[strong]): # Two pieces of one kind, e.g. two knights
+            return None
+        name = 'K' + ''.join(t for t in 'QRBNP' if t in strong_types) + 'K'
+        if name not in TABLE_PIECES:
+            return None
+        table = self._table(name)
+        if not table:
+            return None
+        spec, data = table
+
+        # Tables assume White is the stronger side moving up the board; flip ranks for Black
+        flip = (lambda sq: sq) if strong == 'w' else (lambda sq: _square(7 - sq // 8, sq % 8))
+        squares = tuple(flip(strong_types[t]) for t in spec.types) + (flip(pieces[weak][0][1]),)
+        squares = spec.canonical(squares)
+        index = spec.index(squares) + (0 if turn == strong else spec.size)
+        value = data[HEADER_STRUCT.size + index]
+        if value == ILLEGAL:
+            return None
+        self.hits += 1
+        if value == DRAW:
+            return 0, 0
+        if value < LOSS:
+            return 1, value
+        return -1, value - LOSS
+
+    def close(self):
+        for table in self._tables.values():
+            if table:
+                table[1].close()
+        self._tables.clear()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases by retrograde analysis.")
+    parser.add_argument('tables', nargs='*', default=list(GENERATION_ORDER),
+                        help=f"Tables to generate, from {', '.join(GENERATION_ORDER)} (default: all)")
+    parser.add_argument('--dir', default=DEFAULT_DIRECTORY, help=f"Output directory (default: {DEFAULT_DIRECTORY})")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.tables if name not in TABLE_PIECES]
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(unknown)}")
+
+    os.makedirs(args.dir, exist_ok=True)
+    generated = {}
+    for name in GENERATION_ORDER:
+        path = os.path.join(args.dir, name + '.tb')
+        needed = name in args.tables or (name in ('KQK', 'KRK') and 'KPK' in args.tables)
+        if not needed:
+            continue
+        if name not in args.tables and os.path.exists(path):
+            with open(path, 'rb') as table_file:
+                generated[name] = bytearray(table_file.read()[HEADER_STRUCT.size:])
+            continue
+        generated[name] = generate_table(name, generated, verbose=True)
+        if name in args.tables:
+            write_table(path, name, generated[name])
+            print(f"Wrote {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
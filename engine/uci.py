@@ -0,0 +1,261 @@
+"""
+UCI (Universal Chess Interface) front end for ChessLogic.
+
+Run it with `python -m engine.uci` and connect any UCI GUI or match tool to its stdin/stdout.
+Supported commands: uci, isready, ucinewgame, setoption (Hash, Threads), position
+(startpos/fen ... moves ...), go (depth, nodes, movetime, wtime/btime/winc/binc/movestogo,
+infinite), stop and quit. The search runs on a background thread so that stop and isready
+are answered while it works. After each completed iteration it prints an info line with
+depth, score, nodes, nps, time and pv.
+"""
+import sys
+import threading
+
+from engine.logic import ChessLogic, EvalCache
+
+ENGINE_NAME = 'pn.py ChessLogic'
+ENGINE_AUTHOR = 'pn.py authors'
+EVAL_CACHE_ENTRY_BYTES = 17 # Key and score (8 bytes each) plus the filled flag
+DEFAULT_HASH_MB = 2 # Matches the default EvalCache size of 1 << 16 entries
+MAX_HASH_MB = 1024
+MOVE_OVERHEAD = 0.05 # Seconds kept in reserve per move for I/O and the GUI
+
+
+def square_name(position: tuple[int, int]) -> str:
+    return 'abcdefgh'[position[1]] + str(8 - position[0])
+
+
+def parse_square(name: str) -> tuple[int, int]:
+    if len(name) != 2 or name[0] not in 'abcdefgh' or name[1] not in '12345678':
+        raise ValueError(f"Invalid square '{name}'")
+    return 8 - int(name[1]), ord(name[0]) - ord('a')
+
+
+class UCIEngine:
+    """
+    Holds the position and options of one UCI session and runs its searches.
+    Output goes through `write`, so the session can be driven from tests or other processes.
+    """
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock() # Info lines come from the search thread
+        self.chess_logic = ChessLogic()
+        self.hash_mb = DEFAULT_HASH_MB
+        self.search_thread: threading.Thread | None = None
+        self.stop_event = threading.Event() # Set by stop; ends an infinite search
+
+    def write(self, line: str):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    # --- Command dispatch ---
+    def handle(self, line: str) -> bool:
+        """
+        Executes one command line. Returns False once the session should end.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == 'uci':
+            self.write(f"id name {ENGINE_NAME}")
+            self.write(f"id author {ENGINE_AUTHOR}")
+            self.write(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            # The search is a single Python thread; the option exists so tools that always send it are accepted
+            self.write("option name Threads type spin default 1 min 1 max 1")
+            self.write("uciok")
+        elif command == 'isready':
+            self.write("readyok")
+        elif command == 'ucinewgame':
+            self.stop_search()
+            self.chess_logic = self._new_logic()
+        elif command == 'setoption':
+            self.set_option(arguments)
+        elif command == 'position':
+            self.stop_search()
+            self.set_position(arguments)
+        elif command == 'go':
+            self.stop_search()
+            self.go(arguments)
+        elif command == 'stop':
+            self.stop_search()
+        elif command == 'quit':
+            self.stop_search()
+            return False
+        elif command not in ('debug', 'register', 'ponderhit'):
+            self.write(f"info string Unknown command: {command}")
+        return True
+
+    def _new_logic(self) -> ChessLogic:
+        chess_logic = ChessLogic()
+        entries = self.hash_mb * (1 << 20) // EVAL_CACHE_ENTRY_BYTES
+        chess_logic.eval_cache = EvalCache(1 << (entries.bit_length() - 1)) # Largest power of two that fits
+        return chess_logic
+
+    def set_option(self, arguments: list[str]):
+        """
+        Handles `setoption name <name> value <value>`.
+        """
+        text = ' '.join(arguments)
+        name, _, value = text.partition(' value ')
+        name = name.removeprefix('name ').strip().lower()
+        value = value.strip()
+        if name == 'hash':
+            try:
+                self.hash_mb = max(1, min(MAX_HASH_MB, int(value)))
+            except ValueError:
+                self.write(f"info string Invalid Hash value '{value}'")
+                return
+            self.stop_search()
+            self.chess_logic.eval_cache = self._new_logic().eval_cache
+        elif name == 'threads':
+            if value != '1':
+                self.write("info string Only one search thread is supported")
+        else:
+            self.write(f"info string Unknown option '{name}'")
+
+    def set_position(self, arguments: list[str]):
+        """
+        Handles `position startpos|fen <fen> [moves <move> ...]`.
+        Moves after the first illegal one are ignored.
+        """
+        if 'moves' in arguments:
+            split = arguments.index('moves')
+            setup, moves = arguments[:split], arguments[split + 1:]
+        else:
+            setup, moves = arguments, []
+        try:
+            if setup[:1] == ['startpos']:
+                self.chess_logic.set_fen(ChessLogic.STARTING_FEN)
+            elif setup[:1] == ['fen']:
+                self.chess_logic.set_fen(' '.join(setup[1:]))
+            else:
+                raise ValueError("expected 'startpos' or 'fen'")
+        except ValueError as e:
+            self.write(f"info string Invalid position: {e}")
+            return
+
+        for move in moves:
+            try:
+                start_pos, end_pos, promotion = self.parse_move(move)
+            except ValueError as e:
+                self.write(f"info string {e}")
+                return
+            self.chess_logic.make_move(start_pos, end_pos, promotion)
+
+    def parse_move(self, move: str) -> tuple[tuple[int, int], tuple[int, int], str]:
+        """
+        Converts a move in UCI notation (e2e4, e7e8q) to (start_pos, end_pos, promotion).
+
+        Raises:
+            ValueError: If the move is malformed or illegal in the current position.
+        """
+        try:
+            if len(move) not in (4, 5) or (len(move) == 5 and move[4] not in 'qrbn'):
+                raise ValueError
+            start_pos, end_pos = parse_square(move[:2]), parse_square(move[2:4])
+        except ValueError:
+            raise ValueError(f"Malformed move '{move}'") from None
+        if (start_pos, end_pos) not in self.chess_logic.generate_legal_moves():
+            raise ValueError(f"Illegal move '{move}'")
+        return start_pos, end_pos, move[4:].upper() or 'Q'
+
+    def format_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> str:
+        move = square_name(start_pos) + square_name(end_pos)
+        piece = self.chess_logic.get_piece(start_pos[0], start_pos[1])
+        if piece and piece[1] == 'P' and end_pos[0] in (0, 7):
+            move += 'q' # The search always promotes to a queen
+        return move
+
+    # --- Searching ---
+    def go(self, arguments: list[str]):
+        """
+        Handles `go` and starts the search thread. Without any limit the search is infinite.
+        """
+        options = {}
+        index = 0
+        while index < len(arguments):
+            key = arguments[index]
+            if key in ('infinite', 'ponder'):
+                options[key] = True
+                index += 1
+            elif key == 'searchmoves':
+                break # Restricting the root moves is not supported; search them all
+            else:
+                try:
+                    options[key] = int(arguments[index + 1])
+                except (IndexError, ValueError):
+                    self.write(f"info string Invalid value for '{key}'")
+                    return
+                index += 2
+
+        max_depth = options.get('depth', 64)
+        node_limit = options.get('nodes')
+        time_limit = options['movetime'] / 1000 if 'movetime' in options else None
+        clock_key, increment_key = ('wtime', 'winc') if self.chess_logic.current_turn == 'w' else ('btime', 'binc')
+        if clock_key in options and time_limit is None:
+            remaining = options[clock_key] / 1000
+            increment = options.get(increment_key, 0) / 1000
+            moves_to_go = options.get('movestogo', 30)
+            # Spend an even share of the remaining time plus most of the increment, never more than half the clock
+            time_limit = max(0.01, min(remaining / max(1, moves_to_go) + increment * 0.75, remaining / 2) - MOVE_OVERHEAD)
+        infinite = options.get('infinite', False) or not (set(options) & {'depth', 'nodes', 'movetime', clock_key})
+
+        self.stop_event.clear()
+        self.search_thread = threading.Thread(target=self._search, args=(max_depth, node_limit, time_limit, infinite),
+                                              daemon=True)
+        self.search_thread.start()
+
+    def _search(self, max_depth: int, node_limit: int | None, time_limit: float | None, infinite: bool):
+        chess_logic = self.chess_logic
+        if not chess_logic.generate_legal_moves():
+            self.write("bestmove 0000") # Mated or stalemated: there is no move to give
+            return
+        result = chess_logic.search(max_depth=max_depth, node_limit=node_limit, time_limit=time_limit,
+                                    info_callback=self._send_info)
+        if infinite:
+            self.stop_event.wait() # bestmove may only be sent after stop in infinite mode
+        self.write(f"bestmove {self.format_move(*result.best_move)}")
+
+    def _send_info(self, result):
+        self.write(f"info depth {result.depth} score {self.format_score(result.score, result.depth)} "
+                   f"nodes {result.nodes} nps {result.nps} time {int(result.elapsed * 1000)} "
+                   f"pv {self.format_move(*result.best_move)}")
+
+    def format_score(self, score: float, depth: int) -> str:
+        """
+        Formats a search score for an info line. Search scores carry no mate distance, but a mate is
+        first seen at the depth that reaches it, so that depth gives the distance. The search scores
+        a mate it finds inside the tree as ±inf, and one on the board at the horizon as
+        ±EVAL_MATE_SCORE from evaluate_board().
+        """
+        if score >= ChessLogic.EVAL_MATE_SCORE:
+            return f"mate {(depth + 1) // 2}"
+        if score <= -ChessLogic.EVAL_MATE_SCORE:
+            return f"mate -{max(1, depth // 2)}"
+        return f"cp {self.chess_logic.score_to_centipawns(score)}"
+
+    def stop_search(self):
+        """
+        Stops a running search and waits for its bestmove to be sent.
+        """
+        self.stop_event.set()
+        while self.search_thread and self.search_thread.is_alive():
+            # search() clears the flag when it starts, so keep raising it until the thread ends
+            self.chess_logic.stop_requested = True
+            self.search_thread.join(0.05)
+        self.search_thread = None
+
+
+def main() -> int:
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop_search()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
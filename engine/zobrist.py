@@ -0,0 +1,21 @@
+"""
+Zobrist keys for position hashing, taken from Polyglot's Random64 table.
+"""
+from engine.polyglot import (POLYGLOT_RANDOM_64, POLYGLOT_CASTLING_OFFSET, POLYGLOT_EN_PASSANT_OFFSET,
+                             POLYGLOT_TURN_OFFSET, piece_square_key)
+
+# --- Zobrist Hashing ---
+# Every piece/square pair, castling right, en passant file and the side to move gets a
+# random 64-bit key. XOR-ing the keys of a position gives a (practically) unique hash,
+# used for repetition detection. The keys are Polyglot's fixed Random64 table, so the
+# hash of a position is also its key in a Polyglot opening book.
+ZOBRIST_PIECE_KEYS = {
+    color + piece_type: [[piece_square_key(color + piece_type, r, c) for c in range(8)] for r in range(8)]
+    for color in 'wb' for piece_type in 'PNBRQK'
+}
+ZOBRIST_CASTLING_KEYS = {
+    (color, side): POLYGLOT_RANDOM_64[POLYGLOT_CASTLING_OFFSET + index]
+    for index, (color, side) in enumerate((('w', 'kingside'), ('w', 'queenside'), ('b', 'kingside'), ('b', 'queenside')))
+}
+ZOBRIST_EN_PASSANT_KEYS = list(POLYGLOT_RANDOM_64[POLYGLOT_EN_PASSANT_OFFSET:POLYGLOT_EN_PASSANT_OFFSET + 8]) # One key per file
+ZOBRIST_WHITE_TO_MOVE_KEY = POLYGLOT_RANDOM_64[POLYGLOT_TURN_OFFSET]
@@ -4,9 +4,12 @@
 𝝨 CHESS - A Python-based chess application
 """
 
+import startup_trace # First, so --startup-trace times everything after it
 import sys
 import os
-from src.chess.main import run_chess_game
+
+with startup_trace.phase('import src.chess'):
+    from src.chess.main import run_chess_game
 
 def main():
     """Main entry point for the chess application."""
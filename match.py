@@ -0,0 +1,353 @@
+"""
+Plays ChessLogic configurations against each other to measure their strength difference.
+
+Each engine is a search configuration: a difficulty name ('easy', 'hard', 'pro', looked up in
+ChessLogic.AI_DIFFICULTY_DEPTHS) and/or comma-separated limits such as 'depth=3,nodes=20000'.
+Every opening from the suite is played twice, once with each engine as White, and games run
+concurrently across a process pool. After every game a sequential probability ratio test
+(SPRT) checks whether engine A is at least elo1 stronger than B (H1) or at most elo0 (H0),
+so a clear result ends the match early. The final report shows the win/draw/loss count and
+an Elo estimate with a 95% error bar.
+
+Searches limited by depth or nodes are deterministic, so playing an opening more than twice
+would only repeat earlier games and feed the SPRT the same evidence again. Such matches are
+limited to two games per opening; use a larger suite, or a time limit, to play more.
+
+Usage:
+    python match.py hard easy [--nodes 5000 | --time 0.5] [--openings suite.epd|games.pgn]
+                    [--games 400] [--elo0 0 --elo1 50] [--workers 4] [--pgn games.pgn]
+"""
+import argparse
+import io
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from engine import ChessLogic
+from engine.pgn import read_games, parse_san, write_game
+
+# Short, balanced opening lines used when no suite is given
+DEFAULT_OPENINGS = (
+    'e4 e5 Nf3 Nc6 Bb5 a6',
+    'e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6',
+    'e4 e6 d4 d5 Nc3 Nf6',
+    'e4 c6 d4 d5 e5 Bf5',
+    'd4 d5 c4 e6 Nc3 Nf6',
+    'd4 Nf6 c4 g6 Nc3 Bg7',
+    'd4 Nf6 c4 e6 Nf3 b6',
+    'c4 e5 Nc3 Nf6 g3 d5',
+    'Nf3 d5 g3 Nf6 Bg2 c6',
+    'e4 d5 exd5 Qxd5 Nc3 Qa5',
+)
+MAX_PLIES = 400 # Games still running after this many plies are adjudicated as draws
+
+_worker_logic = None # One ChessLogic per worker process, reused for every game it plays
+
+
+class EngineConfig:
+    """
+    Search limits for one side of a match. Unset limits are not applied;
+    a configuration with none at all searches to depth 1.
+    """
+    __slots__ = ('name', 'max_depth', 'node_limit', 'time_limit')
+
+    def __init__(self, name: str, max_depth: int | None = None, node_limit: int | None = None,
+                 time_limit: float | None = None):
+        self.name = name
+        self.max_depth = max_depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+
+    @property
+    def deterministic(self) -> bool:
+        """
+        True if the search has no time limit, so it always plays the same move in the same position.
+        """
+        return self.time_limit is None
+
+    @classmethod
+    def parse(cls, spec: str, node_limit: int | None = None, time_limit: float | None = None) -> 'EngineConfig':
+        """
+        Parses an engine spec such as 'pro', 'depth=3' or 'hard,nodes=5000'.
+        `node_limit` and `time_limit` are the match-wide controls, which the spec may override.
+
+        Raises:
+            ValueError: If the spec names an unknown difficulty or option.
+        """
+        config = cls(spec, node_limit=node_limit, time_limit=time_limit)
+        for part in filter(None, spec.split(',')):
+            key, _, value = part.partition('=')
+            if not value:
+                if key not in ChessLogic.AI_DIFFICULTY_DEPTHS:
+                    raise ValueError(f"Unknown difficulty '{key}'; expected one of {', '.join(ChessLogic.AI_DIFFICULTY_DEPTHS)}")
+                config.max_depth = ChessLogic.AI_DIFFICULTY_DEPTHS[key]
+            elif key == 'depth':
+                config.max_depth = int(value)
+            elif key == 'nodes':
+                config.node_limit = int(value)
+            elif key == 'time':
+                config.time_limit = float(value)
+            else:
+                raise ValueError(f"Unknown engine option '{key}'")
+        if config.max_depth is None and config.node_limit is None and config.time_limit is None:
+            config.max_depth = 1
+        return config
+
+
+def load_openings(path: str | None, opening_plies: int = 8) -> list[tuple[str, list[str]]]:
+    """
+    Returns the opening suite as (start FEN, SAN moves) pairs: the first `opening_plies` moves
+    of each game of a PGN file, or the positions of an EPD/FEN file (one per line).
+    Without a path, DEFAULT_OPENINGS is used.
+    """
+    if path is None:
+        return [(ChessLogic.STARTING_FEN, line.split()) for line in DEFAULT_OPENINGS]
+    if path.lower().endswith('.pgn'):
+        return [(game.headers.get('FEN', ChessLogic.STARTING_FEN), game.moves[:opening_plies])
+                for game in read_games(path)]
+    openings = []
+    with open(path, encoding='utf-8') as suite:
+        for line in suite:
+            fields = line.split()
+            if len(fields) >= 4 and not line.startswith('#'):
+                openings.append((' '.join(fields[:4]), []))
+    return openings
+
+
+def _init_worker(tablebase_dir: str | None):
+    global _worker_logic
+    _worker_logic = ChessLogic()
+    if tablebase_dir:
+        _worker_logic.load_tablebases(tablebase_dir)
+
+
+def _game_over(chess_logic: ChessLogic) -> tuple[str, str] | None:
+    """
+    Returns (PGN result, reason) once the game has ended by rule, otherwise None.
+    """
+    if not chess_logic.generate_legal_moves():
+        if chess_logic.is_opponent_in_check(chess_logic.current_turn):
+            return ('0-1' if chess_logic.current_turn == 'w' else '1-0'), 'checkmate'
+        return '1/2-1/2', 'stalemate'
+    if chess_logic.is_fifty_move_draw():
+        return '1/2-1/2', 'fifty-move rule'
+    if chess_logic.is_repetition(3):
+        return '1/2-1/2', 'threefold repetition'
+    if chess_logic.is_insufficient_material():
+        return '1/2-1/2', 'insufficient material'
+    return None
+
+
+def play_game(task: tuple) -> dict:
+    """
+    Plays one game in a worker process and returns its result.
+    `task` is (game number, opening, white config, black config, whether engine A plays White, want PGN).
+    """
+    number, (start_fen, opening_moves), white, black, a_is_white, want_pgn = task
+    chess_logic = _worker_logic
+    chess_logic.set_fen(start_fen)
+    for san in opening_moves:
+        start_pos, end_pos, promotion = parse_san(chess_logic, san)
+        chess_logic.make_move(start_pos, end_pos, promotion or 'Q')
+
+    ending = _game_over(chess_logic)
+    while ending is None:
+        if len(chess_logic.move_history) >= MAX_PLIES:
+            ending = '1/2-1/2', 'adjudicated after the ply limit'
+            break
+        config = white if chess_logic.current_turn == 'w' else black
+        move = chess_logic.choose_tablebase_move()
+        if move is None:
+            result = chess_logic.search(max_depth=config.max_depth or 64, node_limit=config.node_limit,
+                                        time_limit=config.time_limit)
+            move = (*result.best_move, 'Q')
+        chess_logic.make_move(*move)
+        ending = _game_over(chess_logic)
+
+    result, reason = ending
+    white_score = {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+    output = {
+        'game': number,
+        'result': result,
+        'reason': reason,
+        'plies': len(chess_logic.move_history),
+        'score': white_score if a_is_white else 1.0 - white_score, # Engine A's point of view
+    }
+    if want_pgn:
+        stream = io.StringIO()
+        headers = {'Event': 'ChessLogic match', 'Round': str(number), 'White': white.name, 'Black': black.name,
+                   'Termination': reason}
+        write_game(stream, chess_logic, headers, result)
+        output['pgn'] = stream.getvalue()
+    return output
+
+
+def elo_to_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def _regularised(wins: int, draws: int, losses: int) -> tuple[float, float, float]:
+    """
+    Replaces zero counts by half a game, so a one-sided start (say 8 wins, no draws or losses)
+    still has a non-zero variance and the statistics below stay finite.
+    """
+    return wins or 0.5, draws or 0.5, losses or 0.5
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Log-likelihood ratio of H1 (Elo difference elo1) against H0 (elo0) for the given results,
+    using the normal approximation to the trinomial game outcome.
+    """
+    if not wins + draws + losses:
+        return 0.0
+    wins, draws, losses = _regularised(wins, draws, losses)
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - score * score
+    if variance <= 0:
+        return 0.0
+    score0, score1 = elo_to_score(elo0), elo_to_score(elo1)
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """
+    Returns the Elo difference implied by the results and the half-width of its 95% confidence interval.
+    """
+    wins, draws, losses = _regularised(wins, draws, losses)
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    deviation = math.sqrt(max(0.0, (wins + draws / 4) / games - score * score) / games)
+    low, high = score_to_elo(score - 1.96 * deviation), score_to_elo(score + 1.96 * deviation)
+    return score_to_elo(score), (high - low) / 2
+
+
+def run_match(engine_a: EngineConfig, engine_b: EngineConfig, openings: list[tuple[str, list[str]]],
+              max_games: int, elo0: float = 0.0, elo1: float = 50.0, alpha: float = 0.05, beta: float = 0.05,
+              workers: int | None = None, tablebase_dir: str | None = None, pgn_path: str | None = None) -> dict:
+    """
+    Plays up to `max_games` games between the two engines, stopping as soon as the SPRT accepts
+    H0 or H1, and returns the totals.
+
+    Raises:
+        ValueError: If both engines are deterministic and `max_games` exceeds two games per opening,
+            since the extra games would replay earlier ones move for move.
+    """
+    distinct_games = 2 * len(openings)
+    if max_games > distinct_games and engine_a.deterministic and engine_b.deterministic:
+        raise ValueError(f"{max_games} games requested, but without a time limit only {distinct_games} are distinct "
+                         f"({len(openings)} openings, two games each); the rest would repeat them move for move. "
+                         "Use a larger opening suite, fewer games or --time.")
+    workers = workers or os.cpu_count() or 1
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+    def tasks():
+        # Each opening twice in a row, with colours swapped, cycling through the suite
+        for number in range(max_games):
+            opening = openings[(number // 2) % len(openings)]
+            a_is_white = number % 2 == 0
+            white, black = (engine_a, engine_b) if a_is_white else (engine_b, engine_a)
+            yield number + 1, opening, white, black, a_is_white, pgn_path is not None
+
+    wins = draws = losses = 0
+    llr, verdict = 0.0, 'inconclusive'
+    started = time.perf_counter()
+    pgn_file = open(pgn_path, 'w', encoding='utf-8') if pgn_path else None
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tablebase_dir,))
+    try:
+        pending = set()
+        queue = tasks()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                task = next(queue, None)
+                if task is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(play_game, task))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                game = future.result()
+                if game['score'] == 1.0:
+                    wins += 1
+                elif game['score'] == 0.0:
+                    losses += 1
+                else:
+                    draws += 1
+                if pgn_file:
+                    pgn_file.write(game['pgn'])
+                    pgn_file.flush()
+            llr = sprt_llr(wins, draws, losses, elo0, elo1)
+            print(f"Games {wins + draws + losses}: +{wins} ={draws} -{losses}  LLR {llr:.2f} ({lower:.2f}, {upper:.2f})",
+                  file=sys.stderr)
+            if llr >= upper or llr <= lower:
+                verdict = 'H1 accepted' if llr >= upper else 'H0 accepted'
+                break
+    finally:
+        pool.shutdown(cancel_futures=True) # Games already running finish; their results are dropped
+        if pgn_file:
+            pgn_file.close()
+
+    return {'wins': wins, 'draws': draws, 'losses': losses, 'llr': llr, 'bounds': (lower, upper),
+            'verdict': verdict, 'seconds': time.perf_counter() - started}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Play two ChessLogic configurations against each other with SPRT.")
+    parser.add_argument('engine_a', help="Engine under test, e.g. 'pro' or 'depth=3,nodes=20000'")
+    parser.add_argument('engine_b', help="Baseline engine, in the same form")
+    limits = parser.add_mutually_exclusive_group()
+    limits.add_argument('--nodes', type=int, default=None, help="Node budget per move for both engines")
+    limits.add_argument('--time', type=float, default=None, help="Seconds per move for both engines")
+    parser.add_argument('--openings', default=None, help="EPD/FEN file or PGN file of opening lines")
+    parser.add_argument('--opening-plies', type=int, default=8, help="Plies taken from each PGN game")
+    parser.add_argument('--games', type=int, default=None,
+                        help="Maximum games (default: each opening twice; more only with a time limit)")
+    parser.add_argument('--elo0', type=float, default=0.0, help="Elo difference of the null hypothesis")
+    parser.add_argument('--elo1', type=float, default=50.0, help="Elo difference of the alternative hypothesis")
+    parser.add_argument('--alpha', type=float, default=0.05, help="False positive rate")
+    parser.add_argument('--beta', type=float, default=0.05, help="False negative rate")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--tablebases', default=None, help="Directory of generated endgame tablebases")
+    parser.add_argument('--pgn', default=None, help="Write the games to this PGN file")
+    args = parser.parse_args(argv)
+
+    try:
+        engine_a = EngineConfig.parse(args.engine_a, args.nodes, args.time)
+        engine_b = EngineConfig.parse(args.engine_b, args.nodes, args.time)
+    except ValueError as e:
+        parser.error(str(e))
+    openings = load_openings(args.openings, args.opening_plies)
+    if not openings:
+        parser.error("the opening suite is empty")
+
+    try:
+        totals = run_match(engine_a, engine_b, openings, args.games or 2 * len(openings), args.elo0, args.elo1,
+                           args.alpha, args.beta, args.workers, args.tablebases, args.pgn)
+    except ValueError as e:
+        parser.error(str(e))
+    wins, draws, losses = totals['wins'], totals['draws'], totals['losses']
+    games = wins + draws + losses
+    print(f"{engine_a.name} vs {engine_b.name}: {games} games, +{wins} ={draws} -{losses} "
+          f"(score {(wins + draws / 2) / games:.3f})" if games else "No games finished")
+    if games:
+        elo, margin = elo_estimate(wins, draws, losses)
+        print(f"Elo difference: {elo:+.1f} +/- {margin:.1f} (95%)")
+    lower, upper = totals['bounds']
+    print(f"SPRT elo0={args.elo0:g} elo1={args.elo1:g}: LLR {totals['llr']:.2f} ({lower:.2f}, {upper:.2f}), "
+          f"{totals['verdict']} in {totals['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
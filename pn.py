@@ -1,119 +1,57 @@
+import startup_trace # First, so --startup-trace times everything after it
 import sys
 import os
-import subprocess
+import json
 import time
 from datetime import datetime # Import datetime for the clock
 
-# Set a higher recursion limit for the AI's negamax algorithm
-# This is often necessary for recursive algorithms in Python to prevent RecursionError
-sys.setrecursionlimit(50000000) # Increased limit for deep recursion
-
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QGraphicsScene, QGraphicsView,
-                            QGraphicsPixmapItem, QGraphicsRectItem, QVBoxLayout, QWidget,
-                            QPushButton, QHBoxLayout, QGraphicsEllipseItem, QLabel,
-                            QMessageBox, QDialog, QGridLayout, QFrame, QSizePolicy, QGraphicsTextItem,
-                            QMenu, QColorDialog, QSlider, QAction) # Added QAction for menu items
-from PyQt5.QtGui import QPixmap, QColor, QBrush, QPainter, QIcon, QFont, QPen, QLinearGradient
-from PyQt5.QtCore import QRectF, Qt, QTimer, QPointF, QSize, QUrl, pyqtSlot
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent # Added QMediaPlayer, QMediaContent
-
-# Conditional import for QtWebEngineWidgets, as it might not be installed initially
-WEBENGINE_AVAILABLE = False
-try:
-    from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile
-    from PyQt5.QtWebChannel import QWebChannel # Explicitly import QWebChannel
-    WEBENGINE_AVAILABLE = True
-except ImportError:
-    print("PyQtWebEngine is not found. Homepage and custom HTML popup features will be disabled.")
-
-
-# --- Dependency Installation (Attempts to install missing modules) ---
-# It's generally better to manage dependencies via a requirements.txt file
-# and instruct the user to run 'pip install -r requirements.txt' manually.
-# However, if you absolutely need to attempt an automatic installation,
-# you can use the subprocess module. This might require administrative privileges
-# and can lead to unexpected behavior or environment issues.
-
-def install_module(module_name: str, package_name: str = None):
-    """
-    Installs a Python module using pip.
-    Args:
-        module_name (str): The name of the module to try importing (e.g., 'PyQt5', 'PyQt5.QtWebEngineWidgets').
-        package_name (str, optional): The name of the package to install via pip
-                                      if different from module_name (e.g., 'PyQtWebEngine' for 'PyQt5.QtWebEngineWidgets').
-                                      Defaults to module_name if not provided.
-    """
-    if package_name is None:
-        package_name = module_name
+# Optional Qt components (WebEngine, Multimedia) are probed and imported on first use,
+# see capabilities.py. Nothing is installed from here: missing packages are reported instead.
+import capabilities
 
+with startup_trace.phase('import PyQt5'):
     try:
-        __import__(module_name)
-        print(f"'{module_name}' is already installed.")
-        return True
+        from PyQt5.QtWidgets import (QApplication, QMainWindow, QGraphicsScene, QGraphicsView,
+                                    QGraphicsPixmapItem, QGraphicsRectItem, QVBoxLayout, QWidget,
+                                    QPushButton, QHBoxLayout, QGraphicsEllipseItem, QLabel,
+                                    QMessageBox, QDialog, QGridLayout, QFrame, QSizePolicy, QGraphicsTextItem,
+                                    QMenu, QColorDialog, QSlider, QAction) # Added QAction for menu items
+        from PyQt5.QtGui import QPixmap, QColor, QBrush, QPainter, QIcon, QFont, QPen, QLinearGradient
+        from PyQt5.QtCore import (QRectF, Qt, QTimer, QPointF, QSize, QUrl, QEvent, QObject, QRunnable,
+                                  QThreadPool, pyqtSignal, pyqtSlot)
+        from PyQt5 import sip
     except ImportError:
-        print(f"'{module_name}' not found. Attempting to install '{package_name}'...")
-        try:
-            # Use sys.executable to ensure pip is run for the current Python interpreter
-            # check=True will raise CalledProcessError if the command fails
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", package_name],
-                check=True,
-                capture_output=True, # Capture stdout and stderr
-                text=True # Decode output as text
-            )
-            print(f"Successfully installed '{package_name}':\n{result.stdout}")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"Error installing '{package_name}':\n{e.stderr}")
-            print(f"Command '{' '.join(e.cmd)}' returned non-zero exit status {e.returncode}.")
-            return False
-        except FileNotFoundError:
-            print(f"Error: '{sys.executable}' (Python interpreter) not found. Make sure Python is in your PATH.")
-            print(f"Please install '{package_name}' manually using: pip install {package_name}")
-            return False
-        except Exception as e:
-            print(f"An unexpected error occurred during installation of '{package_name}': {e}")
-            print(f"Please install '{package_name}' manually using: pip install {package_name}")
-            return False
-
-# List of essential modules and their corresponding package names if different
-required_modules = [
-    ("PyQt5", "PyQt5"),
-    ("PyQt5.QtWebEngineWidgets", "PyQtWebEngine"), # This is for the homepage and custom popup
-    ("PyQt5.QtMultimedia", "PyQt5-QtMultimedia") # For sound playback
-]
-
-temp_webengine_available_check = True
-for module, package in required_modules:
-    if not install_module(module, package):
-        temp_webengine_available_check = False
-        # If PyQtWebEngine fails to install, explicitly set WEBENGINE_AVAILABLE to False
-        if module == "PyQt5.QtWebEngineWidgets":
-            WEBENGINE_AVAILABLE = False
-
-if not temp_webengine_available_check:
-    print("\nWarning: Some dependencies could not be installed automatically.")
-    print("The application may run with limited features (e.g., no interactive homepage).")
-    # If PyQt5 itself failed, we should exit.
-    if not install_module("PyQt5", "PyQt5"): # Re-check PyQt5 specifically
-        print("Fatal: PyQt5 is not installed. Exiting application.")
+        print("Fatal: PyQt5 is not installed. Install the dependencies with: pip install -r requirements.txt")
         sys.exit(1)
-else:
-    # If all installations were attempted and succeeded, and initial import worked, then set True
-    WEBENGINE_AVAILABLE = True
+
+with startup_trace.phase('import engine'):
+    from engine import ChessLogic
+
+# Piece icon sizes (logical pixels) outside the board; see PiecePixmapCache
+CAPTURED_ICON_SIZE = 24
+PROMOTION_ICON_SIZE = 32
+MIN_SQUARE_SIZE = 40 # The board follows the size of its view, but never gets smaller than this
+BOARD_RESIZE_DELAY_MS = 50 # Resize events closer together than this are handled once
+
+# Move sound: a WAV file is preferred (it is played from memory with low latency), MP3 also works
+MOVE_SOUND_FILES = ("move_sound.wav", "move_sound.mp3")
+MOVE_SOUND_VOICES = 3 # How many plays of the move sound may overlap
+MOVE_SOUND_PRELOAD_DELAY_MS = 300 # The sound is loaded this long after startup, once the window is up
+
+# Startup greeting timing: shown for GREETING_DURATION_MS, the last GREETING_FADE_MS of which fade it out
+GREETING_DURATION_MS = 3800
+GREETING_FADE_MS = 500
 
 
 # --- Helper Functions (can be moved to a separate file for larger projects) ---
 def download_image_if_not_exists(filename, subdirectory="."):
     """
     Checks if an image exists locally.
-    Creates the subdirectory if it doesn't exist.
     Returns the local path to the image, or None if it doesn't exist.
+    A lookup only checks the file: missing directories are not created.
     """
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    target_dir = os.path.join(base_dir, subdirectory)
-    os.makedirs(target_dir, exist_ok=True)
-    local_path = os.path.join(target_dir, filename)
+    local_path = os.path.join(base_dir, subdirectory, filename)
 
     if os.path.exists(local_path):
         return local_path
@@ -132,1200 +70,239 @@ def get_local_file_url(filename, subdirectory="."):
     return QUrl.fromLocalFile(local_path)
 
 
-# --- Chess Game Logic Class ---
-class ChessLogic:
+PIECE_CODES = ('wK', 'wQ', 'wR', 'wB', 'wN', 'wP', 'bK', 'bQ', 'bR', 'bB', 'bN', 'bP')
+
+
+def load_piece_set(piece_set: str) -> dict:
     """
-    Manages the core chess game logic, including board state, piece movements,
-    check/checkmate/stalemate detection, and AI decision-making.
+    Reads the images of a piece set and returns {piece code: QPixmap} for the pieces it has.
+
+    A piece set is either a sprite sheet described by the manifest `<piece_set>.json`, or a
+    directory `<piece_set>/` holding one `<piece code>.png` per piece. A manifest looks like
+
+        {"image": "pieces.png", "tile_size": 80,
+         "rows": [["wK", "wQ", ...], ["bK", "bQ", ...]]}
+
+    where `rows` names the piece in each tile of the sheet, row by row. The sheet is decoded once
+    and sliced into one pixmap per piece. A directory is listed once instead of being probed file
+    by file.
     """
-    def __init__(self):
-        """
-        Initializes the chess board and game state variables.
-        """
-        self.board = self.create_initial_board()
-        self.current_turn = 'w'  # White starts first
-        self.game_over = False
-        self.winner: str | None = None
-        # move_history stores detailed info for undo functionality and AI simulation
-        # Format: (start_pos, end_pos, moved_piece, captured_piece, promoted_to, castling_info, en_passant_target)
-        self.move_history = []
-        self.redo_history = [] # New: Stores undone moves for redo functionality
-        self.captured_pieces = {'w': [], 'b': []}
-        self.kings_moved = {'w': False, 'b': False} # Tracks if king has moved for castling
-        self.rooks_moved = { # Tracks if rooks have moved for castling
-            'w': {'kingside': False, 'queenside': False},
-            'b': {'kingside': False, 'queenside': False}
-        }
-        self.en_passant_target = None # Stores (row, col) of square behind pawn that just double-moved
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    manifest_path = os.path.join(base_dir, f"{piece_set}.json")
+    pixmaps = {}
+    try:
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        manifest = None
+    except (OSError, ValueError) as e:
+        print(f"Could not read piece set manifest {manifest_path}: {e}")
+        return pixmaps
+
+    if manifest is not None:
+        try:
+            sheet = QPixmap(os.path.join(base_dir, manifest['image']))
+            tile_size = int(manifest['tile_size'])
+            rows = manifest['rows']
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Invalid piece set manifest {manifest_path}: missing or bad {e}")
+            return pixmaps
+        if sheet.isNull():
+            print(f"Could not load the sprite sheet of piece set {piece_set}.")
+            return pixmaps
+        for row, piece_codes in enumerate(rows):
+            for col, piece_code in enumerate(piece_codes):
+                if piece_code in PIECE_CODES:
+                    pixmaps[piece_code] = sheet.copy(col * tile_size, row * tile_size, tile_size, tile_size)
+        return pixmaps
+
+    piece_dir = os.path.join(base_dir, piece_set)
+    try:
+        with os.scandir(piece_dir) as entries:
+            file_names = {entry.name for entry in entries}
+    except OSError:
+        return pixmaps # No such piece set
+    for piece_code in PIECE_CODES:
+        if f"{piece_code}.png" in file_names:
+            pixmap = QPixmap(os.path.join(piece_dir, f"{piece_code}.png"))
+            if not pixmap.isNull():
+                pixmaps[piece_code] = pixmap
+    return pixmaps
+
+
+class PiecePixmapCache:
+    """
+    Decoded and scaled piece images, shared by the board, the captured-piece strip and the
+    pawn promotion dialog.
 
-        # Piece values for AI evaluation (standard values, multiplied for integer arithmetic)
-        self.piece_values = {
-            'P': 1000, 'N': 30000, 'B': 30000, 'R': 50001, 'Q': 900001, 'K': 900000,
-            'p': -1000, 'n': -30000, 'b': -30000, 'r': -50001, 'q': -900001, 'k': -900000
-        }
-        # Positional piece values (example, can be expanded for more sophisticated AI)
-        # These tables penalize pawns on the back rank, encourage knights in center, etc.
-        self.pawn_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [50, 50, 50, 50, 50, 50, 50, 50],
-            [10, 10, 20, 30, 30, 20, 10, 10],
-            [5,  5, 10, 25, 25, 10,  5,  5],
-            [0,  0,  0, 20, 20,  0,  0,  0],
-            [5, -5,-10,  0,  0,-10, -5,  5],
-            [5, 10, 10,-20,-20, 10, 10,  5],
-            [0,  0,  0,  0,  0,  0,  0,  0]
-        ]
-        self.knight_table = [
-            [-50,-40,-30,-30,-30,-30,-40,-50],
-            [-40,-20,  0,  0,  0,  0,-20,-40],
-            [-30,  0, 10, 15, 15, 10,  0,-30],
-            [-30,  5, 15, 20, 20, 15,  5,-30],
-            [-30,  0, 15, 20, 20, 15,  0,-30],
-            [-30,  5, 10, 15, 15, 10,  5,-30],
-            [-40,-20,  0,  5,  5,  0,-20,-40],
-            [-50,-40,-30,-30,-30,-30,-40,-50]
-        ]
-        self.bishop_table = [
-            [-20,-10,-10,-10,-10,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0,  5, 10, 10,  5,  0,-10],
-            [-10,  5,  5, 10, 10,  5,  5,-10],
-            [-10,  0, 10, 10, 10, 10,  0,-10],
-            [-10, 10, 10, 10, 10, 10, 10,-10],
-            [-10,  5,  0,  0,  0,  0,  5,-10],
-            [-20,-10,-10,-10,-10,-10,-10,-20]
-        ]
-        self.rook_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [5, 10, 10, 10, 10, 10, 10,  5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [0,  0,  0,  5,  5,  0,  0,  0]
-        ]
-        self.queen_table = [
-            [-20,-10,-10, -5, -5,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0,  5,  5,  5,  5,  0,-10],
-            [-5,  0,  5,  5,  5,  5,  0, -5],
-            [0,  0,  5,  5,  5,  5,  0, -5],
-            [-10,  5,  5,  5,  5,  5,  0,-10],
-            [-10,  0,  5,  0,  0,  0,  0,-10],
-            [-20,-10,-10, -5, -5,-10,-10,-20]
-        ]
-        self.king_table_midgame = [
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-20,-30,-30,-40,-40,-30,-30,-20],
-            [-10,-20,-20,-20,-20,-20,-20,-10],
-            [20, 20,  0,  0,  0,  0, 20, 20],
-            [20, 30, 10,  0,  0, 10, 30, 20]
-        ]
-        self.king_table_endgame = [
-            [-50,-40,-30,-20,-20,-30,-40,-50],
-            [-30,-20,-10,  0,  0,-10,-20,-30],
-            [-30,-10, 20, 30, 30, 20,-10,-30],
-            [-30,-10, 30, 40, 40, 30,-10,-30],
-            [-30,-10, 30, 40, 40, 30,-10,-30],
-            [-30,-10, 20, 30, 30, 20,-10,-30],
-            [-30,-30,  0,  0,  0,  0,-30,-30],
-            [-50,-30,-30,-30,-30,-30,-30,-50]
-        ]
-
-        self.ai_difficulty = 'easy' # New: AI difficulty setting
-
-    def create_initial_board(self) -> list[list[str | None]]:
-        """
-        Creates the standard 8x8 chess board and places pieces in their
-        initial starting positions.
-        """
-        board: list[list[str | None]] = [[None for _ in range(8)] for _ in range(8)]
-
-        # White pieces (row 6 and 7)
-        board[7] = ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR']
-        board[6] = ['wP'] * 8
-
-        # Black pieces (row 0 and 1)
-        board[0] = ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR']
-        board[1] = ['bP'] * 8
-
-        return board
-
-    def get_piece(self, row: int, col: int) -> str | None:
-        """
-        Returns the piece string ('wP', 'bK', etc.) at the specified board position.
-        Returns None if the position is out of bounds or empty.
-        """
-        if 0 <= row < 8 and 0 <= col < 8:
-            return self.board[row][col]
-        return None
+    Each piece set is read from disk once, see load_piece_set(). Each scaled copy is made once per
+    (piece set, piece code, size, device pixel ratio), so redrawing the board only looks up
+    pixmaps. Scaled copies are made at the device resolution and tagged with the ratio, so they
+    stay sharp on HiDPI screens while keeping their logical size.
+    """
+    def __init__(self):
+        self._sets = {} # Piece set -> {piece code: QPixmap} of the pieces it has
+        self._set_images = {} # Piece set -> {piece code: QImage}, the sources for background scaling
+        self._scaled = {} # (piece set, piece code, size, device pixel ratio) -> QPixmap
+        self._jobs = set() # Background scaling jobs still running
 
-    def place_piece(self, row: int, col: int, piece: str | None):
+    def source(self, piece_set: str, piece_code: str) -> QPixmap | None:
         """
-        Places a piece (or None to clear) at the specified board position.
+        Returns the unscaled image of a piece, loading its set on first use, or None if it is missing.
         """
-        if 0 <= row < 8 and 0 <= col < 8:
-            self.board[row][col] = piece
+        if piece_set not in self._sets:
+            self._sets[piece_set] = load_piece_set(piece_set)
+        return self._sets[piece_set].get(piece_code)
 
-    def find_king(self, color: str) -> tuple[int, int] | None:
+    def pixmap(self, piece_set: str, piece_code: str, size: int, device_pixel_ratio: float = 1.0) -> QPixmap | None:
         """
-        Finds and returns the (row, col) position of the king of the specified color.
-        Returns None if the king is not found (should not happen in a valid game).
+        Returns the piece image scaled to fit a size x size square (in logical pixels),
+        or None if the image is missing.
         """
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece and piece[0] == color and piece[1] == 'K':
-                    return (r, c)
-        return None
-
-    def is_square_attacked(self, king_color: str, square_pos: tuple[int, int]) -> bool:
-        """
-        Checks if a given square is attacked by any of the opponent's pieces.
-        This is crucial for king safety, castling, and check detection.
-        """
-        opponent_color = 'b' if king_color == 'w' else 'w'
-        target_row, target_col = square_pos
-
-        # Iterate through all squares on the board
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                # If it's an opponent's piece
-                if piece and piece[0] == opponent_color:
-                    # Temporarily change current_turn to check opponent's moves
-                    # This is important because highlight_moves uses current_turn
-                    original_turn = self.current_turn
-                    self.current_turn = opponent_color
-
-                    # Get moves for the opponent's piece without checking for king safety
-                    # because we are checking if a square is attacked, not if the move is legal for the opponent.
-                    moves = self.highlight_moves((r, c), check_for_check=False)
-                    self.current_turn = original_turn # Revert turn immediately
-
-                    # If the target square is in the opponent's possible moves, it's attacked
-                    if square_pos in moves:
-                        return True
-        return False
-
-    def is_opponent_in_check(self, color: str) -> bool:
-        """
-        Checks if the king of the specified color is currently in check.
-        This is done by checking if the king's current square is attacked by the opponent.
-        """
-        king_pos = self.find_king(color)
-        if not king_pos:
-            return False # Should not happen in a normal game
-
-        # Check if the king's square is attacked by the opponent's pieces
-        return self.is_square_attacked(color, king_pos)
-
-    def is_checkmate(self, color: str) -> bool:
-        """
-        Determines if the player of the given color is in checkmate.
-        A player is in checkmate if their king is in check AND they have no legal moves
-        to get out of check.
-        """
-        # First, check if the king is actually in check
-        if not self.is_opponent_in_check(color):
-            return False # Not in check, so cannot be checkmate
-
-        # Iterate through all pieces of the current player
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece and piece[0] == color:
-                    # Get all legal moves for this piece.
-                    # highlight_moves with check_for_check=True already filters out moves
-                    # that would leave the king in check.
-                    valid_moves = self.highlight_moves((r, c), check_for_check=True)
-                    if valid_moves:
-                        return False # Found at least one legal move, so not checkmate
-
-        # No legal moves found for any piece, and king is in check, so it's checkmate
-        return True
+        key = (piece_set, piece_code, size, device_pixel_ratio)
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            source = self.source(piece_set, piece_code)
+            if source is None:
+                return None
+            device_size = round(size * device_pixel_ratio)
+            scaled = source.scaled(device_size, device_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            scaled.setDevicePixelRatio(device_pixel_ratio)
+            self._scaled[key] = scaled
+        return scaled
 
-    def is_stalemate(self, color: str) -> bool:
+    def has_size(self, piece_set: str, size: int, device_pixel_ratio: float) -> bool:
         """
-        Determines if the player of the given color is in stalemate.
-        A player is in stalemate if their king is NOT in check AND they have no legal moves.
+        Returns whether every piece of a set is already scaled to `size`.
         """
-        # First, check if the king is NOT in check
-        if self.is_opponent_in_check(color):
-            return False # In check, so cannot be stalemate (could be checkmate)
+        self.source(piece_set, PIECE_CODES[0]) # Make sure the set is loaded
+        return all((piece_set, piece_code, size, device_pixel_ratio) in self._scaled
+                   for piece_code in self._sets[piece_set])
 
-        # Iterate through all pieces of the current player
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece and piece[0] == color:
-                    # Get all legal moves for this piece.
-                    # highlight_moves with check_for_check=True filters out moves
-                    # that would put the king in check.
-                    valid_moves = self.highlight_moves((r, c), check_for_check=True)
-                    if valid_moves:
-                        return False # Found at least one legal move, so not stalemate
-
-        # No legal moves found for any piece, and king is not in check, so it's stalemate
-        return True
-
-    def highlight_moves(self, selected_pos: tuple[int, int], check_for_check: bool = True) -> list[tuple[int, int]]:
+    def scale_in_background(self, piece_set: str, size: int, device_pixel_ratio: float, on_ready):
+        """
+        Scales every piece of a set to `size` on a QThreadPool worker, so the GUI thread does not
+        stall. Once done, the copies are stored on the GUI thread and on_ready() is called.
         """
-        Calculates and returns a list of valid (row, col) positions a piece at `selected_pos`
-        can move to.
+        if piece_set not in self._set_images:
+            self.source(piece_set, PIECE_CODES[0]) # Make sure the set is loaded
+            # QPixmap may only be used on the GUI thread, QImage on any thread
+            self._set_images[piece_set] = {piece_code: pixmap.toImage()
+                                           for piece_code, pixmap in self._sets[piece_set].items()}
+        job = PieceScaleJob(self._set_images[piece_set], round(size * device_pixel_ratio))
 
-        Args:
-            selected_pos (tuple[int, int]): The (row, col) of the piece to move.
-            check_for_check (bool): If True, filters out moves that would leave the king in check.
-                                    Set to False for internal checks (e.g., is_square_attacked).
+        def store(scaled_images: dict):
+            self._jobs.discard(job)
+            if self._set_images.get(piece_set) is job.images: # Unless the set was invalidated meanwhile
+                for piece_code, image in scaled_images.items():
+                    scaled = QPixmap.fromImage(image)
+                    scaled.setDevicePixelRatio(device_pixel_ratio)
+                    self._scaled[(piece_set, piece_code, size, device_pixel_ratio)] = scaled
+            on_ready()
 
-        Returns:
-            list[tuple[int, int]]: A list of valid destination (row, col) tuples.
-        """
-        row, col = selected_pos
-        piece = self.get_piece(row, col)
-        if piece is None:
-            return []
-
-        piece_color = piece[0]  # 'w' for white, 'b' for black
-        valid_moves = []
-
-        # Dispatch to specific piece movement logic
-        if piece[1] == 'P':
-            valid_moves = self.highlight_pawn_moves(row, col, piece_color)
-        elif piece[1] == 'R':
-            valid_moves = self.highlight_rook_moves(row, col, piece_color)
-        elif piece[1] == 'N':
-            valid_moves = self.highlight_knight_moves(row, col, piece_color)
-        elif piece[1] == 'B':
-            valid_moves = self.highlight_bishop_moves(row, col, piece_color)
-        elif piece[1] == 'Q':
-            valid_moves = self.highlight_queen_moves(row, col, piece_color)
-        elif piece[1] == 'K':
-            valid_moves = self.highlight_king_moves(row, col, piece_color)
-
-        # Filter out moves that would put the king in check (if check_for_check is True)
-        if check_for_check:
-            legal_moves = []
-            for move in valid_moves:
-                # Simulate the move to check for king safety
-                temp_board = [row[:] for row in self.board] # Create a deep copy of the board
-
-                # Perform the simulated move
-                dest_row, dest_col = move
-                # Store info about captured piece for undoing during simulation
-                original_piece_at_dest = temp_board[dest_row][dest_col]
-                temp_board[dest_row][dest_col] = temp_board[row][col] # Move piece
-                temp_board[row][col] = None # Clear original square
-
-                # Special handling for en passant capture during simulation
-                is_en_passant_sim = False
-                captured_ep_pawn_sim = None
-                if piece[1] == 'P' and move == self.en_passant_target:
-                    # En passant captures the pawn behind the target square
-                    # Use `selected_pos` for pawn's original row
-                    captured_pawn_row = selected_pos[0]
-                    captured_pawn_col = move[1] # End column is the captured pawn's column
-                    captured_ep_pawn_sim = temp_board[captured_pawn_row][captured_pawn_col]
-                    temp_board[captured_pawn_row][captured_pawn_col] = None
-                    is_en_passant_sim = True
-
-                # Special handling for castling during simulation
-                if piece[1] == 'K' and abs(col - dest_col) == 2:
-                    king_row = row
-                    if dest_col > col: # Kingside castling
-                        rook_start_col = 7
-                        rook_end_col = dest_col - 1
-                    else: # Queenside castling
-                        rook_start_col = 0
-                        rook_end_col = dest_col + 1
-                    rook_piece_sim = temp_board[king_row][rook_start_col]
-                    temp_board[king_row][rook_end_col] = rook_piece_sim
-                    temp_board[king_row][rook_start_col] = None
-
-
-                # Temporarily swap the board to the simulated state for check detection
-                original_board = self.board
-                self.board = temp_board
-
-                # Check if the king is in check after the simulated move
-                king_in_check_after_move = self.is_opponent_in_check(piece_color) # Check if *own* king is in check
-
-                # Revert the board to its original state
-                self.board = original_board
-
-                # Revert the temporary changes made for this simulation for king/rook moved flags
-                # This is crucial because `is_square_attacked` relies on a clean state for opponent moves.
-                # If these flags were changed *during* a simulation in is_square_attacked, it might affect subsequent `highlight_moves` calls.
-                # However, the logic in _update_game_state_after_move (which is called by negamax) already handles this for the main simulation.
-                # The `is_square_attacked` function itself does NOT modify `kings_moved` or `rooks_moved`, so no explicit revert needed here.
-
-
-                # If the king is not in check after the move, it's a legal move
-                if not king_in_check_after_move:
-                    legal_moves.append(move)
-
-            return legal_moves
-
-        return valid_moves
-
-    def highlight_pawn_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a pawn at (row, col) of a given color.
-        Includes single/double moves, captures, and en passant.
-        """
-        valid_moves = []
-        direction = -1 if color == 'w' else 1  # White pawns move up (-1 row), black pawns move down (+1 row)
-        start_row = 6 if color == 'w' else 1  # Starting row for pawns to allow double move
-
-        # 1. Normal move (1 square forward)
-        target_row_1 = row + direction
-        if 0 <= target_row_1 < 8 and self.get_piece(target_row_1, col) is None:
-            valid_moves.append((target_row_1, col))
-
-            # 2. Double move from starting position
-            target_row_2 = row + 2 * direction
-            if row == start_row and self.get_piece(target_row_2, col) is None:
-                valid_moves.append((target_row_2, col))
-
-        # 3. Capture moves (diagonally)
-        for dc in [-1, 1]: # Check left and right diagonals
-            target_row_cap = row + direction
-            target_col_cap = col + dc
-            if 0 <= target_row_cap < 8 and 0 <= target_col_cap < 8:
-                piece_to_capture = self.get_piece(target_row_cap, target_col_cap)
-                if piece_to_capture and piece_to_capture[0] != color:
-                    valid_moves.append((target_row_cap, target_col_cap))
-
-        # 4. En Passant
-        # Check if there's an en passant target square set from the opponent's last move
-        if self.en_passant_target:
-            ep_row, ep_col = self.en_passant_target
-            # An en passant capture is only valid if the pawn is on the 5th rank (for white) or 4th rank (for black)
-            # and the target square is diagonally adjacent to the pawn's current position.
-            if (color == 'w' and row == 3 and ep_row == 2 and abs(col - ep_col) == 1) or \
-               (color == 'b' and row == 4 and ep_row == 5 and abs(col - ep_col) == 1):
-                valid_moves.append(self.en_passant_target)
-
-        return valid_moves
-
-    def highlight_rook_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a rook at (row, col) of a given color.
-        Rooks move horizontally and vertically any number of squares.
-        """
-        valid_moves = []
-
-        # Define directions: up, down, left, right
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            r, c = row, col
-            while True:
-                r += dr
-                c += dc
-                # Check if the new position is within board bounds
-                if not (0 <= r < 8 and 0 <= c < 8):
-                    break # Out of bounds, stop in this direction
-
-                piece = self.get_piece(r, c)
-                if piece is None:
-                    valid_moves.append((r, c)) # Empty square, can move here
-                elif piece[0] != color:
-                    valid_moves.append((r, c)) # Opponent's piece, can capture and stop
-                    break
-                else:
-                    break # Own piece, cannot move through or capture, stop
-        return valid_moves
-
-    def highlight_knight_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a knight at (row, col) of a given color.
-        Knights move in an 'L' shape.
-        """
-        valid_moves = []
-        # All 8 possible 'L' shaped moves for a knight
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        for dr, dc in knight_moves:
-            r, c = row + dr, col + dc
-            # Check if the new position is within board bounds
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.get_piece(r, c)
-                # Can move if square is empty or contains an opponent's piece
-                if piece is None or piece[0] != color:
-                    valid_moves.append((r, c))
-        return valid_moves
-
-    def highlight_bishop_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a bishop at (row, col) of a given color.
-        Bishops move diagonally any number of squares.
-        """
-        valid_moves = []
-
-        # Define diagonal directions: up-left, up-right, down-left, down-right
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = row, col
-            while True:
-                r += dr
-                c += dc
-                # Check if the new position is within board bounds
-                if not (0 <= r < 8 and 0 <= c < 8):
-                    break # Out of bounds, stop in this direction
-
-                piece = self.get_piece(r, c)
-                if piece is None:
-                    valid_moves.append((r, c)) # Empty square, can move here
-                elif piece[0] != color:
-                    valid_moves.append((r, c)) # Opponent's piece, can capture and stop
-                    break
-                else:
-                    break # Own piece, cannot move through or capture, stop
-        return valid_moves
-
-    def highlight_queen_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a queen at (row, col) of a given color.
-        Queens combine the moves of a rook and a bishop.
-        """
-        # Queen moves are simply the union of rook moves and bishop moves
-        return self.highlight_rook_moves(row, col, color) + self.highlight_bishop_moves(row, col, color)
-
-    def highlight_king_moves(self, row: int, col: int, color: str) -> list[tuple[int, int]]:
-        """
-        Calculates valid moves for a king at (row, col) of a given color.
-        Kings move one square in any direction, and can castle.
-        """
-        valid_moves = []
-
-        # King moves one square in any of the 8 directions
-        for dr, dc in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
-            r, c = row + dr, col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.get_piece(r, c)
-                if piece is None or piece[0] != color:
-                    valid_moves.append((r, c))
-
-        # Castling logic
-        # Castling is only possible if:
-        # 1. The king has not moved.
-        # 2. The relevant rook has not moved.
-        # 3. There are no pieces between the king and the rook.
-        # 4. The king is not currently in check.
-        # 5. The king does not pass through or land on a square attacked by an opponent's piece.
-        if not self.kings_moved[color]:
-            king_row = 7 if color == 'w' else 0
-
-            # Kingside castling (short castling)
-            # King moves from e1/e8 to g1/g8, Rook moves from h1/h8 to f1/f8
-            if not self.rooks_moved[color]['kingside']:
-                # Check if squares f1/f8 and g1/g8 are empty
-                if self.get_piece(king_row, 5) is None and self.get_piece(king_row, 6) is None:
-                    # Check if king is not in check, and does not pass through or land on attacked squares
-                    if not self.is_square_attacked(color, (king_row, 4)) and \
-                       not self.is_square_attacked(color, (king_row, 5)) and \
-                       not self.is_square_attacked(color, (king_row, 6)):
-                        valid_moves.append((king_row, 6))  # Add the kingside castling move (king's destination)
-
-            # Queenside castling (long castling)
-            # King moves from e1/e8 to c1/c8, Rook moves from a1/a8 to d1/d8
-            if not self.rooks_moved[color]['queenside']:
-                # Check if squares b1/b8, c1/c8, and d1/d8 are empty
-                if self.get_piece(king_row, 1) is None and \
-                   self.get_piece(king_row, 2) is None and \
-                   self.get_piece(king_row, 3) is None:
-                    # Check if king is not in check, and does not pass through or land on attacked squares
-                    if not self.is_square_attacked(color, (king_row, 4)) and \
-                       not self.is_square_attacked(color, (king_row, 3)) and \
-                       not self.is_square_attacked(color, (king_row, 2)):
-                        valid_moves.append((king_row, 2))  # Add the queenside castling move (king's destination)
-
-        return valid_moves
-
-    def is_valid_move(self, selected_piece: str, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> bool:
-        """
-        Checks if a move from start_pos to end_pos is valid for the selected piece.
-        This method is largely redundant if highlight_moves is used correctly,
-        but kept for clarity or specific validation needs.
-        """
-        if selected_piece is None:
-            return False
-
-        row, col = start_pos
-        valid_moves = self.highlight_moves((row, col))
-        return end_pos in valid_moves
+        job.signals.finished.connect(store)
+        self._jobs.add(job) # Keeps the signals object alive until the result is delivered
+        QThreadPool.globalInstance().start(job)
 
-    def handle_pawn_promotion(self, row: int, col: int) -> bool:
+    def invalidate(self, piece_set: str | None = None):
         """
-        Checks if a pawn has reached the opposite end of the board,
-        triggering a promotion.
+        Drops the cached images of one piece set, or of all sets, so they are read again from disk.
         """
-        piece = self.get_piece(row, col)
-        if piece and piece[1] == 'P':
-            # White pawn promotes on row 0, Black pawn promotes on row 7
-            if (piece[0] == 'w' and row == 0) or (piece[0] == 'b' and row == 7):
-                return True
-        return False
+        if piece_set is None:
+            self._sets.clear()
+            self._set_images.clear()
+            self._scaled.clear()
+            return
+        self._sets.pop(piece_set, None)
+        self._set_images.pop(piece_set, None)
+        self._scaled = {key: value for key, value in self._scaled.items() if key[0] != piece_set}
 
-    def promote_pawn(self, row: int, col: int, new_piece_type: str) -> bool:
+    def discard_sizes_except(self, sizes: set[int]):
         """
-        Promotes a pawn at (row, col) to the specified new piece type (e.g., 'Q', 'R', 'B', 'N').
+        Drops scaled copies of every size not in `sizes`, e.g. after the board was resized.
         """
-        piece = self.get_piece(row, col)
-        if piece and piece[1] == 'P':
-            color = piece[0]
-            self.place_piece(row, col, color + new_piece_type)
-            return True
-        return False
+        self._scaled = {key: value for key, value in self._scaled.items() if key[2] in sizes}
 
-    def evaluate_board(self) -> int:
-        """
-        Evaluates the current board position from the perspective of the current player.
-        Positive values favor the current player.
-        This evaluation function combines material advantage with basic positional considerations.
-        """
-        score = 0
-        current_player_color = self.current_turn
 
-        # Iterate through all squares to sum up piece values and positional scores
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece:
-                    piece_type = piece[1]
-                    piece_color = piece[0]
-                    value = self.piece_values.get(piece_type, 0)
-
-                    # Add positional score based on piece type and its position
-                    positional_value = 0
-                    # Adjust row for black pieces to mirror the table for white
-                    # For white, row r is used directly. For black, 7-r is used.
-                    # This ensures the tables are applied correctly from each player's perspective.
-                    table_row = r if piece_color == 'w' else 7 - r
-
-                    if piece_type == 'P':
-                        positional_value = self.pawn_table[table_row][c]
-                    elif piece_type == 'N':
-                        positional_value = self.knight_table[table_row][c]
-                    elif piece_type == 'B':
-                        positional_value = self.bishop_table[table_row][c]
-                    elif piece_type == 'R':
-                        positional_value = self.rook_table[table_row][c]
-                    elif piece_type == 'Q':
-                        positional_value = self.queen_table[table_row][c]
-                    elif piece_type == 'K':
-                        # Use different king tables for midgame and endgame
-                        total_pieces = sum(1 for row_pieces in self.board for p in row_pieces if p is not None)
-                        if total_pieces < 10: # Arbitrary threshold for endgame
-                            positional_value = self.king_table_endgame[table_row][c]
-                        else:
-                            positional_value = self.king_table_midgame[table_row][c]
-
-                    # Adjust score based on color (positive for current player, negative for opponent)
-                    if piece_color == current_player_color:
-                        score += value + positional_value
-                    else:
-                        score -= (value + positional_value)
-
-        # Add bonus for having more captured opponent pieces (material advantage)
-        # This part needs careful adjustment for negamax.
-        # The evaluation should always be from the perspective of the 'current_turn' player.
-        # So, if current_turn is 'w', we want to maximize white's score.
-        # If current_turn is 'b', we want to maximize black's score.
-        if current_player_color == 'w':
-            score += len(self.captured_pieces['w']) * 50 # White captured black pieces
-            score -= len(self.captured_pieces['b']) * 50 # Black captured white pieces
-        else: # current_player_color == 'b'
-            score += len(self.captured_pieces['b']) * 50 # Black captured white pieces
-            score -= len(self.captured_pieces['w']) * 50 # White captured white pieces
-
-
-        # Check for checkmate/stalemate (terminal states)
-        # These scores are from the perspective of the player whose turn it is.
-        if self.is_checkmate(current_player_color):
-            return -99999999 # Current player is checkmated, very bad score
-        if self.is_stalemate(current_player_color):
-            return 0 # Draw
-        
-        # If the opponent is checkmated, it's a win for the current player
-        opponent_color = 'w' if current_player_color == 'b' else 'b'
-        if self.is_checkmate(opponent_color):
-            return 99999999 # Opponent is checkmated, very good score
-
-        return score
-
-    def negamax(self, depth: int, alpha: float, beta: float) -> float:
-        """
-        Negamax algorithm with Alpha-Beta Pruning to find the best move.
-        The evaluation is always from the perspective of the current player.
+class PieceScaleSignals(QObject):
+    finished = pyqtSignal(object) # {piece code: scaled QImage}
 
-        Args:
-            depth (int): The current depth of the search.
-            alpha (float): Alpha value for Alpha-Beta Pruning.
-            beta (float): Beta value for Beta-Beta Pruning.
 
-        Returns:
-            float: The evaluated score of the current board state.
-        """
-        # Base case: if depth is 0 or game is over, return the board evaluation
-        if depth == 0 or self.game_over:
-            return self.evaluate_board()
-
-        # Check for terminal states at current depth (important for pruning)
-        # These checks are from the perspective of the player whose turn it is.
-        if self.is_checkmate(self.current_turn):
-            return -float('inf') # Current player is checkmated
-        if self.is_stalemate(self.current_turn):
-            return 0 # Draw
-
-        max_eval = -float('inf')
-
-        # Store original game state to revert after simulation
-        original_board = [row[:] for row in self.board]
-        original_kings_moved = self.kings_moved.copy()
-        original_rooks_moved = {c: r.copy() for c, r in self.rooks_moved.items()}
-        original_en_passant_target = self.en_passant_target
-        original_captured_pieces = {c: p[:] for c, p in self.captured_pieces.items()} # Deep copy captured pieces
-        original_current_turn = self.current_turn
-
-        # Generate all legal moves for the current player
-        all_legal_moves = []
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece and piece[0] == self.current_turn:
-                    valid_moves = self.highlight_moves((r, c), check_for_check=True)
-                    for move in valid_moves:
-                        all_legal_moves.append(((r, c), move))
-
-        # Move Ordering: Prioritize captures
-        # A simple heuristic: moves that result in a capture are generally better.
-        # Assign a score to each move: higher for captures.
-        def move_score(move):
-            start_pos, end_pos = move
-            captured_piece = self.get_piece(end_pos[0], end_pos[1])
-            if captured_piece:
-                # Return the value of the captured piece for ordering
-                return self.piece_values.get(captured_piece[1], 0)
-            return 0 # No capture
-
-        # Sort moves in descending order of their score (captures first)
-        all_legal_moves.sort(key=move_score, reverse=True)
-
-
-        for start_pos, end_pos in all_legal_moves:
-            # Simulate the move
-            moved_piece = self.get_piece(start_pos[0], start_pos[1])
-            captured_piece_at_end_pos = self.get_piece(end_pos[0], end_pos[1]) # Piece at destination before move
-
-            is_en_passant = False
-            captured_ep_pawn = None
-            # Check for en passant capture during simulation
-            if moved_piece and moved_piece[1] == 'P' and end_pos == self.en_passant_target:
-                captured_pawn_row = start_pos[0]
-                captured_pawn_col = end_pos[1]
-                captured_ep_pawn = self.get_piece(captured_pawn_row, captured_pawn_col)
-                self.place_piece(captured_pawn_row, captured_pawn_col, None) # Remove captured pawn
-                is_en_passant = True
-                # Add captured pawn to captured_pieces for correct evaluation
-                if captured_ep_pawn:
-                    self.captured_pieces[moved_piece[0]].append(captured_ep_pawn)
-            elif captured_piece_at_end_pos:
-                # Add captured piece to captured_pieces for correct evaluation
-                self.captured_pieces[moved_piece[0]].append(captured_piece_at_end_pos)
-
-
-            # Make the move on the board
-            self.place_piece(end_pos[0], end_pos[1], moved_piece)
-            self.place_piece(start_pos[0], start_pos[1], None)
-
-            # Handle castling during simulation
-            if moved_piece[1] == 'K' and abs(start_pos[1] - end_pos[1]) == 2:
-                # Kingside castling
-                if end_pos[1] > start_pos[1]:
-                    rook_start_col = 7
-                    rook_end_col = end_pos[1] - 1
-                # Queenside castling
-                else:
-                    rook_start_col = 0
-                    rook_end_col = end_pos[1] + 1
-                rook_piece = self.get_piece(start_pos[0], rook_start_col)
-                self.place_piece(start_pos[0], rook_end_col, rook_piece)
-                self.place_piece(start_pos[0], rook_start_col, None)
-
-            # Handle pawn promotion during simulation (always to Queen for simplicity in AI)
-            if moved_piece[1] == 'P' and end_pos[0] == (0 if moved_piece[0] == 'w' else 7):
-                self.place_piece(end_pos[0], end_pos[1], moved_piece[0] + 'Q')
-
-            # Update game state for castling and en passant target
-            self._update_game_state_after_move(start_pos, end_pos, moved_piece, is_simulation=True)
-
-            # Switch turn for recursive call
-            self.current_turn = 'b' if self.current_turn == 'w' else 'w'
-
-            # Recursively call negamax for the opponent (negating the result)
-            eval = -self.negamax(depth - 1, -beta, -alpha)
-            max_eval = max(max_eval, eval)
-            alpha = max(alpha, eval) # Update alpha
-
-            # Undo the move to restore board state for next sibling move
-            self._undo_simulated_move(start_pos, end_pos, moved_piece, captured_piece_at_end_pos, is_en_passant, captured_ep_pawn, original_kings_moved, original_rooks_moved, original_en_passant_target)
-            # Restore captured pieces list for the next iteration
-            self.captured_pieces = {c: p[:] for c, p in original_captured_pieces.items()}
-            self.current_turn = original_current_turn # Restore turn
-
-            # Alpha-Beta Pruning
-            if beta <= alpha:
-                break # Beta cut-off
-
-        return max_eval
-
-    def _update_game_state_after_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int], moved_piece: str, is_simulation: bool = False):
-        """
-        Helper to update game state variables like kings_moved, rooks_moved,
-        and en_passant_target after a move.
-        """
-        piece_color = moved_piece[0]
-        piece_type = moved_piece[1]
-
-        # Update king/rook moved status for castling
-        if piece_type == 'K':
-            self.kings_moved[piece_color] = True
-        elif piece_type == 'R':
-            # Check if the rook is on its original square before updating
-            if piece_color == 'w':
-                if start_pos == (7, 0): self.rooks_moved['w']['queenside'] = True
-                if start_pos == (7, 7): self.rooks_moved['w']['kingside'] = True
-            elif piece_color == 'b':
-                if start_pos == (0, 0): self.rooks_moved['b']['queenside'] = True
-                if start_pos == (0, 7): self.rooks_moved['b']['kingside'] = True
-
-        # Update en passant target square
-        self.en_passant_target = None # Reset for the next turn
-        if piece_type == 'P' and abs(start_pos[0] - end_pos[0]) == 2:
-            # If a pawn moved two squares, set en passant target
-            ep_row = (start_pos[0] + end_pos[0]) // 2
-            self.en_passant_target = (ep_row, start_pos[1])
-
-        # If this is a real move (not simulation), update turn
-        # This part is handled by the negamax function itself by switching self.current_turn
-        # before the recursive call and reverting it after.
-        # So, this `if not is_simulation` block is not needed here for negamax.
-        pass
-
-
-    def _undo_simulated_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int], moved_piece: str, captured_piece_at_end_pos: str | None, is_en_passant: bool, captured_ep_pawn: str | None, original_kings_moved: dict, original_rooks_moved: dict, original_en_passant_target: tuple[int, int] | None):
-        """
-        Helper to undo a simulated move, restoring the board and game state variables.
-        This is crucial for the negamax algorithm.
-        """
-        # Revert piece movement
-        self.place_piece(start_pos[0], start_pos[1], moved_piece)
-        self.place_piece(end_pos[0], end_pos[1], captured_piece_at_end_pos)
-
-        # Revert en passant capture if it happened
-        if is_en_passant and captured_ep_pawn:
-            captured_pawn_row = start_pos[0] # Pawn was on the same row as the capturing pawn
-            captured_pawn_col = end_pos[1] # Pawn was on the same column as the captured square
-            self.place_piece(captured_pawn_row, captured_pawn_col, captured_ep_pawn)
-
-        # Revert castling during simulation
-        if moved_piece[1] == 'K' and abs(start_pos[1] - end_pos[1]) == 2:
-            # Determine if kingside or queenside castling
-            if end_pos[1] > start_pos[1]: # Kingside
-                rook_start_col = 7
-                rook_end_col = end_pos[1] - 1
-            else: # Queenside
-                rook_start_col = 0
-                rook_end_col = end_pos[1] + 1
-            # Move rook back to its original position
-            rook_piece = self.get_piece(start_pos[0], rook_end_col) # Get the rook from its moved position
-            self.place_piece(start_pos[0], rook_start_col, rook_piece)
-            self.place_piece(start_pos[0], rook_end_col, None) # Clear the square it moved to
-
-        # Revert pawn promotion during simulation
-        if moved_piece[1] == 'P' and end_pos[0] == (0 if moved_piece[0] == 'w' else 7):
-            self.place_piece(end_pos[0], end_pos[1], moved_piece[0] + 'P') # Revert to pawn
-
-        # Restore original game state variables
-        self.kings_moved = original_kings_moved.copy()
-        self.rooks_moved = {c: r.copy() for c, r in original_rooks_moved.items()}
-        self.en_passant_target = original_en_passant_target
-
-
-    def make_ai_move(self) -> bool:
-        """
-        Determines and executes the best move for the AI (Black) using the Negamax algorithm.
-        The search depth is determined by the `ai_difficulty` setting.
-        """
-        # Determine search depth based on AI difficulty
-        depth = 1 # Easy
-        if self.ai_difficulty == 'hard':
-            depth = 2
-        elif self.ai_difficulty == 'pro':
-            depth = 2 # Pro: More computationally intensive, adjust as needed for performance
-
-        best_move = None
-        max_eval = -float('inf')
-
-        # Initialize alpha-beta for the root node
-        alpha = -float('inf')
-        beta = float('inf')
-
-        # Store original game state before starting the search
-        original_board_state = [row[:] for row in self.board]
-        original_kings_moved_state = self.kings_moved.copy()
-        original_rooks_moved_state = {c: r.copy() for c, r in self.rooks_moved.items()}
-        original_en_passant_target_state = self.en_passant_target
-        original_captured_pieces_state = {c: p[:] for c, p in self.captured_pieces.items()} # Deep copy captured pieces
-        original_current_turn_state = self.current_turn # This will be 'b' for AI's turn
-
-        all_ai_moves = []
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r, c)
-                if piece and piece[0] == original_current_turn_state: # Consider only AI's pieces
-                    valid_moves = self.highlight_moves((r, c), check_for_check=True) # Get legal moves
-                    for move in valid_moves:
-                        all_ai_moves.append(((r, c), move))
-
-        # Move Ordering for the root node: Prioritize captures
-        def root_move_score(move):
-            start_pos, end_pos = move
-            captured_piece = self.get_piece(end_pos[0], end_pos[1])
-            if captured_piece:
-                return self.piece_values.get(captured_piece[1], 0)
-            return 0
-
-        all_ai_moves.sort(key=root_move_score, reverse=True)
-
-        for start_pos, end_pos in all_ai_moves:
-            # Simulate the move
-            moved_piece = self.get_piece(start_pos[0], start_pos[1])
-            captured_piece_at_end_pos = self.get_piece(end_pos[0], end_pos[1]) # Piece at destination before move
-
-            is_en_passant_capture = False
-            captured_ep_pawn = None
-            # Check for en passant capture during simulation
-            if moved_piece and moved_piece[1] == 'P' and end_pos == original_en_passant_target_state:
-                captured_pawn_row = start_pos[0]
-                captured_pawn_col = end_pos[1]
-                captured_ep_pawn = self.get_piece(captured_pawn_row, captured_pawn_col)
-                self.place_piece(captured_pawn_row, captured_pawn_col, None) # Remove captured pawn
-                is_en_passant_capture = True
-                # Add captured pawn to captured_pieces for correct evaluation
-                if captured_ep_pawn:
-                    self.captured_pieces[moved_piece[0]].append(captured_ep_pawn)
-            elif captured_piece_at_end_pos:
-                # Add captured piece to captured_pieces for correct evaluation
-                self.captured_pieces[moved_piece[0]].append(captured_piece_at_end_pos)
-
-            self.place_piece(end_pos[0], end_pos[1], moved_piece)
-            self.place_piece(start_pos[0], start_pos[1], None)
-
-            # Handle castling during simulation
-            if moved_piece[1] == 'K' and abs(start_pos[1] - end_pos[1]) == 2:
-                # Kingside castling
-                if end_pos[1] > start_pos[1]:
-                    rook_start_col = 7
-                    rook_end_col = end_pos[1] - 1
-                # Queenside castling
-                else:
-                    rook_start_col = 0
-                    rook_end_col = end_pos[1] + 1
-                rook_piece = self.get_piece(start_pos[0], rook_start_col)
-                self.place_piece(start_pos[0], rook_end_col, rook_piece)
-                self.place_piece(start_pos[0], rook_start_col, None)
-
-            # Handle pawn promotion during simulation (always to Queen for simplicity in AI)
-            if moved_piece[1] == 'P' and end_pos[0] == (0 if moved_piece[0] == 'w' else 7):
-                self.place_piece(end_pos[0], end_pos[1], moved_piece[0] + 'Q')
-
-            # Update game state for castling and en passant target
-            self._update_game_state_after_move(start_pos, end_pos, moved_piece, is_simulation=True)
-
-            # Switch turn for recursive call
-            self.current_turn = 'b' if self.current_turn == 'w' else 'w'
-
-            # Evaluate the board after this move (recursive call to negamax)
-            # The eval is negated because it's from the opponent's perspective
-            eval = -self.negamax(depth - 1, -beta, -alpha)
-
-            # If this move leads to a better evaluation for AI, update best_move
-            if eval > max_eval:
-                max_eval = eval
-                best_move = (start_pos, end_pos)
-
-            # Update alpha for alpha-beta pruning at the root
-            alpha = max(alpha, eval)
-
-            # Undo the simulated move to restore the board for the next iteration
-            self._undo_simulated_move(start_pos, end_pos, moved_piece, captured_piece_at_end_pos, is_en_passant_capture, captured_ep_pawn, original_kings_moved_state, original_rooks_moved_state, original_en_passant_target_state)
-            # Restore captured piece list for the next iteration of the root search
-            self.captured_pieces = {c: p[:] for c, p in original_captured_pieces_state.items()}
-            self.current_turn = original_current_turn_state # Restore turn for next root iteration
-
-            # Alpha-Beta Pruning at the root level
-            if beta <= alpha:
-                break # Prune remaining moves at this level
-
-        # After finding the best move, execute it on the actual board
-        if best_move:
-            start_pos, end_pos = best_move
-            piece = self.get_piece(start_pos[0], start_pos[1])
-            if not piece: # Should not happen if best_move is valid
-                return False
-
-            # Store move for undo (full details for the actual game history)
-            move_info = {
-                'start_pos': start_pos,
-                'end_pos': end_pos,
-                'moved_piece': piece,
-                'captured_piece': self.get_piece(end_pos[0], end_pos[1]), # Piece at end_pos before move
-                'promoted_to': None,
-                'castling_info': None,
-                'en_passant_target_before_move': self.en_passant_target # Store for undo
-            }
-
-            # Handle capture (including en passant)
-            target_piece = self.get_piece(end_pos[0], end_pos[1])
-            if target_piece:
-                self.captured_pieces['b'].append(target_piece)
-
-            # Handle en passant capture for the actual move
-            is_en_passant_actual = False
-            if piece[1] == 'P' and end_pos == self.en_passant_target:
-                captured_pawn_row = start_pos[0]
-                captured_pawn_col = end_pos[1]
-                captured_piece_ep = self.get_piece(captured_pawn_row, captured_pawn_col)
-                if captured_piece_ep:
-                    self.captured_pieces['b'].append(captured_piece_ep)
-                    self.place_piece(captured_pawn_row, captured_pawn_col, None) # Remove captured pawn
-                    is_en_passant_actual = True
-
-            move_info['is_en_passant_capture'] = is_en_passant_actual
-
-            # Handle king and rook movement for castling
-            if piece[1] == 'K':
-                self.kings_moved[piece[0]] = True
-                if abs(start_pos[1] - end_pos[1]) == 2: # Castling
-                    if end_pos[1] > start_pos[1]: # Kingside castling
-                        rook = self.get_piece(start_pos[0], 7)
-                        self.place_piece(start_pos[0], end_pos[1] - 1, rook) # Move rook
-                        self.place_piece(start_pos[0], 7, None) # Clear old rook square
-                        move_info['castling_info'] = {'rook_start': (start_pos[0], 7), 'rook_end': (start_pos[0], end_pos[1] - 1), 'rook_piece': rook}
-                    else: # Queenside castling
-                        rook = self.get_piece(start_pos[0], 0)
-                        self.place_piece(start_pos[0], end_pos[1] + 1, rook) # Move rook
-                        self.place_piece(start_pos[0], 0, None) # Clear old rook square
-                        move_info['castling_info'] = {'rook_start': (start_pos[0], 0), 'rook_end': (start_pos[0], end_pos[1] + 1), 'rook_piece': rook}
-            elif piece[1] == 'R':
-                color = piece[0]
-                if start_pos[0] == (7 if color == 'w' else 0):
-                    if start_pos[1] == 0:  # Queenside rook
-                        self.rooks_moved[color]['queenside'] = True
-                    elif start_pos[1] == 7:  # Kingside rook
-                        self.rooks_moved[color]['kingside'] = True
-
-            # Make the actual piece move on the board
-            self.place_piece(end_pos[0], end_pos[1], piece)
-            self.place_piece(start_pos[0], start_pos[1], None)
-
-            # Check for pawn promotion (AI always promotes to Queen)
-            if piece[1] == 'P' and end_pos[0] == (7 if piece[0] == 'b' else 0): # Black pawn promotes at row 7, White at row 0
-                self.promote_pawn(end_pos[0], end_pos[1], 'Q')  # Always promote to queen for AI
-                move_info['promoted_to'] = 'Q'
-
-            # Update en passant target for the next turn
-            self.en_passant_target = None
-            if piece[1] == 'P' and abs(start_pos[0] - end_pos[0]) == 2:
-                ep_row = (start_pos[0] + end_pos[0]) // 2
-                self.en_passant_target = (ep_row, start_pos[1])
-
-            self.move_history.append(move_info)
-            self.redo_history.clear() # Clear redo history when a new move is made
-            return True
-        return False
-
-    def undo_last_move(self) -> bool:
-        """
-        Undoes the last move made by either player.
-        Restores board state, captured pieces, and special move flags.
-        """
-        if not self.move_history:
-            return False # No moves to undo
-
-        last_move = self.move_history.pop()
-        start_pos = last_move['start_pos']
-        end_pos = last_move['end_pos']
-        moved_piece = last_move['moved_piece']
-        captured_piece_at_end_pos = last_move['captured_piece'] # Piece that was at end_pos before move
-        promoted_to = last_move['promoted_to']
-        castling_info = last_move['castling_info']
-        is_en_passant_capture = last_move.get('is_en_passant_capture', False)
-        original_en_passant_target_before_move = last_move.get('en_passant_target_before_move')
-
-        # Revert piece movement
-        self.place_piece(start_pos[0], start_pos[1], moved_piece)
-        self.place_piece(end_pos[0], end_pos[1], captured_piece_at_end_pos)
-
-        # Revert captured piece list
-        if captured_piece_at_end_pos:
-            capturing_color = moved_piece[0]
-            # Only remove if it was an actual capture and the last one added by this color
-            # For en passant, the captured piece is added to the capturing player's list.
-            # For regular capture, it's also added to the capturing player's list.
-            # So, we need to remove it from the capturing player's list.
-            if self.captured_pieces[capturing_color] and captured_piece_at_end_pos in self.captured_pieces[capturing_color]:
-                self.captured_pieces[capturing_color].remove(captured_piece_at_end_pos)
-
-
-        # Revert en passant capture
-        if is_en_passant_capture:
-            # The captured pawn was not at end_pos, but one square behind it
-            captured_pawn_row = start_pos[0]
-            captured_pawn_col = end_pos[1]
-            # The captured piece was the last one added to the capturing player's list
-            # We already handled removing it from captured_pieces above.
-            # Now, place it back on the board.
-            # The `captured_piece_at_end_pos` for en passant is the actual pawn that was captured.
-            self.place_piece(captured_pawn_row, captured_pawn_col, captured_piece_at_end_pos)
-
-
-        # Revert pawn promotion
-        if promoted_to:
-            # If a pawn was promoted, revert it back to a pawn at its original square
-            self.place_piece(end_pos[0], end_pos[1], moved_piece[0] + 'P')
-            # The piece at start_pos was the original pawn, ensure it's there
-            # But it ensures the original pawn is correctly placed back.
-            self.place_piece(start_pos[0], start_pos[1], moved_piece)
-
-
-        # Revert castling
-        if castling_info:
-            rook_start = castling_info['rook_start']
-            rook_end = castling_info['rook_end']
-            rook_piece = castling_info['rook_piece']
-            self.place_piece(rook_start[0], rook_start[1], rook_piece) # Move rook back
-            self.place_piece(rook_end[0], rook_end[1], None) # Clear rook's moved square
-
-            # Reset kings_moved and rooks_moved for castling
-            self.kings_moved[moved_piece[0]] = False
-            # Determine if it was kingside or queenside castling to reset rook_moved flag
-            if rook_start[1] == 7: # Kingside rook
-                self.rooks_moved[moved_piece[0]]['kingside'] = False
-            elif rook_start[1] == 0: # Queenside rook
-                self.rooks_moved[moved_piece[0]]['queenside'] = False
-        else:
-            # If not castling, check if king/rook moved and revert their moved status
-            # This is a simplification. A more robust solution would check if the king/rook
-            # moved *again* later in history. For now, we just revert the flag if this was
-            # the move that set it.
-            if moved_piece[1] == 'K':
-                # Only revert if the king was on its original square before this move
-                # and this move was the one that set kings_moved to True.
-                # This is hard to track with just the last move.
-                # A simpler approach for undo is to just reset the flag.
-                self.kings_moved[moved_piece[0]] = False
-            elif moved_piece[1] == 'R':
-                color = moved_piece[0]
-                if start_pos[0] == (7 if color == 'w' else 0):
-                    if start_pos[1] == 0:  # Queenside rook
-                        self.rooks_moved[color]['queenside'] = True
-                    elif start_pos[1] == 7:  # Kingside rook
-                        self.rooks_moved[color]['kingside'] = True
-
-        # Restore the en passant target from before the move
-        self.en_passant_target = original_en_passant_target_before_move
-
-        # Change turn back
-        self.current_turn = 'b' if self.current_turn == 'w' else 'w'
-        self.game_over = False # If game was over, it's not anymore
-        self.winner = None
-        self.redo_history.append(last_move) # Store the undone move for redo
-        return True
+class PieceScaleJob(QRunnable):
+    """
+    Scales the images of a piece set on a QThreadPool worker, see PiecePixmapCache.scale_in_background.
+    """
+    def __init__(self, images: dict, device_size: int):
+        super().__init__()
+        self.images = images
+        self.device_size = device_size
+        self.signals = PieceScaleSignals() # Created on the GUI thread, so the result is delivered there
+
+    def run(self):
+        scaled_images = {piece_code: image.scaled(self.device_size, self.device_size,
+                                                  Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                         for piece_code, image in self.images.items()}
+        self.signals.finished.emit(scaled_images)
+
+
+piece_pixmap_cache = PiecePixmapCache() # Shared by all windows and dialogs
 
-    def redo_last_move(self) -> bool:
-        """
-        Redoes the last undone move.
-        Restores board state, captured pieces, and special move flags.
-        """
-        if not self.redo_history:
-            return False # No moves to redo
-
-        redone_move = self.redo_history.pop()
-        start_pos = redone_move['start_pos']
-        end_pos = redone_move['end_pos']
-        moved_piece = redone_move['moved_piece']
-        captured_piece_at_end_pos = redone_move['captured_piece']
-        promoted_to = redone_move['promoted_to']
-        castling_info = redone_move['castling_info']
-        is_en_passant_capture = redone_move.get('is_en_passant_capture', False)
-        original_en_passant_target_before_move = redone_move.get('en_passant_target_before_move')
-
-        # Re-apply piece movement
-        self.place_piece(end_pos[0], end_pos[1], moved_piece)
-        self.place_piece(start_pos[0], start_pos[1], None)
-
-        # Re-add captured piece to list
-        if captured_piece_at_end_pos:
-            capturing_color = moved_piece[0]
-            self.captured_pieces[capturing_color].append(captured_piece_at_end_pos)
-
-        # Re-apply en passant capture
-        if is_en_passant_capture:
-            captured_pawn_row = start_pos[0]
-            captured_pawn_col = end_pos[1]
-            self.place_piece(captured_pawn_row, captured_pawn_col, None) # Remove the captured pawn again
-
-        # Re-apply pawn promotion
-        if promoted_to:
-            self.place_piece(end_pos[0], end_pos[1], moved_piece[0] + promoted_to)
-
-        # Re-apply castling
-        if castling_info:
-            rook_start = castling_info['rook_start']
-            rook_end = castling_info['rook_end']
-            rook_piece = castling_info['rook_piece']
-            self.place_piece(rook_end[0], rook_end[1], rook_piece) # Move rook back to its new position
-            self.place_piece(rook_start[0], rook_start[1], None) # Clear old rook square
-
-            # Re-set kings_moved and rooks_moved for castling
-            self.kings_moved[moved_piece[0]] = True
-            if rook_start[1] == 7: # Kingside rook
-                self.rooks_moved[moved_piece[0]]['kingside'] = True
-            elif rook_start[1] == 0: # Queenside rook
-                self.rooks_moved[moved_piece[0]]['queenside'] = True
-        else:
-            # Re-set king/rook moved flags if this move was their first
-            if moved_piece[1] == 'K':
-                self.kings_moved[moved_piece[0]] = True
-            elif moved_piece[1] == 'R':
-                color = moved_piece[0]
-                if start_pos[0] == (7 if color == 'w' else 0):
-                    if start_pos[1] == 0:  # Queenside rook
-                        self.rooks_moved[color]['queenside'] = True
-                    elif start_pos[1] == 7:  # Kingside rook
-                        self.rooks_moved[color]['kingside'] = True
-
-        # Restore the en passant target for the next turn (this is tricky, needs to be the target *after* this move)
-        # For redo, the en_passant_target should be set based on the move that was just redone.
-        # If the redone move was a double pawn push, set the target. Otherwise, clear it.
-        self.en_passant_target = None
-        if moved_piece[1] == 'P' and abs(start_pos[0] - end_pos[0]) == 2:
-            ep_row = (start_pos[0] + end_pos[0]) // 2
-            self.en_passant_target = (ep_row, start_pos[1])
-
-        self.move_history.append(redone_move) # Add back to move history
-        self.current_turn = 'b' if self.current_turn == 'w' else 'w' # Change turn back
-        self.game_over = False
-        self.winner = None
-        return True
+
+class SoundEffectPool:
+    """
+    A short sound that is loaded once and then played from memory, with a few plays allowed
+    to overlap, e.g. for moves made in quick succession.
+
+    WAV files are played with QSoundEffect, which keeps the decoded samples in memory and starts
+    playing with low latency. QSoundEffect cannot play compressed formats such as MP3; for those
+    each voice is a QMediaPlayer that opens the file once and is rewound for every play, instead
+    of loading the media again each time.
+
+    Only create it once capabilities.ensure('multimedia') has succeeded.
+    """
+    def __init__(self, url: QUrl, voices: int, volume: int, parent=None):
+        from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer, QSoundEffect
+        self.uses_sound_effect = url.toLocalFile().lower().endswith('.wav')
+        self.voices = []
+        for _ in range(voices):
+            if self.uses_sound_effect:
+                voice = QSoundEffect(parent)
+                voice.setSource(url)
+            else:
+                voice = QMediaPlayer(parent)
+                voice.setMedia(QMediaContent(url))
+            self.voices.append(voice)
+        self.next_voice = 0 # Voices are used in turn, so the one taken over is the one started longest ago
+        self.set_volume(volume)
+
+    def set_volume(self, volume: int):
+        """Sets the volume of every voice, from 0 to 100."""
+        for voice in self.voices:
+            voice.setVolume(volume / 100 if self.uses_sound_effect else volume)
+
+    def is_playing(self, voice) -> bool:
+        if self.uses_sound_effect:
+            return voice.isPlaying()
+        from PyQt5.QtMultimedia import QMediaPlayer
+        return voice.state() == QMediaPlayer.PlayingState
+
+    def play(self):
+        """
+        Plays the sound on the next idle voice. If every voice is busy, the one started longest
+        ago is restarted.
+        """
+        index = self.next_voice
+        for offset in range(len(self.voices)):
+            candidate = (self.next_voice + offset) % len(self.voices)
+            if not self.is_playing(self.voices[candidate]):
+                index = candidate
+                break
+        self.next_voice = (index + 1) % len(self.voices)
+        voice = self.voices[index]
+        voice.stop()
+        if not self.uses_sound_effect:
+            voice.setPosition(0)
+        voice.play()
 
 
 # --- Pawn Promotion Dialog Class ---
@@ -1377,13 +354,11 @@ class PawnPromotionDialog(QDialog):
             if parent and hasattr(parent, 'current_piece_set_dir'):
                 current_piece_set_dir = parent.current_piece_set_dir
 
-            img_path = download_image_if_not_exists(
-                f"{piece_code_full}.png",
-                current_piece_set_dir # Use the current piece set directory
-            )
-            if img_path:
-                button.setIcon(QIcon(img_path))
-                button.setIconSize(QSize(40, 32)) # Smaller icon size
+            icon_pixmap = piece_pixmap_cache.pixmap(current_piece_set_dir, piece_code_full, # Use the current piece set
+                                                    PROMOTION_ICON_SIZE, self.devicePixelRatioF())
+            if icon_pixmap:
+                button.setIcon(QIcon(icon_pixmap))
+                button.setIconSize(QSize(40, PROMOTION_ICON_SIZE)) # Smaller icon size
                 button.setText(name) # Ensure text is explicitly set
             else:
                 # If image not found, ensure only text is displayed
@@ -1467,6 +442,7 @@ class ChessBoard(QMainWindow):
     The main GUI class for the chess game, handling the display, user interaction,
     and integration with the ChessLogic.
     """
+    @startup_trace.traced('ChessBoard.__init__')
     def __init__(self, chess_logic: ChessLogic):
         """
         Initializes the ChessBoard GUI.
@@ -1485,6 +461,14 @@ class ChessBoard(QMainWindow):
         self.current_light_square_color = QColor(255, 255, 255)
         self.current_dark_square_color = QColor(169, 169, 169)
 
+        # Scene items are kept between refreshes and only updated, see place_pieces()
+        self.board_background_item = None # One pixmap with all 64 squares, see _draw_chessboard_squares()
+        self.board_background_cache = {} # (light rgba, dark rgba, square size, device pixel ratio) -> QPixmap
+        self.piece_items = {} # (row, col) -> item showing the piece on that square
+        self.displayed_board = [[None] * 8 for _ in range(8)] # The pieces the items currently show
+        self.piece_render_key = None # How the piece items were drawn; when it changes they are all redrawn
+        self.highlight_items = [] # Pool of move highlight dots; unused ones are hidden
+
         # Store current piece set directory
         self.current_piece_set_dir = "images1" # Default piece set directory
 
@@ -1512,56 +496,52 @@ class ChessBoard(QMainWindow):
         self.setCentralWidget(self.centralwidget)
         self.main_vertical_layout = QVBoxLayout(self.centralwidget)
 
-        # Initialize the QWebEngineView for the homepage
+        # The homepage QWebEngineView (and the Chromium renderer behind it) is created on demand,
+        # see ensure_homepage_view(). The startup greeting is part of the homepage page, so no
+        # second renderer is started; without WebEngine a plain Qt greeting is shown instead.
         self.homepage_view = None
-        self.welcome_popup_view = None # Initialize popup view
-
-        # Initialize QMediaPlayer for sound effects
-        self.media_player = QMediaPlayer(self)
-        self.move_sound_url = get_local_file_url("move_sound.mp3", "sounds")
-        if not self.move_sound_url.isValid() or not os.path.exists(self.move_sound_url.toLocalFile()):
-            print(f"Warning: Move sound file not found at {self.move_sound_url.toLocalFile()}. Sound effects will be disabled.")
-            self.move_sound_url = None # Disable sound if file not found
+        self.welcome_greeting = None
+
+        # The move sound is loaded shortly after startup, or on the first move if that comes sooner,
+        # see preload_move_sound()
+        self.move_sound = None # SoundEffectPool once loaded
+        self.move_sound_url = None
+        for sound_file in MOVE_SOUND_FILES:
+            sound_url = get_local_file_url(sound_file, "sounds")
+            if sound_url.isValid() and os.path.exists(sound_url.toLocalFile()):
+                self.move_sound_url = sound_url
+                break
+        else:
+            print(f"Warning: Move sound file not found ({' or '.join(MOVE_SOUND_FILES)} in sounds/). Sound effects will be disabled.")
+        if self.move_sound_url:
+            QTimer.singleShot(MOVE_SOUND_PRELOAD_DELAY_MS, self.preload_move_sound)
 
         # Store global volume setting
         self.global_volume = 50 # Default volume
 
-        if WEBENGINE_AVAILABLE:
-            from PyQt5.QtWebEngineWidgets import QWebEngineView  # Ensure QWebEngineView is defined
-            self.homepage_view = QWebEngineView(self)
-            self.main_vertical_layout.addWidget(self.homepage_view)
-            self.load_homepage()
+        # Game UI elements; hidden while the homepage is shown
+        self.game_ui_widget = QWidget()
+        self.game_ui_layout = QVBoxLayout(self.game_ui_widget)
+        self.main_vertical_layout.addWidget(self.game_ui_widget)
+        self.setup_game_ui()
+
+        if capabilities.is_available('webengine'):
+            # Building the homepage starts Chromium, so it waits until the window is on screen
+            self.game_ui_widget.hide()
+            QTimer.singleShot(0, self.show_initial_homepage)
         else:
-            # If WebEngine is not available, directly show the game UI
-            # and inform the user.
-            QMessageBox.warning(self, "Warning", "PyQtWebEngine is not installed. "
-                                                 "The interactive homepage and custom HTML popup will not be displayed. "
-                                                 "Starting directly in Two Player mode.")
-            # Default to two-player if homepage is not available
-            self.game_mode = "two_player"
-            # Proceed directly to show game UI
-            self.game_ui_widget = QWidget()
-            self.game_ui_layout = QVBoxLayout(self.game_ui_widget)
-            self.main_vertical_layout.addWidget(self.game_ui_widget)
-            self.setup_game_ui()
-            self.game_ui_widget.show()
-            # If no webengine, we can use a simple QMessageBox as a fallback for the greeting
-            self.show_fallback_greeting()
-            self.status_label.setText("Two Player Mode - White's turn") # Initial status
-
-        if self.homepage_view: # This block runs if WEBENGINE_AVAILABLE is True
-            # Game UI elements (initially hidden)
-            self.game_ui_widget = QWidget()
-            self.game_ui_layout = QVBoxLayout(self.game_ui_widget)
-            self.main_vertical_layout.addWidget(self.game_ui_widget)
-            self.setup_game_ui() # Setup UI elements regardless of initial visibility
-            self.game_ui_widget.hide() # Hide game UI initially
-            self.show_startup_greeting() # Show the custom HTML greeting popup
-
-        # Board dimensions (fixed for 8x8 chess)
-        self.square_size = 80.4 # Size of each square in pixels
+            self.start_without_homepage()
+
+        # Board dimensions (fixed for 8x8 chess). The square size follows the view, see apply_board_size()
+        self.square_size = 80 # Size of each square in pixels
         self.board_width = 8
         self.board_height = 8
+        self.piece_render_size = self.piece_pixmap_size() # Size the board's piece pixmaps are scaled to
+        self.pending_piece_sizes = set() # (piece set, size, device pixel ratio) being scaled in the background
+        self.board_resize_timer = QTimer(self)
+        self.board_resize_timer.setSingleShot(True)
+        self.board_resize_timer.setInterval(BOARD_RESIZE_DELAY_MS)
+        self.board_resize_timer.timeout.connect(self.apply_board_size)
 
         # Set up the chess piece images (loads from local or downloads)
         self.setup_piece_images(self.current_piece_set_dir) # Initial load with default directory
@@ -1569,6 +549,7 @@ class ChessBoard(QMainWindow):
         # Initial board setup and display
         self.create_standard_chessboard() # This will set initial colors and call place_pieces
         self.update_captured_pieces_display()
+        self.view.viewport().installEventFilter(self) # Resizes the board with the view, see eventFilter()
 
         # --- AI Timer ---
         self.ai_timer = QTimer(self)
@@ -1639,23 +620,42 @@ class ChessBoard(QMainWindow):
 
     @pyqtSlot(int)
     def set_global_volume(self, value: int):
-        """Sets the global volume for the media player."""
+        """Sets the global volume for the move sound."""
         self.global_volume = value
-        self.media_player.setVolume(self.global_volume)
+        if self.move_sound:
+            self.move_sound.set_volume(self.global_volume)
 
 
+    def ensure_homepage_view(self) -> bool:
+        """
+        Creates the homepage QWebEngineView on first use and loads the homepage into it.
+        Returns False if WebEngine turns out to be unusable.
+        """
+        if self.homepage_view:
+            return True
+        if not capabilities.ensure('webengine'):
+            return False
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+        self.homepage_view = QWebEngineView(self)
+        self.main_vertical_layout.insertWidget(0, self.homepage_view)
+        self.load_homepage()
+        return True
+
+    @startup_trace.traced('load_homepage')
     def load_homepage(self):
-        """Loads the HTML content for the homepage into the QWebEngineView."""
-        if not WEBENGINE_AVAILABLE or not self.homepage_view:
+        """
+        Loads the HTML content for the homepage into the QWebEngineView.
+        The page includes the startup greeting as an overlay that fades out by itself, and it only
+        uses local files and installed fonts, so it renders at once without a network connection.
+        """
+        if not self.homepage_view:
             print("WebEngine not available, cannot load homepage.")
             return
 
         logo_path = download_image_if_not_exists("logo.png", "logo")
-        if logo_path:
-            # Convert local path to a URL for QWebEngineView
-            logo_url = QUrl.fromLocalFile(logo_path).toString()
-        else:
-            logo_url = "https://placehold.co/100x100/e9ecef/495057?text=Logo" # Fallback placeholder
+        # Convert local path to a URL for QWebEngineView; the page hides the logo if it is missing
+        logo_url = QUrl.fromLocalFile(logo_path).toString() if logo_path else ""
+        greeting_fade_ms = GREETING_DURATION_MS - GREETING_FADE_MS
 
         html_content = f"""
         <!DOCTYPE html>
@@ -1664,10 +664,9 @@ class ChessBoard(QMainWindow):
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>𝚺CHESS - Home</title>
-            <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
             <style>
                 body {{
-                    font-family: 'Cinzel', Inter;
+                    font-family: 'Cinzel', 'Trajan Pro', Georgia, serif;
                     background: linear-gradient(135deg, #f0f4f8, #cdd4da); /* Subtle gradient background */
                     color: #2c3e50; /* Dark grey text */
                     margin: 0;
@@ -1796,6 +795,52 @@ class ChessBoard(QMainWindow):
                     color: #95a5a6;
                     font-size: 0.85em;
                 }}
+
+                /* Startup greeting, shown over the homepage and then faded out */
+                .greeting-overlay {{
+                    position: fixed;
+                    top: 0; right: 0; bottom: 0; left: 0;
+                    display: flex;
+                    justify-content: center;
+                    align-items: center;
+                    background-color: rgba(44, 62, 80, 0.25);
+                    animation: fadeIn 0.5s ease-out;
+                    transition: opacity {GREETING_FADE_MS}ms ease-in-out;
+                }}
+                .greeting-overlay.fade-out {{
+                    opacity: 0;
+                }}
+                @keyframes fadeIn {{
+                    from {{ opacity: 0; }}
+                    to {{ opacity: 1; }}
+                }}
+                .greeting {{
+                    background: linear-gradient(135deg, #fdfbfb, #ebedee); /* Light gradient */
+                    border-radius: 15px;
+                    box-shadow: 0 10px 25px rgba(0, 0, 0, 0.2);
+                    padding: 25px 30px;
+                    text-align: center;
+                    width: 340px;
+                }}
+                .greeting .logo {{
+                    width: 70px;
+                    height: 70px;
+                    border: 3px solid #f39c12;
+                    box-shadow: 0 0 10px rgba(243, 156, 18, 0.5);
+                    margin-bottom: 15px;
+                }}
+                .greeting h2 {{
+                    color: #34495e;
+                    margin: 0 0 10px 0;
+                    font-size: 1.8em;
+                    font-weight: 700;
+                }}
+                .greeting p {{
+                    font-family: 'Inter', 'Segoe UI', Helvetica, Arial, sans-serif;
+                    color: #555;
+                    line-height: 1.5;
+                    margin: 0;
+                }}
             </style>
             <!-- IMPORTANT: Include qwebchannel.js -->
             <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
@@ -1804,11 +849,7 @@ class ChessBoard(QMainWindow):
 
             <div class="card">
                 <div class="logo-container">
-                    <img src="{logo_url}" alt="ChessMaster Logo" class="logo"
-                         onerror="this.style.display='none'; document.getElementById('logo-error').style.display='block';">
-                    <div id="logo-error" style="display:none; color: #e74c3c; font-size: 0.9em; margin-top: 10px;">
-                        Error loading logo.
-                    </div>
+                    <img src="{logo_url}" alt="ChessMaster Logo" class="logo" onerror="this.style.display='none';">
                 </div>
 
                 <h1>𝚺CHESS</h1>
@@ -1825,7 +866,22 @@ class ChessBoard(QMainWindow):
                 </footer>
             </div>
 
+            <div class="greeting-overlay" id="greeting">
+                <div class="greeting">
+                    <img src="{logo_url}" alt="Logo" class="logo" onerror="this.style.display='none';">
+                    <h2>Welcome!</h2>
+                    <p>Prepare for an epic chess battle!</p>
+                    <p>Built by Arka Das.</p>
+                </div>
+            </div>
+
             <script>
+                // Fade the greeting out, then remove it so it no longer covers the buttons
+                const greeting = document.getElementById('greeting');
+                setTimeout(function() {{ greeting.classList.add('fade-out'); }}, {greeting_fade_ms});
+                setTimeout(function() {{ greeting.remove(); }}, {GREETING_DURATION_MS});
+                greeting.onclick = function() {{ greeting.remove(); }};
+
                 // Wait for the QWebChannel to be ready
                 new QWebChannel(qt.webChannelTransport, function(channel) {{
                     // Expose the Python object to JavaScript
@@ -1866,6 +922,8 @@ class ChessBoard(QMainWindow):
         base_url = QUrl.fromLocalFile(os.path.abspath(os.path.dirname(__file__)) + os.sep)
         self.homepage_view.setHtml(html_content, base_url)
 
+        from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+        from PyQt5.QtWebChannel import QWebChannel
         self.homepage_view.page().profile().setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
         self.homepage_view.page().profile().setPersistentStoragePath("")
         self.homepage_view.page().profile().setCachePath("")
@@ -1903,190 +961,91 @@ class ChessBoard(QMainWindow):
 
     def show_homepage(self):
         """Shows the homepage and hides the game UI."""
-        if WEBENGINE_AVAILABLE and self.homepage_view:
+        if self.ensure_homepage_view():
             self.homepage_view.show()
             self.game_ui_widget.hide()
             self.reset_game() # Reset game state when returning to home
         else:
-            QMessageBox.information(self, "Information", "Homepage is not available because PyQtWebEngine is not installed.")
-
-    def hide_welcome_popup(self):
-        """Hides and deletes the welcome popup."""
-        if self.welcome_popup_view:
-            # Instead of hiding immediately, trigger the fade-out animation in JS, then hide after a delay
-            if hasattr(self, "welcome_popup_view") and self.welcome_popup_view:
-                try:
-                    page = self.welcome_popup_view.page()
-                    if page is not None:
-                        page.runJavaScript("triggerFadeOut();")
-                except Exception as e:
-                    print(f"Error triggering fade-out: {e}")
-                QTimer.singleShot(2000, self.welcome_popup_view.hide)  # Hide after 2s for fade-out
-            self.welcome_popup_view.deleteLater() # Mark for deletion
-            self.welcome_popup_view = None
-
-    def show_startup_greeting(self):
-        """
-        Displays a custom HTML greeting pop-up after application launch,
-        which automatically disappears after 2 seconds.
-        """
-        if not WEBENGINE_AVAILABLE:
-            # Fallback to simple QMessageBox if WebEngine is not available for custom popup
-            self.show_fallback_greeting()
-            return
-
-        self.welcome_popup_view = QWebEngineView()
-        self.welcome_popup_view.setWindowFlags(
-            Qt.SplashScreen | # Makes it frameless and floats on top
-            Qt.WindowStaysOnTopHint # Ensures it stays on top
-        )
-        self.welcome_popup_view.setAttribute(Qt.WA_TranslucentBackground) # Make background transparent for rounded corners
-
-        # Adjust size and position of the popup
-        popup_width = 400
-        popup_height = 250
-        screen_geo = QApplication.primaryScreen().geometry()
-        center_x = screen_geo.width() // 2 - popup_width // 2
-        center_y = screen_geo.height() // 2 - popup_height // 2
-        self.welcome_popup_view.setGeometry(center_x, center_y, popup_width, popup_height)
-
+            QMessageBox.information(self, "Information", "The homepage is not available.\n\n"
+                                                         f"{capabilities.unavailable_hint('webengine')}")
 
-        logo_path = download_image_if_not_exists("logo.png", "logo")
-        if logo_path:
-            logo_url = QUrl.fromLocalFile(logo_path).toString()
+    @startup_trace.traced('show_initial_homepage')
+    def show_initial_homepage(self):
+        """
+        Opens the homepage once the main window is on screen. If WebEngine fails to load after all,
+        the game starts without it.
+        """
+        if self.ensure_homepage_view():
+            self.homepage_view.show()
         else:
-            logo_url = "https://placehold.co/100x100/e9ecef/495057?text=Logo"
+            self.start_without_homepage()
 
-        # HTML content for the pop-up - Simplified JavaScript
-        popup_html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Welcome!</title>
-            <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;700&display=swap" rel="stylesheet">
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap" rel="stylesheet">
-            <style>
-                body {{
-                    margin: 0;
-                    padding: 0;
-                    background-color: transparent; /* Essential for WA_TranslucentBackground */
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    height: 100vh;
-                    overflow: hidden;
-                }}
-                .popup-container {{
-                    background: linear-gradient(135deg, #fdfbfb, #ebedee); /* Light gradient */
-                    border-radius: 15px;
-                    box-shadow: 0 10px 25px rgba(0, 0, 0, 0.2);
-                    padding: 25px 30px;
-                    text-align: center;
-                    width: 100%;
-                    max-width: 380px; /* Max width for content within the popup_width */
-                    box-sizing: border-box;
-                    animation: fadeIn 0.5s ease-out forwards;
-                    opacity: 0; /* Start hidden for animation */
-                    transition: opacity 0.5s ease-in-out; /* For fade out */
-                }}
-                .popup-container.fade-out {{
-                    opacity: 0;
-                }}
-                .logo-small {{
-                    width: 70px;
-                    height: 70px;
-                    border-radius: 50%;
-                    object-fit: cover;
-                    border: 3px solid #f39c12; /* GoDaddy-like orange border */
-                    box-shadow: 0 0 10px rgba(243, 156, 18, 0.5);
-                    margin-bottom: 15px;
-                }}
-                h2 {{
-                    font-family: 'Cinzel', Inter;
-                    color: #34495e;
-                    margin-top: 0;
-                    margin-bottom: 10px;
-                    font-size: 1.8em;
-                    font-weight: 700;
-                }}
-                p {{
-                    font-family: 'Inter', sans-serif;
-                    color: #555;
-                    font-size: 1.0em;
-                    line-height: 1.5;
-                    margin-bottom: 0;
-                }}
-            </style>
-            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-        </head>
-        <body>
-            <div class="popup-container" id="popup">
-                <img src="{logo_url}" alt="Logo" class="logo-small"
-                     onerror="this.src='https://drive.google.com/file/d/1BTP2keqx8xc8__mqKKDCNE8LmnDjKRYR/view?usp=drive_link';">
-                <h2>Welcome!
-                </h2>
-                <p>Prepare for an epic chess battle! </p>
-                
-                 </p>Build by Arka Das.</p>
-            </div>
-            <script>
-                // This function will be called by Python to trigger fade-out
-                function triggerFadeOut() {{
-                    const popup = document.getElementById('popup');
-                    if (popup) {{
-                        popup.classList.add('fade-out');
-                    }}
-                }}
-
-                // Initial fade-in animation starts
-                document.addEventListener('DOMContentLoaded', () => {{
-                    document.getElementById('popup').style.opacity = 1;
-                }});
-            </script>
-        </body>
-        </html>
+    def start_without_homepage(self):
         """
-        base_url = QUrl.fromLocalFile(os.path.abspath(os.path.dirname(__file__)) + os.sep)
-        self.welcome_popup_view.setHtml(popup_html_content, base_url)
-
-        self.welcome_popup_view.show()
-
-        # Start a QTimer to trigger the fade-out animation after 1.5 seconds (2 seconds total display - 0.5s CSS transition)
-        self.popup_timer = QTimer(self)
-        self.popup_timer.setSingleShot(True)
-        self.popup_timer.timeout.connect(lambda: self.welcome_popup_view.page().runJavaScript("triggerFadeOut();"))
-        self.popup_timer.start(1000) # Trigger JS fade-out after 1.5 seconds (1500 ms)
-
-        # Start a second QTimer to actually hide and dispose of the QWebEngineView after the full 2 seconds
-        QTimer.singleShot(3800, self.hide_welcome_popup) # Close after 2 seconds (2000 ms)
-
+        Starts directly in Two Player mode when the HTML homepage cannot be shown.
+        """
+        print(f"The interactive homepage will not be displayed. {capabilities.unavailable_hint('webengine')}")
+        # Default to two-player if homepage is not available
+        self.game_mode = "two_player"
+        self.return_home_button.hide() # No homepage to return to
+        self.game_ui_widget.show()
+        self.status_label.setText("Two Player Mode - White's turn") # Initial status
+        self.show_fallback_greeting()
 
+    @startup_trace.traced('show_fallback_greeting')
     def show_fallback_greeting(self):
         """
-        Displays a simple QMessageBox greeting if QWebEngineView is not available.
+        Displays the startup greeting as a plain Qt panel over the window when the HTML homepage is
+        not available. It does not block the window and closes itself after GREETING_DURATION_MS,
+        or when clicked. Both paths go through hide_welcome_greeting(), which deletes it.
         """
-        msg_box = QMessageBox(self)
-        msg_box.setWindowTitle("Welcome to Σ CHESS")
+        greeting = QFrame(self)
+        greeting.setObjectName("welcomeGreeting")
+        greeting.mousePressEvent = lambda event: self.hide_welcome_greeting()
+        layout = QVBoxLayout(greeting)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
         if self.logo_pixmap:
-            msg_box.setIconPixmap(self.logo_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            msg_box.setIcon(QMessageBox.Information)
-        msg_box.setText("Welcome to Σ CHESS!\n\nPrepare for an epic chess battle!")
-        msg_box.setStandardButtons(QMessageBox.Ok)
-        # Use a QTimer to close the QMessageBox automatically
-        QTimer.singleShot(3800, msg_box.accept) # Close after 2 seconds (2000 ms)
-        msg_box.exec_()
+            logo_label = QLabel()
+            logo_label.setPixmap(self.logo_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            layout.addWidget(logo_label)
+        title_label = QLabel("Welcome to Σ CHESS!")
+        title_label.setObjectName("welcomeTitle")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title_label)
+        message_label = QLabel(f"Prepare for an epic chess battle!\n\nThe interactive homepage is not available.\n"
+                               f"{capabilities.unavailable_hint('webengine')}")
+        message_label.setWordWrap(True)
+        message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(message_label)
+
+        greeting.adjustSize()
+        greeting.move((self.width() - greeting.width()) // 2, (self.height() - greeting.height()) // 2)
+        greeting.show()
+        greeting.raise_()
+        self.welcome_greeting = greeting
+        QTimer.singleShot(GREETING_DURATION_MS, self.hide_welcome_greeting)
+
+    def hide_welcome_greeting(self):
+        """
+        Removes the Qt startup greeting if it is still shown. Called by a click on the greeting
+        and by its timer, in either order, so it must tolerate the greeting being gone already.
+        """
+        greeting, self.welcome_greeting = self.welcome_greeting, None
+        if greeting is not None and not sip.isdeleted(greeting):
+            greeting.hide()
+            greeting.deleteLater()
 
 
     def show_game_ui(self):
         """Hides the homepage and shows the game UI."""
-        if WEBENGINE_AVAILABLE and self.homepage_view:
+        if self.homepage_view:
             self.homepage_view.hide()
         self.game_ui_widget.show()
 
 
+    @startup_trace.traced('setup_game_ui')
     def setup_game_ui(self):
         """
         Sets up the layout and widgets for the main game UI.
@@ -2129,6 +1088,7 @@ class ChessBoard(QMainWindow):
         self.piece_styles_menu = QMenu(self)
         self.piece_set1_action = self.piece_styles_menu.addAction("Classic Set")
         self.piece_set2_action = self.piece_styles_menu.addAction("Modern Set") # Or other descriptive names
+        self.piece_set3_action = self.piece_styles_menu.addAction("Sprite Sheet Set") # pieces.png, see pieces.json
 
         # Set the menu to the button
         self.piece_styles_menu_button.setMenu(self.piece_styles_menu)
@@ -2136,16 +1096,14 @@ class ChessBoard(QMainWindow):
         # Connect menu actions to methods
         self.piece_set1_action.triggered.connect(lambda: self.set_piece_set("images1"))
         self.piece_set2_action.triggered.connect(lambda: self.set_piece_set("images2"))
+        self.piece_set3_action.triggered.connect(lambda: self.set_piece_set("pieces"))
 
         # Return to Home Button
         self.return_home_button = QPushButton("Return to Home", self)
         self.return_home_button.setObjectName("returnHomeButton")
         self.top_banner_layout.addWidget(self.return_home_button)
-        # Only connect if homepage is available
-        if WEBENGINE_AVAILABLE:
-            self.return_home_button.clicked.connect(self.show_homepage)
-        else:
-            self.return_home_button.hide() # Hide if no homepage to return to
+        # Hidden by start_without_homepage() when there is no homepage to return to
+        self.return_home_button.clicked.connect(self.show_homepage)
 
 
         # Main horizontal layout for chessboard and right panel
@@ -2168,9 +1126,13 @@ class ChessBoard(QMainWindow):
         self.view = QGraphicsView(self.scene, self)
         self.view.setRenderHint(QPainter.Antialiasing)
         self.view.setRenderHint(QPainter.SmoothPixmapTransform)
+        # The board is fitted to the view (see apply_board_size), so it never needs scroll bars
+        self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.view.setMinimumSize(MIN_SQUARE_SIZE * 8, MIN_SQUARE_SIZE * 8)
 
-        self.left_panel_layout.addWidget(self.view)
-        self.left_panel_layout.addStretch(1) # Push board to top
+        self.left_panel_layout.addWidget(self.view, 1) # The board takes all the room the panel has
 
         # Right side: Controls and Captured Pieces
         self.right_panel_layout = QVBoxLayout()
@@ -2280,7 +1242,6 @@ class ChessBoard(QMainWindow):
         # self.volume_slider.valueChanged.connect(self.media_player.setVolume)
         # self.volume_up_button.clicked.connect(self.increase_volume)
         # self.volume_down_button.clicked.connect(self.decrease_volume)
-        self.media_player.setVolume(self.global_volume) # Set initial volume from global setting
 
         # Initially hide AI difficulty and volume controls if not in AI mode
         if self.game_mode == "two_player":
@@ -2303,13 +1264,27 @@ class ChessBoard(QMainWindow):
         self.ai_timer = QTimer(self)
         self.ai_timer.timeout.connect(self.trigger_ai_move) # Renamed for clarity
 
+    def preload_move_sound(self) -> bool:
+        """
+        Loads the move sound, importing QtMultimedia on first use. Returns whether the sound can be played.
+        """
+        if self.move_sound:
+            return True
+        if not self.move_sound_url:
+            return False
+        if not capabilities.ensure('multimedia'):
+            self.move_sound_url = None # Disable sound instead of probing again on every move
+            print(f"Sound effects are disabled. {capabilities.unavailable_hint('multimedia')}")
+            return False
+        self.move_sound = SoundEffectPool(self.move_sound_url, MOVE_SOUND_VOICES, self.global_volume, self)
+        return True
+
     def play_move_sound(self):
-        """Plays the chess piece move sound."""
-        if self.move_sound_url and self.move_sound_url.isValid() and os.path.exists(self.move_sound_url.toLocalFile()):
-            self.media_player.setMedia(QMediaContent(self.move_sound_url))
-            self.media_player.play()
-        else:
-            print("Move sound file not available or invalid. Cannot play sound.")
+        """
+        Plays the chess piece move sound from memory; see SoundEffectPool.
+        """
+        if self.preload_move_sound():
+            self.move_sound.play()
 
     # Removed increase_volume and decrease_volume methods from ChessBoard
     # as they are now handled by the SettingsDialog.
@@ -2352,6 +1327,7 @@ class ChessBoard(QMainWindow):
             }}
         """
 
+    @startup_trace.traced('get_embedded_qss')
     def get_embedded_qss(self) -> str:
         """
         Returns the QSS (Qt Style Sheet) as a multi-line string.
@@ -2503,6 +1479,25 @@ QFrame#capturedFrame {{
     margin-bottom: 15px;
 }}
 
+/* Startup greeting shown over the window when the HTML homepage is unavailable */
+QFrame#welcomeGreeting {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #fdfbfb, stop:1 #ebedee);
+    border: 1px solid #cccccc;
+    border-radius: 15px;
+    padding: 20px 30px;
+}}
+
+QFrame#welcomeGreeting QLabel#welcomeTitle {{
+    color: #34495e;
+    font-size: 24px;
+    font-weight: bold;
+}}
+
+QFrame#welcomeGreeting QLabel {{
+    color: #555555;
+    font-size: 14px;
+}}
+
 /* Graphics View (Chess Board Display Area) */
 QGraphicsView {{
     border: 2px solid #777777;
@@ -2593,9 +1588,11 @@ QSlider::handle:horizontal:hover {{
 }}
         """
 
+    @startup_trace.traced('setup_piece_images')
     def setup_piece_images(self, image_directory: str):
         """
-        Loads chess piece images from the specified local directory.
+        Loads the chess piece images of a piece set (a directory or a sprite sheet manifest,
+        see load_piece_set) into `piece_pixmap_cache`.
         Sets a flag (`use_unicode_pieces`) if image loading fails, to fall back to unicode.
         """
         self.piece_images = {}
@@ -2605,19 +1602,12 @@ QSlider::handle:horizontal:hover {{
             'bK': '♚', 'bQ': '♛', 'bR': '♜', 'bB': '♝', 'bN': '♞', 'bP': '♟'
         }
 
-        # List of all piece codes to load
-        piece_codes = ['wK', 'wQ', 'wR', 'wB', 'wN', 'wP',
-                       'bK', 'bQ', 'bR', 'bP', 'bN', 'bB']
-
         all_images_found = True
-        for piece_code in piece_codes:
-            # Attempt to download or locate the image
-            img_path = download_image_if_not_exists(
-                f"{piece_code}.png",
-                image_directory # Use the passed directory here
-            )
-            if img_path:
-                self.piece_images[piece_code] = img_path
+        for piece_code in PIECE_CODES:
+            # Locate and decode the image; the shared cache does this once per piece set
+            pixmap = piece_pixmap_cache.source(image_directory, piece_code)
+            if pixmap:
+                self.piece_images[piece_code] = pixmap
             else:
                 all_images_found = False
                 print(f"Could not find image for {piece_code} in {image_directory}. Will use unicode.")
@@ -2637,7 +1627,10 @@ QSlider::handle:horizontal:hover {{
         Switches the active piece image set and refreshes the board.
         """
         self.current_piece_set_dir = directory
+        piece_pixmap_cache.invalidate(directory) # Pick up images changed on disk since the set was last used
         self.setup_piece_images(self.current_piece_set_dir)
+        self.clear_piece_items() # Redraw every piece with the new images
+        self.update_captured_pieces_display()
         self.refresh_board()
 
     def set_ai_difficulty_buttons_enabled(self, enabled: bool):
@@ -2687,9 +1680,13 @@ QSlider::handle:horizontal:hover {{
         """
         # Store current AI difficulty before creating new ChessLogic instance
         current_ai_difficulty = self.chess_logic.ai_difficulty
+        opening_book = self.chess_logic.opening_book
+        tablebases = self.chess_logic.tablebases
 
         self.chess_logic = ChessLogic() # Create a new game logic instance
         self.chess_logic.ai_difficulty = current_ai_difficulty # Apply the stored AI difficulty
+        self.chess_logic.opening_book = opening_book # Keep the already opened book
+        self.chess_logic.tablebases = tablebases
 
         self.selected_pos = None
         self.valid_moves = []
@@ -2721,11 +1718,11 @@ QSlider::handle:horizontal:hover {{
         self.redo_button.setEnabled(len(self.chess_logic.redo_history) > 0) # Reset enabled state
 
 
+    @startup_trace.traced('create_standard_chessboard')
     def create_standard_chessboard(self):
         """
         Creates the chessboard with standard white and gray squares.
         """
-        self.scene.clear() # Clear all items from the scene
         self._draw_chessboard_squares(QColor(255, 255, 255), QColor(169, 169, 169))
         self.place_pieces()
 
@@ -2733,7 +1730,6 @@ QSlider::handle:horizontal:hover {{
         """
         Creates a chessboard with a vintage/sepia color scheme.
         """
-        self.scene.clear()
         self._draw_chessboard_squares(QColor(255, 223, 186), QColor(111, 85, 59))
         self.place_pieces()
 
@@ -2741,7 +1737,6 @@ QSlider::handle:horizontal:hover {{
         """
         Creates a chessboard with a dark/modern color scheme.
         """
-        self.scene.clear()
         self._draw_chessboard_squares(QColor(150, 150, 150), QColor(50, 50, 50))
         self.place_pieces()
 
@@ -2749,7 +1744,6 @@ QSlider::handle:horizontal:hover {{
         """
         Creates a chessboard with a high-contrast color scheme.
         """
-        self.scene.clear()
         self._draw_chessboard_squares(QColor(220, 220, 220), QColor(40, 40, 40))
         self.place_pieces()
 
@@ -2777,110 +1771,161 @@ QSlider::handle:horizontal:hover {{
     def _draw_chessboard_squares(self, light_color: QColor, dark_color: QColor):
         """
         Helper method to draw the 64 squares of the chessboard with specified light and dark colors.
+        The squares are painted into a single pixmap, cached per (colors, square size, device pixel
+        ratio), and shown by one scene item, so recoloring or resizing back costs a lookup.
         Stores the colors as instance variables.
         """
         self.current_light_square_color = light_color
         self.current_dark_square_color = dark_color
 
-        for row in range(self.board_height):
-            for col in range(self.board_width):
-                x = col * self.square_size
-                y = row * self.square_size
-                square_color = light_color if (row + col) % 2 == 0 else dark_color
-                rect = QGraphicsRectItem(QRectF(x, y, self.square_size, self.square_size))
-                rect.setBrush(square_color)
-                self.scene.addItem(rect)
+        device_pixel_ratio = self.view.devicePixelRatioF()
+        key = (light_color.rgba(), dark_color.rgba(), self.square_size, device_pixel_ratio)
+        background = self.board_background_cache.get(key)
+        if background is None:
+            board_size = self.square_size * self.board_width
+            background = QPixmap(round(board_size * device_pixel_ratio), round(board_size * device_pixel_ratio))
+            background.setDevicePixelRatio(device_pixel_ratio)
+            painter = QPainter(background)
+            for row in range(self.board_height):
+                for col in range(self.board_width):
+                    square_color = light_color if (row + col) % 2 == 0 else dark_color
+                    painter.fillRect(QRectF(col * self.square_size, row * self.square_size,
+                                            self.square_size, self.square_size), square_color)
+            painter.end()
+            if len(self.board_background_cache) >= 8: # Keep the few recent layers, not every size ever shown
+                self.board_background_cache.clear()
+            self.board_background_cache[key] = background
+
+        if self.board_background_item is None:
+            self.board_background_item = QGraphicsPixmapItem()
+            self.board_background_item.setZValue(-1) # Below pieces and highlights
+            self.scene.addItem(self.board_background_item)
+        self.board_background_item.setPixmap(background)
+
+    def clear_piece_items(self):
+        """
+        Removes every piece item, so the next place_pieces() draws all pieces from scratch.
+        """
+        for item in self.piece_items.values():
+            self.scene.removeItem(item)
+        self.piece_items = {}
+        self.displayed_board = [[None] * self.board_width for _ in range(self.board_height)]
 
     def place_pieces(self):
         """
         Places or updates the chess pieces on the board according to the current game state
         from `self.chess_logic.board`. Uses images if available, otherwise unicode symbols.
-        """
-        # Remove existing piece items before redrawing
-        # This loop is now redundant as scene.clear() is called before _draw_chessboard_squares
-        # which clears all items including pieces.
-        # However, if place_pieces is called independently of _draw_chessboard_squares,
-        # this loop would be necessary. For safety, I'll keep it but note its redundancy
-        # if always called after scene.clear().
-        for item in self.scene.items():
-            if isinstance(item, QGraphicsPixmapItem) or isinstance(item, QGraphicsTextItem):
-                self.scene.removeItem(item)
 
+        Only squares whose piece differs from `displayed_board` are touched: the item of a piece
+        that moved is repositioned, the item of a captured piece is removed, and only a piece
+        that appears from nowhere (a promotion, or a jump through the game) gets a new item.
+        All items are drawn again only when the piece set, the symbols or the size of the piece
+        pixmaps change. After a resize the pixmaps of the previous size stay in use, scaled to fit,
+        until update_piece_render_size() has the new ones.
+        """
+        render_key = (self.use_unicode_pieces, self.current_piece_set_dir, self.piece_render_size,
+                      self.view.devicePixelRatioF())
+        if render_key != self.piece_render_key:
+            self.clear_piece_items()
+            self.piece_render_key = render_key
+
+        vacated = {} # Piece code -> items that left their square
+        arrivals = [] # (row, col, piece) of squares that need an item
         for row in range(self.board_height):
+            displayed_row = self.displayed_board[row]
             for col in range(self.board_width):
                 piece = self.chess_logic.get_piece(row, col)
+                if piece == displayed_row[col]:
+                    continue
+                item = self.piece_items.pop((row, col), None)
+                if item is not None:
+                    vacated.setdefault(displayed_row[col], []).append(item)
                 if piece:
-                    if self.use_unicode_pieces:
-                        # Fallback to unicode characters if images are not available
-                        text_item = self.scene.addText(self.unicode_pieces.get(piece, '?'))
-                        text_item.setFont(QFont("Arial Unicode MS", int(self.square_size * 0.6)))
-                        # Position unicode text to be roughly centered
-                        text_item.setPos(col * self.square_size + self.square_size * 0.15,
-                                         row * self.square_size + self.square_size * 0.05)
-                        # Adjust color for better visibility on different square colors
-                        # Unicode pieces should be visible on both light and dark squares.
-                        # A simple approach is to make them black on light squares and white on dark squares.
-                        if (row + col) % 2 == 0: # Light square
-                            text_item.setDefaultTextColor(Qt.black)
-                        else: # Dark square
-                            text_item.setDefaultTextColor(Qt.white)
-                    else:
-                        # Use image files for pieces
-                        try:
-                            piece_image_path = self.piece_images.get(piece)
-                            if piece_image_path:
-                                piece_image = QPixmap(piece_image_path)
-                                # Scale the image to fit the square with some padding
-                                piece_image = piece_image.scaled(
-                                    int(self.square_size * 0.9),
-                                    int(self.square_size * 0.9),
-                                    Qt.KeepAspectRatio,
-                                    Qt.SmoothTransformation
-                                )
-                                piece_item = QGraphicsPixmapItem(piece_image)
-                                # Center the image within its square
-                                offset_x = col * self.square_size + (self.square_size - piece_image.width()) / 2
-                                offset_y = row * self.square_size + (self.square_size - piece_image.height()) / 2
-                                piece_item.setPos(offset_x, offset_y) # Use setPos for QGraphicsPixmapItem
-                                self.scene.addItem(piece_item)
-                            else:
-                                # Fallback to unicode if a specific image is missing even if use_unicode_pieces is False
-                                print(f"Image for {piece} not found, falling back to unicode.")
-                                text_item = self.scene.addText(self.unicode_pieces.get(piece, '?'))
-                                text_item.setFont(QFont("Arial Unicode MS", int(self.square_size * 0.6)))
-                                text_item.setPos(col * self.square_size + self.square_size * 0.15,
-                                                 row * self.square_size + self.square_size * 0.05)
-                                if (row + col) % 2 == 0: # Light square
-                                    text_item.setDefaultTextColor(Qt.black)
-                                else: # Dark square
-                                    text_item.setDefaultTextColor(Qt.white)
-                        except Exception as e:
-                            print(f"Error loading piece image for {piece}: {e}. Falling back to unicode.")
-                            # Ensure unicode fallback even if an exception occurs during image loading
-                            text_item = self.scene.addText(self.unicode_pieces.get(piece, '?'))
-                            text_item.setFont(QFont("Arial Unicode MS", int(self.square_size * 0.6)))
-                            text_item.setPos(col * self.square_size + self.square_size * 0.15,
-                                             row * self.square_size + self.square_size * 0.05)
-                            if (row + col) % 2 == 0: # Light square
-                                text_item.setDefaultTextColor(Qt.black)
-                            else: # Dark square
-                                text_item.setDefaultTextColor(Qt.white)
+                    arrivals.append((row, col, piece))
+                displayed_row[col] = piece
+
+        for row, col, piece in arrivals:
+            same_piece = vacated.get(piece)
+            item = same_piece.pop() if same_piece else None # The piece moved here: reuse its item as is
+            if item is None:
+                item = self._create_piece_item(piece)
+                self.scene.addItem(item)
+            self._position_piece_item(item, row, col)
+            self.piece_items[(row, col)] = item
+
+        # Items left over belong to captured pieces (or to a pawn that was promoted)
+        for items in vacated.values():
+            for item in items:
+                self.scene.removeItem(item)
+
+    def _create_piece_item(self, piece: str):
+        """
+        Returns a new scene item for a piece: its image, or its unicode symbol if there is no image.
+        """
+        if not self.use_unicode_pieces:
+            try:
+                # Scaled to fit the square with some padding; cached, so only the first draw scales
+                piece_image = piece_pixmap_cache.pixmap(self.current_piece_set_dir, piece,
+                                                        self.piece_render_size, self.view.devicePixelRatioF())
+                if piece_image:
+                    return QGraphicsPixmapItem(piece_image)
+                # Fallback to unicode if a specific image is missing even if use_unicode_pieces is False
+                print(f"Image for {piece} not found, falling back to unicode.")
+            except Exception as e:
+                print(f"Error loading piece image for {piece}: {e}. Falling back to unicode.")
+        # Fallback to unicode characters if images are not available
+        text_item = QGraphicsTextItem(self.unicode_pieces.get(piece, '?'))
+        text_item.setFont(QFont("Arial Unicode MS", int(self.square_size * 0.6)))
+        return text_item
+
+    def _position_piece_item(self, item, row: int, col: int):
+        """
+        Moves a piece item onto a square.
+        """
+        if isinstance(item, QGraphicsPixmapItem):
+            # Scale pixmaps of another size to fit until update_piece_render_size() replaces them
+            scale = self.piece_pixmap_size() / self.piece_render_size
+            item.setScale(scale)
+            # Center the image within its square (the pixmap size is in device pixels)
+            piece_image = item.pixmap()
+            width = piece_image.width() / piece_image.devicePixelRatio() * scale
+            height = piece_image.height() / piece_image.devicePixelRatio() * scale
+            item.setPos(col * self.square_size + (self.square_size - width) / 2,
+                        row * self.square_size + (self.square_size - height) / 2)
+        else:
+            # Position unicode text to be roughly centered
+            item.setPos(col * self.square_size + self.square_size * 0.15,
+                        row * self.square_size + self.square_size * 0.05)
+            # Unicode pieces should be visible on both light and dark squares:
+            # black on light squares and white on dark squares.
+            item.setDefaultTextColor(Qt.black if (row + col) % 2 == 0 else Qt.white)
 
     def draw_move_highlight(self, valid_moves: list[tuple[int, int]]):
         """
         Draws green dots on the board to visually indicate valid squares for the selected piece.
+        The dots come from a pool that grows as needed; dots not used are hidden.
 
         Args:
             valid_moves (list[tuple[int, int]]): A list of (row, col) tuples representing valid moves.
         """
-        for (r, c) in valid_moves:
-            x = c * self.square_size
-            y = r * self.square_size
-            # Draw a small green ellipse in the center of the square
-            ellipse = QGraphicsEllipseItem(QRectF(x + self.square_size/3, y + self.square_size/3, self.square_size/3, self.square_size/3))
+        while len(self.highlight_items) < len(valid_moves):
+            ellipse = QGraphicsEllipseItem()
             ellipse.setBrush(QColor(0, 200, 0, 200))  # Green dot with transparency
             ellipse.setZValue(1) # Ensure highlights are drawn on top of squares and pieces
+            ellipse.hide()
             self.scene.addItem(ellipse)
+            self.highlight_items.append(ellipse)
+
+        for index, ellipse in enumerate(self.highlight_items):
+            if index < len(valid_moves):
+                r, c = valid_moves[index]
+                x = c * self.square_size
+                y = r * self.square_size
+                # A small dot in the center of the square
+                ellipse.setRect(QRectF(x + self.square_size/3, y + self.square_size/3, self.square_size/3, self.square_size/3))
+                ellipse.show()
+            else:
+                ellipse.hide()
 
     def handle_square_click(self, event):
         """
@@ -2909,7 +1954,7 @@ QSlider::handle:horizontal:hover {{
                 self.selected_pos = (row, col)
                 # Refresh board to clear any old highlights and then draw new ones
                 self.refresh_board()
-                self.valid_moves = self.chess_logic.highlight_moves((row, col))
+                self.valid_moves = self.chess_logic.legal_moves_from((row, col)) # Cached per position
                 self.draw_move_highlight(self.valid_moves)
             else:
                 # Clicked on an empty square or opponent's piece when nothing selected
@@ -2930,83 +1975,15 @@ QSlider::handle:horizontal:hover {{
                 # Valid move, execute it
                 self.play_move_sound() # Play sound on valid move
 
-                # Store move details for undo functionality BEFORE making the move
-                move_info = {
-                    'start_pos': start_pos,
-                    'end_pos': end_pos,
-                    'moved_piece': selected_piece_on_board,
-                    'captured_piece': self.chess_logic.get_piece(end_pos[0], end_pos[1]), # Piece at end_pos before move
-                    'promoted_to': None, # Will be updated if promotion occurs
-                    'castling_info': None, # Will be updated if castling occurs
-                    'en_passant_target_before_move': self.chess_logic.en_passant_target, # Store current EP target
-                    'is_en_passant_capture': False # Will be updated if EP capture occurs
-                }
-
-                # Handle en passant capture for the actual move
-                if selected_piece_on_board[1] == 'P' and end_pos == self.chess_logic.en_passant_target:
-                    # If it's an en passant capture, the captured pawn is not at end_pos
-                    captured_pawn_row = start_pos[0]
-                    captured_pawn_col = end_pos[1]
-                    captured_piece_ep = self.chess_logic.get_piece(captured_pawn_row, captured_pawn_col)
-                    if captured_piece_ep:
-                        self.chess_logic.captured_pieces[selected_piece_on_board[0]].append(captured_piece_ep)
-                        self.chess_logic.place_piece(captured_pawn_row, captured_pawn_col, None) # Remove captured pawn
-                        move_info['is_en_passant_capture'] = True
-                        move_info['captured_piece'] = captured_piece_ep # Store the actual captured pawn for undo
-
-                # Handle regular capture
-                elif move_info['captured_piece']:
-                    self.chess_logic.captured_pieces[selected_piece_on_board[0]].append(move_info['captured_piece'])
+                # Ask for the promotion piece before the move is played
+                promotion = None
+                if selected_piece_on_board[1] == 'P' and end_pos[0] == (0 if selected_piece_on_board[0] == 'w' else 7):
+                    promotion = self.handle_promotion_dialog(selected_piece_on_board[0])
 
+                # Play the move; ChessLogic records it in move_history for undo/redo
+                self.chess_logic.make_move(start_pos, end_pos, promotion)
                 self.update_captured_pieces_display() # Update display after capture
 
-                # Handle king and rook movement for castling
-                if selected_piece_on_board[1] == 'K':
-                    self.chess_logic.kings_moved[selected_piece_on_board[0]] = True
-                    if abs(start_pos[1] - end_pos[1]) == 2: # Castling move
-                        # Determine if kingside or queenside castling
-                        if end_pos[1] > start_pos[1]: # Kingside
-                            rook_start_col = 7
-                            rook_end_col = end_pos[1] - 1
-                        else: # Queenside
-                            rook_start_col = 0
-                            rook_end_col = end_pos[1] + 1
-
-                        rook = self.chess_logic.get_piece(start_pos[0], rook_start_col)
-                        self.chess_logic.place_piece(start_pos[0], rook_end_col, rook) # Move rook
-                        self.chess_logic.place_piece(start_pos[0], rook_start_col, None) # Clear old rook square
-                        move_info['castling_info'] = {'rook_start': (start_pos[0], rook_start_col), 'rook_end': (start_pos[0], rook_end_col), 'rook_piece': rook}
-
-                # Track rook movement for castling
-                elif selected_piece_on_board[1] == 'R':
-                    color = selected_piece_on_board[0]
-                    if start_pos[0] == (7 if color == 'w' else 0):
-                        if start_pos[1] == 0:  # Queenside rook
-                            self.chess_logic.rooks_moved[color]['queenside'] = True # Corrected access
-                        elif start_pos[1] == 7:  # Kingside rook
-                            self.chess_logic.rooks_moved[color]['kingside'] = True # Corrected access
-
-                # Make the actual piece move on the board
-                self.chess_logic.place_piece(end_pos[0], end_pos[1], selected_piece_on_board)
-                self.chess_logic.place_piece(start_pos[0], start_pos[1], None)
-
-                # Check for pawn promotion
-                if self.chess_logic.handle_pawn_promotion(end_pos[0], end_pos[1]):
-                    self.handle_promotion_dialog(end_pos[0], end_pos[1], selected_piece_on_board[0])
-                    move_info['promoted_to'] = self.chess_logic.get_piece(end_pos[0], end_pos[1])[1] # Store promoted piece type
-
-                # Update en passant target for the next turn
-                self.chess_logic.en_passant_target = None
-                if selected_piece_on_board[1] == 'P' and abs(start_pos[0] - end_pos[0]) == 2:
-                    ep_row = (start_pos[0] + end_pos[0]) // 2
-                    self.chess_logic.en_passant_target = (ep_row, start_pos[1])
-
-                self.chess_logic.move_history.append(move_info) # Add completed move to history
-                self.chess_logic.redo_history.clear() # Clear redo history when a new move is made
-
-                # Change turn
-                self.chess_logic.current_turn = 'b' if self.chess_logic.current_turn == 'w' else 'w'
-
                 # Reset selection and refresh board
                 self.selected_pos = None
                 self.valid_moves = []
@@ -3025,7 +2002,7 @@ QSlider::handle:horizontal:hover {{
                 if clicked_piece and clicked_piece[0] == self.chess_logic.current_turn:
                     self.selected_pos = (row, col)
                     self.refresh_board() # Clear old highlights
-                    self.valid_moves = self.chess_logic.highlight_moves((row, col))
+                    self.valid_moves = self.chess_logic.legal_moves_from((row, col)) # Cached per position
                     self.draw_move_highlight(self.valid_moves)
                 else:
                     # Deselect if clicking elsewhere (empty square or opponent's piece)
@@ -3042,8 +2019,7 @@ QSlider::handle:horizontal:hover {{
 
         if self.chess_logic.make_ai_move():
             self.play_move_sound() # Play sound after AI move
-            # AI successfully made a move, now change turn back to player
-            self.chess_logic.current_turn = 'w'
+            # make_ai_move hands the turn back to the player itself
             self.refresh_board()
             self.update_captured_pieces_display() # Update display after AI capture
 
@@ -3061,18 +2037,11 @@ QSlider::handle:horizontal:hover {{
         both the player's last move and the AI's last move.
         """
         if self.game_mode == "vs_ai":
-            # Undo player's move
-            if self.chess_logic.undo_last_move():
-                self.refresh_board()
-                self.update_captured_pieces_display()
-                self.check_game_status() # Update status after undo
-
-            # Undo AI's move (if AI has made a move and there's history)
-            if self.chess_logic.undo_last_move():
-                self.refresh_board()
-                self.update_captured_pieces_display()
-                self.check_game_status() # Update status after undo
-            else:
+            # Undo player's move and AI's move in one jump, redrawing once
+            ply = len(self.chess_logic.move_history)
+            if ply:
+                self.jump_to_ply(max(0, ply - 2))
+            if ply < 2:
                 QMessageBox.information(self, "Undo", "No more moves to undo.")
         else:
             QMessageBox.information(self, "Undo", "Undo is only available in 'vs AI' mode.")
@@ -3087,18 +2056,12 @@ QSlider::handle:horizontal:hover {{
         both the AI's last move and the player's last move.
         """
         if self.game_mode == "vs_ai":
-            # Redo AI's move
-            if self.chess_logic.redo_last_move():
-                self.refresh_board()
-                self.update_captured_pieces_display()
-                self.check_game_status()
-
-            # Redo player's move (if available)
-            if self.chess_logic.redo_last_move():
-                self.refresh_board()
-                self.update_captured_pieces_display()
-                self.check_game_status()
-            else:
+            # Redo AI's move and player's move in one jump, redrawing once
+            ply = len(self.chess_logic.move_history)
+            redo_count = len(self.chess_logic.redo_history)
+            if redo_count:
+                self.jump_to_ply(ply + min(2, redo_count))
+            if redo_count < 2:
                 QMessageBox.information(self, "Redo", "No more moves to redo.")
         else:
             QMessageBox.information(self, "Redo", "Redo is only available in 'vs AI' mode.")
@@ -3107,24 +2070,34 @@ QSlider::handle:horizontal:hover {{
         self.undo_button.setEnabled(len(self.chess_logic.move_history) > 0)
         self.redo_button.setEnabled(len(self.chess_logic.redo_history) > 0)
 
+    def jump_to_ply(self, ply: int):
+        """
+        Shows the position after `ply` half-moves of the current game line.
+        The board, captured pieces and status are redrawn once, however far the jump.
+        """
+        if self.chess_logic.goto_ply(ply):
+            self.selected_pos = None
+            self.valid_moves = []
+            self.refresh_board()
+            self.update_captured_pieces_display()
+            self.check_game_status()
 
-    def handle_promotion_dialog(self, row: int, col: int, color: str):
+    def handle_promotion_dialog(self, color: str) -> str:
         """
-        Shows the pawn promotion dialog and applies the chosen promotion.
+        Shows the pawn promotion dialog and returns the chosen piece type.
 
         Args:
-            row (int): The row of the pawn to be promoted.
-            col (int): The column of the pawn to be promoted.
             color (str): The color of the pawn ('w' or 'b').
+
+        Returns:
+            str: 'Q', 'R', 'B' or 'N'.
         """
         # Pass the current ChessBoard instance as parent, so PawnPromotionDialog can access current_piece_set_dir
         dialog = PawnPromotionDialog(color, self)
         if dialog.exec_(): # Show dialog modally
-            promoted_piece_type = dialog.selected_piece
-            self.chess_logic.promote_pawn(row, col, promoted_piece_type)
-        else:
-            # If dialog is cancelled or closed, default to Queen promotion
-            self.chess_logic.promote_pawn(row, col, 'Q')
+            return dialog.selected_piece
+        # If dialog is cancelled or closed, default to Queen promotion
+        return 'Q'
 
     def check_game_status(self):
         """
@@ -3134,11 +2107,13 @@ QSlider::handle:horizontal:hover {{
         current_color = self.chess_logic.current_turn
         opponent_color = 'w' if current_color == 'b' else 'b' # Corrected opponent_color logic
 
-        # Check if the current player (whose turn it is) is in check
+        # Check if the current player (whose turn it is) is in check, and if they can move at all.
+        # The legal moves come from the same cached map that highlights the moves of a selected piece.
         in_check = self.chess_logic.is_opponent_in_check(current_color)
+        has_legal_moves = bool(self.chess_logic.legal_move_map())
 
         # Check for checkmate
-        if in_check and self.chess_logic.is_checkmate(current_color):
+        if in_check and not has_legal_moves:
             self.chess_logic.game_over = True
             self.chess_logic.winner = opponent_color
             winner_name = "White" if opponent_color == 'w' else "Black" # Corrected winner_name assignment
@@ -3153,7 +2128,7 @@ QSlider::handle:horizontal:hover {{
             return
 
         # Check for stalemate
-        if self.chess_logic.is_stalemate(current_color):
+        if not has_legal_moves:
             self.chess_logic.game_over = True
             self.status_label.setText("Stalemate! The game is a draw.")
             QMessageBox.information(self, "Game Over", "Stalemate! 🤝 The game is a draw.", QMessageBox.Ok, QMessageBox.Ok)
@@ -3165,6 +2140,19 @@ QSlider::handle:horizontal:hover {{
                 self.setWindowIcon(QIcon(self.logo_pixmap))
             return
 
+        # Check for draws by the fifty-move rule or threefold repetition
+        if self.chess_logic.is_fifty_move_draw() or self.chess_logic.is_repetition(3):
+            self.chess_logic.game_over = True
+            reason = "fifty-move rule" if self.chess_logic.is_fifty_move_draw() else "threefold repetition"
+            self.status_label.setText(f"Draw by {reason}!")
+            QMessageBox.information(self, "Game Over", f"Draw by {reason}! 🤝 The game is a draw.", QMessageBox.Ok, QMessageBox.Ok)
+            self.new_game_button.show() # Ensure it's visible if hidden
+
+            # Update window icon to logo upon game end
+            if self.logo_pixmap:
+                self.setWindowIcon(QIcon(self.logo_pixmap))
+            return
+
         # Update status for check or normal turn
         if in_check:
             turn_text = "White's" if current_color == 'w' else "Black's"
@@ -3178,13 +2166,70 @@ QSlider::handle:horizontal:hover {{
         self.redo_button.setEnabled(len(self.chess_logic.redo_history) > 0)
 
 
-    def refresh_board(self):
+    def piece_pixmap_size(self) -> int:
+        """Size in logical pixels of the piece images on the board: the square with some padding."""
+        return int(self.square_size * 0.9)
+
+    def eventFilter(self, watched, event):
+        """
+        Resizes the board when its view changes size. Resizing is deferred by BOARD_RESIZE_DELAY_MS,
+        so dragging the window edge only fits the board once the drag pauses.
+        """
+        if event.type() == QEvent.Resize and watched is self.view.viewport():
+            self.board_resize_timer.start()
+        return super().eventFilter(watched, event)
+
+    def apply_board_size(self):
         """
-        Refreshes the entire board display, redrawing squares and pieces.
-        This is called after every move or when changing board styles.
+        Fits the board to its view. The squares and highlights are redrawn at the new size right
+        away and the pieces are moved to their new squares, still showing their current pixmaps
+        scaled to fit; sharp pixmaps of the new size follow, see update_piece_render_size().
         """
-        self.scene.clear()
+        viewport = self.view.viewport().size()
+        square_size = max(MIN_SQUARE_SIZE, min(viewport.width(), viewport.height()) // self.board_width)
+        if square_size == self.square_size:
+            return
+        self.square_size = square_size
+        self.scene.setSceneRect(0, 0, square_size * self.board_width, square_size * self.board_height)
         self._draw_chessboard_squares(self.current_light_square_color, self.current_dark_square_color)
+        self.draw_move_highlight(self.valid_moves)
+        for (row, col), item in self.piece_items.items():
+            self._position_piece_item(item, row, col)
+        self.update_piece_render_size()
+
+    def update_piece_render_size(self):
+        """
+        Switches the board to piece pixmaps that fit the current square size. If they have not
+        been made yet, they are scaled in the background (see PiecePixmapCache.scale_in_background)
+        and this method is called again when they are ready; the board keeps its current pixmaps
+        until then, so resizing never decodes or scales pieces on the GUI thread.
+        """
+        size = self.piece_pixmap_size()
+        if size == self.piece_render_size:
+            return
+        device_pixel_ratio = self.view.devicePixelRatioF()
+        piece_set = self.current_piece_set_dir
+        if self.use_unicode_pieces or piece_pixmap_cache.has_size(piece_set, size, device_pixel_ratio):
+            self.piece_render_size = size
+            # The cache only needs the sizes still shown
+            piece_pixmap_cache.discard_sizes_except({size, CAPTURED_ICON_SIZE, PROMOTION_ICON_SIZE})
+            self.place_pieces()
+            return
+
+        job_key = (piece_set, size, device_pixel_ratio)
+        if job_key not in self.pending_piece_sizes: # Otherwise a job for this size is already running
+            def on_ready():
+                self.pending_piece_sizes.discard(job_key)
+                self.update_piece_render_size()
+            self.pending_piece_sizes.add(job_key)
+            piece_pixmap_cache.scale_in_background(piece_set, size, device_pixel_ratio, on_ready)
+
+    def refresh_board(self):
+        """
+        Brings the board display up to date: clears the move highlights and updates the pieces
+        that changed. This is called after every move, selection and deselection.
+        """
+        self.draw_move_highlight([])
         self.place_pieces()
 
     def update_captured_pieces_display(self):
@@ -3230,11 +2275,10 @@ QSlider::handle:horizontal:hover {{
         else:
             # Use image files for captured pieces
             try:
-                pixmap_path = self.piece_images.get(piece_code)
-                if pixmap_path:
-                    pixmap = QPixmap(pixmap_path)
-                    # Scale captured piece images to a smaller size
-                    pixmap = pixmap.scaled(24, 24, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                # Captured piece images are shown at a smaller size
+                pixmap = piece_pixmap_cache.pixmap(self.current_piece_set_dir, piece_code,
+                                                   CAPTURED_ICON_SIZE, self.devicePixelRatioF())
+                if pixmap:
                     label = QLabel()
                     label.setPixmap(pixmap)
                     layout.addWidget(label)
@@ -3256,15 +2300,31 @@ QSlider::handle:horizontal:hover {{
 
 # --- Main Application Entry Point ---
 if __name__ == "__main__":
-    # Create the QApplication instance
-    app = QApplication(sys.argv)
+    # Create the QApplication instance. The homepage imports QtWebEngineWidgets later, on demand,
+    # which PyQt5 only allows when OpenGL contexts are shared from before the application exists.
+    with startup_trace.phase('QApplication'):
+        QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+        app = QApplication(sys.argv)
+    startup_trace.install_qt_hooks(app) # Reports the startup trace at the first paint when enabled
 
     # Initialize the core chess game logic
-    chess_logic = ChessLogic()
+    with startup_trace.phase('ChessLogic'):
+        chess_logic = ChessLogic()
+
+        # Use a Polyglot opening book placed next to the script, if there is one
+        book_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+        if os.path.exists(book_path):
+            chess_logic.load_opening_book(book_path)
+        # Endgame tablebases generated with `python -m engine.tablebase`, whose default output directory
+        # (engine.tablebase.DEFAULT_DIRECTORY) is this one; not imported here to keep the module off startup
+        tablebase_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+        if os.path.isdir(tablebase_dir):
+            chess_logic.load_tablebases(tablebase_dir)
 
     # Create and show the main ChessBoard GUI window
     window = ChessBoard(chess_logic)
-    window.show()
+    with startup_trace.phase('window.show'):
+        window.show()
 
     # Start the Qt event loop
     sys.exit(app.exec_())
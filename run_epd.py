@@ -0,0 +1,231 @@
+"""
+Runs EPD test suites against the ChessLogic search.
+
+Each position is searched with a time or node limit. It counts as solved when the move
+chosen at the end of the search is one of its 'bm' (best move) moves and none of its 'am'
+(avoid move) moves. Its time to solution is the point at which the search settled on a
+correct move for good. Positions are spread over a process pool. The report lists the
+solved count, a histogram of times (or nodes) to solution, the failed positions and the
+overall NPS, so a pruning change can be checked for lost accuracy as well as gained speed.
+
+Usage:
+    python run_epd.py suite.epd [more.epd ...] [--time 5 | --nodes 200000] [--workers 4] [--depth 64]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import ChessLogic
+from engine.pgn import parse_san, move_to_san
+
+_OPERATION_TOKEN_RE = re.compile(r'"[^"]*"|;|[^\s;]+')
+HISTOGRAM_BUCKETS = 8 # Buckets in the time-to-solution histogram, each half the size of the next
+
+_worker_logic = None # One ChessLogic per worker process, reused for every position it searches
+
+
+class EPDPosition:
+    """
+    One EPD record: its position (the four FEN fields) and its operations,
+    each operation name mapped to its list of operands.
+    """
+    __slots__ = ('fen', 'operations', 'source')
+
+    def __init__(self, fen: str, operations: dict[str, list[str]], source: str):
+        self.fen = fen
+        self.operations = operations
+        self.source = source # 'file:line', for reporting
+
+    @property
+    def name(self) -> str:
+        return (self.operations.get('id') or [self.source])[0]
+
+
+def parse_epd(line: str, source: str = '') -> EPDPosition:
+    """
+    Parses one EPD line such as
+        r1b1k2r/... w kq - bm Qxf7+ Nd5; am Bxh7; id "WAC.001";
+
+    Raises:
+        ValueError: If the line has fewer than four position fields.
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD needs at least 4 fields: '{line.strip()}'")
+    operations = {}
+    operation = []
+    # Operations are ';'-terminated; quoted operands may themselves contain ';' or spaces
+    for match in _OPERATION_TOKEN_RE.finditer(fields[4] if len(fields) > 4 else ''):
+        token = match.group()
+        if token == ';':
+            if operation:
+                operations[operation[0]] = operation[1:]
+            operation = []
+        else:
+            operation.append(token[1:-1] if token.startswith('"') else token)
+    if operation:
+        operations[operation[0]] = operation[1:]
+    return EPDPosition(' '.join(fields[:4]), operations, source)
+
+
+def read_epd(path: str) -> list[EPDPosition]:
+    """
+    Reads the positions of an EPD file, skipping blank lines and '#' comments.
+    """
+    positions = []
+    with open(path, encoding='utf-8', errors='replace') as epd_file:
+        for number, line in enumerate(epd_file, start=1):
+            if line.strip() and not line.lstrip().startswith('#'):
+                positions.append(parse_epd(line, f"{os.path.basename(path)}:{number}"))
+    return positions
+
+
+def _init_worker(tablebase_dir: str | None):
+    global _worker_logic
+    _worker_logic = ChessLogic()
+    if tablebase_dir:
+        _worker_logic.load_tablebases(tablebase_dir)
+
+
+def _resolve_moves(chess_logic: ChessLogic, sans: list[str]) -> set[tuple[tuple[int, int], tuple[int, int]]]:
+    moves = set()
+    for san in sans:
+        start_pos, end_pos, _ = parse_san(chess_logic, san)
+        moves.add((start_pos, end_pos))
+    return moves
+
+
+def solve_position(task: tuple) -> dict:
+    """
+    Searches one EPD position in a worker process and returns its JSON-ready result.
+    `task` is (position, max_depth, node_limit, time_limit).
+    """
+    position, max_depth, node_limit, time_limit = task
+    chess_logic = _worker_logic
+    output = {'id': position.name, 'source': position.source, 'solved': False}
+    try:
+        chess_logic.set_fen(position.fen)
+        best_moves = _resolve_moves(chess_logic, position.operations.get('bm', []))
+        avoid_moves = _resolve_moves(chess_logic, position.operations.get('am', []))
+    except ValueError as e:
+        output['error'] = str(e)
+        return output
+    if not best_moves and not avoid_moves:
+        output['error'] = "no bm or am operation"
+        return output
+
+    # The solution time is the first iteration of the final streak of correct moves
+    solution = {}
+
+    def on_iteration(result):
+        correct = (not best_moves or result.best_move in best_moves) and result.best_move not in avoid_moves
+        if not correct:
+            solution.clear()
+        elif not solution:
+            solution.update(seconds=result.elapsed, nodes=result.nodes, depth=result.depth)
+
+    result = chess_logic.search(max_depth=max_depth, node_limit=node_limit, time_limit=time_limit,
+                                info_callback=on_iteration)
+    output['move'] = move_to_san(chess_logic, *result.best_move) if result.best_move else None
+    output['expected'] = ' '.join(position.operations.get('bm', [])) or 'not ' + ' '.join(position.operations['am'])
+    output['solved'] = bool(solution)
+    output['depth'] = result.depth
+    output['nodes'] = result.nodes
+    output['seconds'] = round(result.elapsed, 3)
+    if solution:
+        output['solution_seconds'] = round(solution['seconds'], 3)
+        output['solution_nodes'] = solution['nodes']
+        output['solution_depth'] = solution['depth']
+    return output
+
+
+def histogram(values: list[float], limit: float) -> list[tuple[float, int]]:
+    """
+    Counts `values` into buckets whose upper bounds double up to `limit`:
+    limit/2^(n-1), ..., limit/2, limit. Returns (upper bound, count) pairs.
+    """
+    bounds = [limit / 2 ** power for power in range(HISTOGRAM_BUCKETS - 1, -1, -1)]
+    counts = [0] * len(bounds)
+    for value in values:
+        for index, bound in enumerate(bounds):
+            if value <= bound or index == len(bounds) - 1:
+                counts[index] += 1
+                break
+    return list(zip(bounds, counts))
+
+
+def run_suite(positions: list[EPDPosition], max_depth: int = 64, node_limit: int | None = None,
+              time_limit: float | None = None, workers: int | None = None,
+              tablebase_dir: str | None = None) -> list[dict]:
+    """
+    Searches every position across a process pool and returns the results in suite order.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(position, max_depth, node_limit, time_limit) for position in positions]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tablebase_dir,)) as pool:
+        return list(pool.map(solve_position, tasks))
+
+
+def print_report(results: list[dict], node_limit: int | None, time_limit: float | None, wall_seconds: float,
+                 stream=sys.stdout):
+    solved = [result for result in results if result['solved']]
+    searched = [result for result in results if 'error' not in result]
+    print(f"Solved {len(solved)} of {len(results)} positions", file=stream)
+
+    for result in results:
+        if 'error' in result:
+            print(f"  skipped {result['id']} ({result['source']}): {result['error']}", file=stream)
+        elif not result['solved']:
+            print(f"  failed  {result['id']}: played {result['move']}, expected {result['expected']}", file=stream)
+
+    if solved:
+        # Time limits give a histogram of seconds, node limits (reproducible across machines) one of nodes
+        if time_limit is not None or node_limit is None:
+            limit = time_limit or max(result['solution_seconds'] for result in solved) or 1.0
+            buckets = histogram([result['solution_seconds'] for result in solved], limit)
+            label = lambda bound: f"<= {bound:8.3f}s"
+        else:
+            buckets = histogram([result['solution_nodes'] for result in solved], node_limit)
+            label = lambda bound: f"<= {int(bound):9d} nodes"
+        print("Time to solution:", file=stream)
+        widest = max(count for _, count in buckets) or 1
+        for bound, count in buckets:
+            print(f"  {label(bound)} {count:5d} {'#' * round(40 * count / widest)}", file=stream)
+
+    nodes = sum(result['nodes'] for result in searched)
+    search_seconds = sum(result['seconds'] for result in searched)
+    print(f"{nodes} nodes, {int(nodes / search_seconds) if search_seconds else 0} nps per worker, "
+          f"{int(nodes / wall_seconds) if wall_seconds else 0} nps overall in {wall_seconds:.1f}s", file=stream)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run EPD test suites against the ChessLogic search.")
+    parser.add_argument('epd', nargs='+', help="EPD files with bm/am operations")
+    limits = parser.add_mutually_exclusive_group()
+    limits.add_argument('--time', type=float, default=None, help="Seconds per position")
+    limits.add_argument('--nodes', type=int, default=None, help="Node budget per position")
+    parser.add_argument('--depth', type=int, default=64, help="Deepest iteration per position")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--tablebases', default=None, help="Directory of generated endgame tablebases")
+    parser.add_argument('--json', default=None, help="Also write the per-position results to this JSONL file")
+    args = parser.parse_args(argv)
+    if args.time is None and args.nodes is None and args.depth == 64:
+        args.time = 5.0 # Without any limit a position could run indefinitely
+
+    positions = [position for path in args.epd for position in read_epd(path)]
+    started = time.perf_counter()
+    results = run_suite(positions, args.depth, args.nodes, args.time, args.workers, args.tablebases)
+    print_report(results, args.nodes, args.time, time.perf_counter() - started)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output_file:
+            for result in results:
+                output_file.write(json.dumps(result) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
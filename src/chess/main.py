@@ -1,6 +1,8 @@
 
 import sys
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QApplication
+import startup_trace
 from .logic import ChessLogic
 from .board import ChessBoard
 from .utils import create_images_dir_if_needed
@@ -8,12 +10,20 @@ from .utils import create_images_dir_if_needed
 def run_chess_game():
     """Run the chess game."""
     # Create images directory if needed
-    create_images_dir_if_needed()
+    with startup_trace.phase('create_images_dir_if_needed'):
+        create_images_dir_if_needed()
     
-    app = QApplication(sys.argv)
-    chess_logic = ChessLogic()
-    window = ChessBoard(chess_logic)
-    window.show()
+    with startup_trace.phase('QApplication'):
+        # Lets QtWebEngineWidgets be imported after the application exists, as capabilities.ensure() does
+        QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+        app = QApplication(sys.argv)
+    startup_trace.install_qt_hooks(app) # Reports the startup trace at the first paint when enabled
+    with startup_trace.phase('ChessLogic'):
+        chess_logic = ChessLogic()
+    with startup_trace.phase('ChessBoard.__init__'):
+        window = ChessBoard(chess_logic)
+    with startup_trace.phase('window.show'):
+        window.show()
     return app.exec_()
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""
+Launch-time benchmark for pn.py and main.py.
+
+Starts the application N times under the offscreen Qt platform, with --startup-exit so each
+launch quits at the first paint of its main window, and reports percentiles for the whole
+launch (process start to exit) and for each phase recorded by startup_trace.
+
+Cold launches give every run an empty bytecode cache and a fresh capability state file, so
+all Python modules are compiled again and optional Qt components are probed again, as on a
+first launch after installing. Warm launches share both caches after one unmeasured run.
+
+Usage:
+    python startup_bench.py [--target pn.py|main.py] [--runs 20] [--mode cold|warm|both]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: list[float], percent: int) -> float:
+    """
+    Nearest-rank percentile of a non-empty list.
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-percent * len(ordered) // 100)) # ceil(percent / 100 * n)
+    return ordered[rank - 1]
+
+
+def launch(target: str, pycache_dir: str, state_path: str, timeout: float) -> tuple[float, list[dict]]:
+    """
+    Runs one traced launch and returns (wall seconds, recorded phases).
+
+    Raises:
+        RuntimeError: If the application fails or does not reach its first paint in time.
+    """
+    with tempfile.TemporaryDirectory() as trace_dir:
+        trace_path = os.path.join(trace_dir, 'trace.json')
+        env = dict(os.environ,
+                   QT_QPA_PLATFORM='offscreen',
+                   PYTHONPYCACHEPREFIX=pycache_dir,
+                   SIGMA_CHESS_STATE=state_path,
+                   SIGMA_CHESS_STARTUP_TRACE_JSON=trace_path)
+        started = time.perf_counter()
+        try:
+            completed = subprocess.run([sys.executable, os.path.join(BASE_DIR, target), '--startup-exit'],
+                                       cwd=BASE_DIR, env=env, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"{target} did not reach its first paint within {timeout:g}s") from None
+        wall = time.perf_counter() - started
+        if completed.returncode != 0 or not os.path.exists(trace_path):
+            error = completed.stderr.decode(errors='replace').strip().splitlines()[-1:] or ['no output']
+            raise RuntimeError(f"{target} exited with status {completed.returncode}: {error[0]}")
+        with open(trace_path, encoding='utf-8') as trace_file:
+            return wall, json.load(trace_file)
+
+
+def run_mode(target: str, runs: int, cold: bool, timeout: float) -> list[tuple[float, list[dict]]]:
+    results = []
+    with tempfile.TemporaryDirectory() as shared_dir:
+        shared_cache = os.path.join(shared_dir, 'pycache')
+        shared_state = os.path.join(shared_dir, 'capabilities.json')
+        if not cold:
+            launch(target, shared_cache, shared_state, timeout) # Fill the caches; not measured
+        for run in range(runs):
+            if cold:
+                with tempfile.TemporaryDirectory() as run_dir:
+                    results.append(launch(target, os.path.join(run_dir, 'pycache'),
+                                          os.path.join(run_dir, 'capabilities.json'), timeout))
+            else:
+                results.append(launch(target, shared_cache, shared_state, timeout))
+            print(f"  run {run + 1}/{runs}: {results[-1][0] * 1000:.0f} ms", file=sys.stderr)
+    return results
+
+
+def print_summary(label: str, results: list[tuple[float, list[dict]]]):
+    """
+    Prints wall time and per-phase percentiles. Phases are listed in the order of their first launch;
+    a phase's column covers only the launches in which it ran.
+    """
+    rows = [('launch (wall)', [wall for wall, _ in results])]
+    names = []
+    durations = {}
+    for _, phases in results:
+        for entry in phases:
+            if entry['name'] not in durations:
+                names.append((entry['name'], entry['depth']))
+                durations[entry['name']] = []
+            # A zero-length mark is reported by when it happened, a phase by how long it took
+            durations[entry['name']].append(entry['duration'] or entry['start'])
+    rows += [('  ' * depth + name, durations[name]) for name, depth in names]
+
+    header = ''.join(f"{f'p{p}':>9}" for p in PERCENTILES)
+    print(f"{label} ({len(results)} launches, ms)")
+    print(f"  {'phase':<34}{header}{'min':>9}{'max':>9}")
+    for name, values in rows:
+        cells = ''.join(f"{percentile(values, p) * 1000:9.1f}" for p in PERCENTILES)
+        print(f"  {name:<34}{cells}{min(values) * 1000:9.1f}{max(values) * 1000:9.1f}")
+    print()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold and warm launches of the chess GUI.")
+    parser.add_argument('--target', default='pn.py', choices=('pn.py', 'main.py'), help="Script to launch")
+    parser.add_argument('--runs', type=int, default=20, help="Measured launches per mode")
+    parser.add_argument('--mode', default='both', choices=('cold', 'warm', 'both'), help="Which caches to keep")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds allowed per launch")
+    args = parser.parse_args(argv)
+
+    try:
+        for mode in (('cold', 'warm') if args.mode == 'both' else (args.mode,)):
+            print(f"{mode} launches of {args.target}:", file=sys.stderr)
+            results = run_mode(args.target, args.runs, mode == 'cold', args.timeout)
+            print_summary(f"{args.target}, {mode}", results)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Startup phase timing for pn.py and main.py.
+
+Launch either script with --startup-trace to time each phase of startup: module imports,
+QApplication creation, ChessBoard.__init__ and the methods it calls, up to the first paint of
+the main window. A breakdown is printed to stderr once that paint happens. With --startup-exit
+the application also quits right after the first paint. When SIGMA_CHESS_STARTUP_TRACE_JSON
+names a file, the phases are written there as JSON. startup_bench.py uses both to benchmark
+launches.
+
+Times are measured from the moment this module is imported, which is the first thing both
+scripts do. Tracing is off unless requested, and then phase() and traced() cost next to nothing.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_T0 = time.perf_counter()
+JSON_PATH = os.environ.get('SIGMA_CHESS_STARTUP_TRACE_JSON')
+ENABLED = '--startup-trace' in sys.argv or bool(JSON_PATH)
+EXIT_AFTER_PAINT = '--startup-exit' in sys.argv
+
+_phases = [] # (name, start, end, nesting depth); seconds since _T0
+_depth = 0
+_finished = False
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Times the enclosed block as a startup phase. Phases may nest.
+    """
+    global _depth
+    if not ENABLED or _finished:
+        yield
+        return
+    start = time.perf_counter()
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        _phases.append((name, start - _T0, time.perf_counter() - _T0, _depth))
+
+
+def traced(name: str):
+    """
+    Decorator that times every call of a function made during startup as the phase `name`.
+    Without tracing the function is returned unchanged.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def mark(name: str):
+    """
+    Records a point in time (a phase of zero length).
+    """
+    if ENABLED and not _finished:
+        now = time.perf_counter() - _T0
+        _phases.append((name, now, now, _depth))
+
+
+def phases() -> list[dict]:
+    """
+    Returns the recorded phases in start order.
+    """
+    ordered = sorted(_phases, key=lambda entry: (entry[1], entry[3]))
+    return [{'name': name, 'start': start, 'duration': end - start, 'depth': depth}
+            for name, start, end, depth in ordered]
+
+
+def report(stream=None):
+    """
+    Prints the phase breakdown: start offset, duration and the phase name, indented by nesting.
+    """
+    stream = stream or sys.stderr
+    print("Startup trace (ms since launch)", file=stream)
+    print(f"  {'start':>9} {'duration':>9}  phase", file=stream)
+    for entry in phases():
+        print(f"  {entry['start'] * 1000:9.1f} {entry['duration'] * 1000:9.1f}  {'  ' * entry['depth']}{entry['name']}",
+              file=stream)
+
+
+def finish():
+    """
+    Ends tracing: prints the report, writes the JSON file if requested, and stops recording.
+    """
+    global _finished
+    if not ENABLED or _finished:
+        return
+    _finished = True
+    if '--startup-trace' in sys.argv:
+        report()
+    if JSON_PATH:
+        with open(JSON_PATH, 'w', encoding='utf-8') as json_file:
+            json.dump(phases(), json_file)
+
+
+def install_qt_hooks(app):
+    """
+    Call right after creating the QApplication. Marks the first paint of the main window
+    (the first QMainWindow to paint) and then finishes the trace, quitting the application if
+    --startup-exit was given. In that mode, modal dialogs shown during startup are dismissed
+    automatically, so an unattended launch can still reach its first paint.
+    """
+    if not ENABLED:
+        return
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QMainWindow, QWidget
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, watched, event):
+            if (event.type() == QEvent.Paint and isinstance(watched, QWidget)
+                    and isinstance(watched.window(), QMainWindow)):
+                app.removeEventFilter(self)
+                mark('first paint')
+                finish()
+                if EXIT_AFTER_PAINT:
+                    QTimer.singleShot(0, app.quit)
+            return False
+
+    paint_filter = FirstPaintFilter(app) # Parented to the application, which keeps it alive
+    app.installEventFilter(paint_filter)
+
+    if EXIT_AFTER_PAINT:
+        def dismiss_modal_dialogs():
+            dialog = app.activeModalWidget()
+            if dialog is not None and hasattr(dialog, 'reject'):
+                dialog.reject()
+        modal_timer = QTimer(app)
+        modal_timer.timeout.connect(dismiss_modal_dialogs)
+        modal_timer.start(20)
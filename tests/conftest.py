@@ -0,0 +1,7 @@
+"""
+Makes the repository root importable, so `pytest` finds the engine package from any directory.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
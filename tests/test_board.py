@@ -0,0 +1,122 @@
+"""
+Checks that the board scene of the pn.py GUI stays in step with the game: one item per piece
+on its square, with the cached pixmap for its size, through random games, jumps in the move
+history, highlights, board style changes and window resizes. Runs on the offscreen Qt platform
+and is skipped when PyQt5 is not installed.
+"""
+import os
+import random
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+_app = None # Kept referenced for the whole session: Qt aborts if widgets outlive it
+
+
+@pytest.fixture(scope='module')
+def pn(tmp_path_factory):
+    global _app
+    _app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    import capabilities
+    capabilities.STATE_PATH = str(tmp_path_factory.mktemp('state') / 'capabilities.json')
+    import pn
+    return pn
+
+
+@pytest.fixture
+def board(pn, monkeypatch):
+    # Warnings about missing images would block the test in a modal dialog
+    monkeypatch.setattr(QtWidgets.QMessageBox, 'warning', staticmethod(lambda *args, **kwargs: None))
+    monkeypatch.setattr(QtWidgets.QMessageBox, 'information', staticmethod(lambda *args, **kwargs: None))
+    window = pn.ChessBoard(pn.ChessLogic())
+    window.show()
+    window.set_piece_set('pieces') # The sprite sheet shipped with the repository
+    assert not window.use_unicode_pieces
+    pump(100)
+    yield window
+    window.close()
+    window.deleteLater()
+    pump(10)
+
+
+def pump(milliseconds: int):
+    end = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < end:
+        _app.processEvents()
+        time.sleep(0.005)
+
+
+def check_scene(pn, window):
+    scene_items = set(window.scene.items())
+    size = window.square_size
+    pieces = 0
+    for row in range(8):
+        for col in range(8):
+            piece = window.chess_logic.get_piece(row, col)
+            item = window.piece_items.get((row, col))
+            assert (piece is None) == (item is None), (row, col, piece)
+            if piece is None:
+                continue
+            pieces += 1
+            assert item in scene_items
+            center = item.sceneBoundingRect().center()
+            if isinstance(item, pn.QGraphicsPixmapItem):
+                assert abs(center.x() - (col + 0.5) * size) < 1 and abs(center.y() - (row + 0.5) * size) < 1
+                assert item.sceneBoundingRect().width() == pytest.approx(window.piece_pixmap_size(), abs=1.01)
+            else:
+                # Unicode symbols are only roughly centred, but must stay within their square
+                assert int(center.x() // size) == col and int(center.y() // size) == row
+                assert item.toPlainText() == window.unicode_pieces[piece]
+    # The background layer, the pieces and the pooled highlights; nothing is left behind
+    assert len(scene_items) == 1 + pieces + len(window.highlight_items)
+
+
+def test_scene_follows_random_games(pn, board):
+    rng = random.Random(1)
+    for game in range(3):
+        board.reset_game()
+        board.use_unicode_pieces = game == 2
+        for _ in range(120):
+            moves = board.chess_logic.generate_legal_moves()
+            if not moves:
+                break
+            start_pos, end_pos = rng.choice(moves)
+            board.chess_logic.make_move(start_pos, end_pos, rng.choice('QRBN'))
+            board.refresh_board()
+            check_scene(pn, board)
+            if rng.random() < 0.1:
+                board.jump_to_ply(rng.randrange(len(board.chess_logic.move_history) + 1))
+                check_scene(pn, board)
+            if rng.random() < 0.1:
+                board.valid_moves = board.chess_logic.legal_moves_from(rng.choice(moves)[0])
+                board.draw_move_highlight(board.valid_moves)
+                check_scene(pn, board)
+        board.create_styled_chessboard2()
+        check_scene(pn, board)
+
+
+def test_resize_keeps_pieces_on_their_squares(pn, board):
+    for width, height in ((1400, 1100), (700, 500), (1000, 800)):
+        board.resize(width, height)
+        pump(60) # Past the resize debounce; pieces may still be scaled in the background
+        check_scene(pn, board)
+        pump(400)
+        check_scene(pn, board)
+        assert not board.pending_piece_sizes
+        background = board.board_background_item.pixmap()
+        assert background.width() / background.devicePixelRatio() == 8 * board.square_size
+
+
+def test_fallback_greeting_survives_click_then_timer(pn, board, monkeypatch):
+    from PyQt5.QtCore import QEvent, Qt
+    from PyQt5.QtTest import QTest
+    monkeypatch.setattr(pn, 'GREETING_DURATION_MS', 50)
+    board.show_fallback_greeting()
+    greeting = board.welcome_greeting
+    QTest.mouseClick(greeting, Qt.LeftButton) # Dismissed before its timer fires
+    _app.sendPostedEvents(None, QEvent.DeferredDelete)
+    assert board.welcome_greeting is None and pn.sip.isdeleted(greeting)
+    pump(150) # The timer then finds nothing to hide
+    board.hide_welcome_greeting()
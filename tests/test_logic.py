@@ -0,0 +1,139 @@
+"""
+Randomised invariants of ChessLogic's game state: the incremental Zobrist key and repetition
+counts, make_move/undo/redo, and the halfmove clock.
+"""
+import random
+from collections import Counter
+
+import pytest
+
+from engine import ChessLogic
+from engine.pgn import parse_san
+
+# Castling, en passant and promotions are all available within a few plies
+TACTICAL_FEN = 'r3k2r/pPp2ppp/8/3pP3/8/8/P1PP1PPP/R3K2R w KQkq d6 0 12'
+
+
+def snapshot(chess_logic: ChessLogic) -> tuple:
+    return (chess_logic.to_fen(), list(chess_logic.position_history), dict(chess_logic.position_counts),
+            {color: list(pieces) for color, pieces in chess_logic.captured_pieces.items()})
+
+
+def random_move(chess_logic: ChessLogic, rng: random.Random):
+    moves = chess_logic.generate_legal_moves()
+    if not moves:
+        return None
+    start_pos, end_pos = rng.choice(moves)
+    return start_pos, end_pos, rng.choice('QRBN')
+
+
+def play_san(chess_logic: ChessLogic, line: str):
+    for san in line.split():
+        start_pos, end_pos, promotion = parse_san(chess_logic, san)
+        chess_logic.make_move(start_pos, end_pos, promotion or 'Q')
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_make_undo_redo_keep_hash_and_history_consistent(seed):
+    rng = random.Random(seed)
+    chess_logic = ChessLogic()
+    if seed % 2:
+        chess_logic.set_fen(TACTICAL_FEN)
+    for _ in range(150):
+        move = random_move(chess_logic, rng)
+        if move is None:
+            break
+        before = snapshot(chess_logic)
+        chess_logic.make_move(*move)
+        after = snapshot(chess_logic)
+
+        assert chess_logic.position_history[-1] == chess_logic.compute_hash()
+        assert chess_logic.position_counts == Counter(chess_logic.position_history)
+        assert chess_logic.undo_last_move()
+        assert snapshot(chess_logic) == before
+        assert chess_logic.redo_last_move()
+        assert snapshot(chess_logic) == after
+
+
+def test_search_leaves_the_game_state_untouched():
+    rng = random.Random(1)
+    chess_logic = ChessLogic()
+    chess_logic.set_fen(TACTICAL_FEN)
+    for _ in range(6):
+        chess_logic.make_move(*random_move(chess_logic, rng))
+    before = snapshot(chess_logic)
+    chess_logic.search(max_depth=2)
+    assert snapshot(chess_logic) == before
+
+
+def test_halfmove_clock():
+    chess_logic = ChessLogic()
+    play_san(chess_logic, 'Nf3 Nc6 Ng1')
+    assert chess_logic.halfmove_clock == 3
+    play_san(chess_logic, 'e5') # Pawn move
+    assert chess_logic.halfmove_clock == 0
+    play_san(chess_logic, 'Nf3 Nb4 Nxe5') # Capture
+    assert chess_logic.halfmove_clock == 0
+    chess_logic.undo_last_move()
+    assert chess_logic.halfmove_clock == 2
+
+
+def test_fifty_move_rule():
+    chess_logic = ChessLogic()
+    chess_logic.set_fen('8/8/4k3/8/8/4K3/8/7R w - - 99 80')
+    assert not chess_logic.is_fifty_move_draw()
+    play_san(chess_logic, 'Rh2')
+    assert chess_logic.is_fifty_move_draw()
+
+
+def test_threefold_repetition():
+    chess_logic = ChessLogic()
+    play_san(chess_logic, 'Nf3 Nf6 Ng1 Ng8')
+    assert chess_logic.is_repetition(2) and not chess_logic.is_repetition(3)
+    play_san(chess_logic, 'Nf3 Nf6 Ng1 Ng8')
+    assert chess_logic.is_repetition(3)
+    chess_logic.undo_last_move() # Back to the second occurrence of the position after 2. Ng1
+    assert chess_logic.is_repetition(2) and not chess_logic.is_repetition(3)
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_goto_ply_matches_the_positions_played(seed):
+    rng = random.Random(seed)
+    chess_logic = ChessLogic()
+    if seed % 2:
+        chess_logic.set_fen(TACTICAL_FEN)
+    played = [snapshot(chess_logic)]
+    for _ in range(120):
+        move = random_move(chess_logic, rng)
+        if move is None:
+            break
+        chess_logic.make_move(*move)
+        played.append(snapshot(chess_logic))
+    line = list(chess_logic.move_history)
+
+    for _ in range(60):
+        ply = rng.randrange(len(played))
+        chess_logic.goto_ply(ply)
+        assert snapshot(chess_logic) == played[ply]
+        assert chess_logic.move_history + chess_logic.redo_history[::-1] == line
+    chess_logic.goto_ply(len(line))
+    assert snapshot(chess_logic) == played[-1]
+
+
+def test_new_move_after_goto_ply_drops_the_old_line():
+    rng = random.Random(7)
+    chess_logic = ChessLogic()
+    for _ in range(3 * ChessLogic.CHECKPOINT_INTERVAL):
+        chess_logic.make_move(*random_move(chess_logic, rng))
+    chess_logic.goto_ply(ChessLogic.CHECKPOINT_INTERVAL + 3)
+    chess_logic.make_move(*random_move(chess_logic, rng))
+    assert not chess_logic.redo_history
+    assert max(chess_logic.ply_checkpoints) <= len(chess_logic.move_history)
+
+    # Checkpoints of the new line restore it, not the dropped one
+    for _ in range(2 * ChessLogic.CHECKPOINT_INTERVAL):
+        chess_logic.make_move(*random_move(chess_logic, rng))
+    expected = snapshot(chess_logic)
+    chess_logic.goto_ply(0)
+    chess_logic.goto_ply(len(chess_logic.move_history) + len(chess_logic.redo_history))
+    assert snapshot(chess_logic) == expected
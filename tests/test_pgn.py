@@ -0,0 +1,81 @@
+"""
+Round trips random games through write_game, read_games and load_game, and checks the reader
+on the parts of PGN that the writer never produces.
+"""
+import io
+import random
+
+import pytest
+
+from engine import ChessLogic
+from engine.pgn import LINE_LENGTH, load_game, read_games, write_game
+
+START_FENS = [
+    ChessLogic.STARTING_FEN,
+    'r3k2r/pPp2ppp/8/3pP3/8/8/P1PP1PPP/R3K2R w KQkq d6 0 12', # Castling, en passant, promotion
+    'r3k2r/8/8/8/8/8/1p4P1/R3K2R b KQkq - 3 40', # Black to move first
+]
+
+
+def random_game(rng: random.Random, start_fen: str, plies: int) -> ChessLogic:
+    chess_logic = ChessLogic()
+    chess_logic.set_fen(start_fen)
+    for _ in range(plies):
+        moves = chess_logic.generate_legal_moves()
+        if not moves:
+            break
+        start_pos, end_pos = rng.choice(moves)
+        chess_logic.make_move(start_pos, end_pos, rng.choice('QRBN'))
+    return chess_logic
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_round_trip(seed):
+    rng = random.Random(seed)
+    original = random_game(rng, START_FENS[seed % len(START_FENS)], rng.randrange(0, 200))
+    stream = io.StringIO()
+    write_game(stream, original, {'Event': 'Round "trip"', 'Round': str(seed)})
+    text = stream.getvalue()
+    assert all(len(line) <= LINE_LENGTH for line in text.splitlines())
+
+    games = list(read_games(io.StringIO(text + '\n' + text)))
+    assert len(games) == 2
+    game = games[0]
+    assert game.headers['Event'] == 'Round "trip"'
+    assert ('FEN' in game.headers) == (START_FENS[seed % len(START_FENS)] != ChessLogic.STARTING_FEN)
+
+    loaded = ChessLogic()
+    assert load_game(loaded, game) == len(original.move_history)
+    assert loaded.to_fen() == original.to_fen()
+    assert loaded.position_history == original.position_history
+    assert [(r.start_pos, r.end_pos, r.promoted_to) for r in loaded.move_history] == \
+           [(r.start_pos, r.end_pos, r.promoted_to) for r in original.move_history]
+
+
+def test_writing_leaves_the_game_untouched():
+    chess_logic = random_game(random.Random(3), ChessLogic.STARTING_FEN, 40)
+    chess_logic.undo_last_move()
+    chess_logic.game_over, chess_logic.winner = True, 'b'
+    before = (chess_logic.to_fen(), list(chess_logic.move_history), list(chess_logic.redo_history))
+    write_game(io.StringIO(), chess_logic)
+    assert (chess_logic.to_fen(), chess_logic.move_history, chess_logic.redo_history) == before
+    assert chess_logic.game_over and chess_logic.winner == 'b'
+
+
+def test_reader_skips_comments_variations_and_nags():
+    text = """% escaped line
+[Event "Annotated"]
+[White "A \\"quoted\\" name"]
+
+1. e4 {a comment
+spanning lines} e5 $1 2. Nf3 (2. f4 exf4 (2... d5) 3. Nf3) Nc6 ; rest of line ignored
+3. Bb5 a6 1-0
+[Event "No result token"]
+
+1. d4 d5
+"""
+    first, second = read_games(io.StringIO(text))
+    assert first.headers['White'] == 'A "quoted" name'
+    assert first.moves == ['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6']
+    assert first.result == '1-0'
+    assert second.moves == ['d4', 'd5'] and second.result == '*'
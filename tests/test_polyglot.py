@@ -0,0 +1,68 @@
+"""
+Checks ChessLogic's position hash against the reference keys of the Polyglot book format,
+and the move encoding and lookups of OpeningBook on a small generated book.
+"""
+import random
+
+import pytest
+
+from engine import ChessLogic, OpeningBook
+from engine.polyglot import ENTRY_STRUCT, decode_move, encode_move
+from engine.uci import parse_square
+
+# Test positions and keys published with the Polyglot book format specification
+REFERENCE_KEYS = [
+    ('', 0x463B96181691FC9C),
+    ('e2e4', 0x823C9B50FD114196),
+    ('e2e4 d7d5', 0x0756B94461C50FB0),
+    ('e2e4 d7d5 e4e5', 0x662FAFB965DB29D4),
+    ('e2e4 d7d5 e4e5 f7f5', 0x22A48B5A8E47FF78),
+    ('e2e4 d7d5 e4e5 f7f5 e1e2', 0x652A607CA3F242C1),
+    ('e2e4 d7d5 e4e5 f7f5 e1e2 e8f7', 0x00FDD303C946BDD9),
+    ('a2a4 b7b5 h2h4 b5b4 c2c4', 0x3C8123EA7B067637),
+    ('a2a4 b7b5 h2h4 b5b4 c2c4 b4c3 a1a3', 0x5C3F9B829B279560),
+]
+
+
+def play(chess_logic: ChessLogic, moves: str):
+    for move in moves.split():
+        chess_logic.make_move(parse_square(move[:2]), parse_square(move[2:4]))
+
+
+@pytest.mark.parametrize('moves, key', REFERENCE_KEYS)
+def test_position_hash_is_the_polyglot_key(moves, key):
+    chess_logic = ChessLogic()
+    play(chess_logic, moves)
+    assert chess_logic.position_history[-1] == key
+    assert chess_logic.compute_hash() == key
+
+
+def test_move_encoding_round_trip():
+    chess_logic = ChessLogic()
+    chess_logic.set_fen('r3k2r/pPp2ppp/8/3pP3/8/8/P1PP1PPP/R3K2R w KQkq d6 0 12')
+    for start_pos, end_pos in chess_logic.generate_legal_moves():
+        piece = chess_logic.get_piece(*start_pos)
+        is_castling = piece[1] == 'K' and abs(end_pos[1] - start_pos[1]) == 2
+        promotions = 'QRBN' if piece[1] == 'P' and end_pos[0] == 0 else (None,)
+        for promotion in promotions:
+            move = encode_move(start_pos, end_pos, promotion, is_castling)
+            assert decode_move(move, chess_logic.board) == (start_pos, end_pos, promotion)
+    # Castling is stored as the king taking its own rook
+    assert encode_move((7, 4), (7, 6), is_castling=True) == encode_move((7, 4), (7, 7))
+
+
+def test_opening_book_lookup(tmp_path):
+    start_key = REFERENCE_KEYS[0][1]
+    e4, d4, a3 = encode_move((6, 4), (4, 4)), encode_move((6, 3), (4, 3)), encode_move((6, 0), (5, 0))
+    entries = sorted([(start_key, e4, 3, 0), (start_key, d4, 1, 0), (start_key, a3, 0, 0),
+                      (start_key - 1, a3, 5, 0), (start_key + 1, a3, 5, 0)])
+    path = tmp_path / 'book.bin'
+    path.write_bytes(b''.join(ENTRY_STRUCT.pack(*entry) for entry in entries))
+
+    with OpeningBook(str(path), random.Random(0)) as book:
+        assert len(book) == 5
+        assert sorted(book.find_entries(start_key)) == sorted([(e4, 3, 0), (d4, 1, 0), (a3, 0, 0)])
+        assert book.find_entries(0x1234) == []
+        board = ChessLogic().board
+        chosen = {book.choose_move(start_key, board)[:2] for _ in range(200)}
+        assert chosen == {((6, 4), (4, 4)), ((6, 3), (4, 3))} # Never the weight-0 move
@@ -0,0 +1,97 @@
+"""
+Checks the generated KQK, KRK and KPK tables against known distances to mate and against a
+one-ply recomputation from ChessLogic's own move generation.
+"""
+import random
+
+import pytest
+
+from engine import ChessLogic
+from engine.tablebase import LOSS, Tablebases, generate_table, write_table
+
+# Longest distance to mate in plies: (side to move wins, side to move gets mated)
+LONGEST_MATES = {'KQK': (19, 20), 'KRK': (31, 32), 'KPK': (55, 56)}
+PROBE_SAMPLES = 300
+
+
+@pytest.fixture(scope='module')
+def tables(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tablebases')
+    generated = {}
+    for name in ('KQK', 'KRK', 'KPK'): # KPK promotions look up KQK and KRK
+        generated[name] = generate_table(name, generated)
+        write_table(str(directory / f'{name}.tb'), name, generated[name])
+    tablebases = Tablebases(str(directory))
+    yield generated, tablebases
+    tablebases.close()
+
+
+@pytest.mark.parametrize('name', sorted(LONGEST_MATES))
+def test_longest_mates(tables, name):
+    values = tables[0][name]
+    wins = [value for value in values if 0 < value < LOSS]
+    losses = [value - LOSS for value in values if LOSS <= value < 255]
+    assert (max(wins), max(losses)) == LONGEST_MATES[name]
+
+
+def random_position(rng: random.Random, pieces: str) -> str:
+    """
+    Returns a FEN with both kings, the stronger side's `pieces` and either side to move.
+    The position may be illegal; the tables report those as not covered.
+    """
+    strong, weak = rng.choice((('w', 'b'), ('b', 'w')))
+    squares = rng.sample(range(64), 2 + len(pieces))
+    board = [['1'] * 8 for _ in range(8)]
+    for square, (color, piece_type) in zip(squares, [(strong, 'K'), (weak, 'K')] + [(strong, p) for p in pieces]):
+        row, col = divmod(square, 8)
+        if piece_type == 'P' and row in (0, 7):
+            return random_position(rng, pieces)
+        board[row][col] = piece_type if color == 'w' else piece_type.lower()
+    placement = '/'.join(''.join(row) for row in board)
+    for empty in range(8, 1, -1): # Merge runs of empty squares
+        placement = placement.replace('1' * empty, str(empty))
+    return f"{placement} {rng.choice('wb')} - - 0 1"
+
+
+def one_ply_result(chess_logic: ChessLogic, tablebases: Tablebases) -> tuple[int, int]:
+    """
+    Derives (outcome, plies) for the side to move from the table results of every legal move.
+    """
+    children = []
+    for start_pos, end_pos in chess_logic.generate_legal_moves():
+        piece = chess_logic.get_piece(*start_pos)
+        promotions = 'QRBN' if piece[1] == 'P' and end_pos[0] in (0, 7) else 'Q'
+        for promotion in promotions:
+            chess_logic.make_move(start_pos, end_pos, promotion)
+            if not chess_logic.generate_legal_moves():
+                mated = chess_logic.is_opponent_in_check(chess_logic.current_turn)
+                result = (-1, 0) if mated else (0, 0)
+            else:
+                # Bare kings and minor pieces promoted to are not covered; they are draws
+                result = tablebases.probe(chess_logic.board, chess_logic.current_turn) or (0, 0)
+            children.append(result)
+            chess_logic.undo_last_move()
+
+    if not children:
+        return (-1, 0) if chess_logic.is_opponent_in_check(chess_logic.current_turn) else (0, 0)
+    mates = [plies for outcome, plies in children if outcome == -1]
+    if mates:
+        return 1, min(mates) + 1
+    if any(outcome == 0 for outcome, _ in children):
+        return 0, 0
+    return -1, max(plies for _, plies in children) + 1
+
+
+@pytest.mark.parametrize('pieces', ['Q', 'R', 'P'])
+def test_probes_match_one_ply_recomputation(tables, pieces):
+    _, tablebases = tables
+    rng = random.Random(pieces)
+    chess_logic = ChessLogic()
+    checked = 0
+    while checked < PROBE_SAMPLES:
+        chess_logic.set_fen(random_position(rng, pieces))
+        result = tablebases.probe(chess_logic.board, chess_logic.current_turn)
+        if result is None:
+            continue # Illegal: kings touching or the side not to move in check
+        assert result == one_ply_result(chess_logic, tablebases), chess_logic.to_fen()
+        checked += 1